@@ -9,6 +9,7 @@ from alembic import context
 from app.core.config import settings
 from app.db.database import Base
 from app.models import User, Task  # Importar todos los modelos
+from app.models.task import TASK_SEARCH_OBJECTS
 
 # this is the Alembic Config object
 config = context.config
@@ -23,12 +24,23 @@ if config.config_file_name is not None:
 # add your model's MetaData object here for 'autogenerate' support
 target_metadata = Base.metadata
 
+
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Excluye de la autogeneración los objetos de búsqueda de texto completo
+    y el índice del prefijo del título, que se crean con DDL propio de cada
+    motor y no están en el modelo.
+    """
+    return name not in TASK_SEARCH_OBJECTS and not (name or "").startswith("tasks_fts")
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode."""
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -47,7 +59,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,41 @@
+"""indices filtros tareas
+
+Revision ID: 4b7d2c9e1f3a
+Revises: e6fb63d01a7f
+Create Date: 2026-10-18 11:20:42.183562
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d2c9e1f3a'
+down_revision: Union[str, None] = 'e6fb63d01a7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Índices para filtrar y ordenar el listado de tareas de cada usuario
+    op.create_index('ix_tasks_owner_created', 'tasks', ['owner_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tasks_owner_updated', 'tasks', ['owner_id', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_tasks_owner_title', 'tasks', ['owner_id', 'title', 'id'], unique=False)
+    # Índice parcial con solo las tareas pendientes
+    op.create_index(
+        'ix_tasks_owner_open',
+        'tasks',
+        ['owner_id', 'id'],
+        unique=False,
+        postgresql_where=sa.text('is_completed = false'),
+        sqlite_where=sa.text('is_completed = 0')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_owner_open', table_name='tasks')
+    op.drop_index('ix_tasks_owner_title', table_name='tasks')
+    op.drop_index('ix_tasks_owner_updated', table_name='tasks')
+    op.drop_index('ix_tasks_owner_created', table_name='tasks')
@@ -0,0 +1,38 @@
+"""contadores tareas
+
+Revision ID: 5d8f1b3c6a27
+Revises: 9c3e5a7b2d18
+Create Date: 2026-10-18 13:10:44.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d8f1b3c6a27'
+down_revision: Union[str, None] = '9c3e5a7b2d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('task_stats',
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('owner_id')
+    )
+    # Contadores iniciales a partir de las tareas existentes
+    op.execute(
+        "INSERT INTO task_stats (owner_id, total, completed) "
+        "SELECT owner_id, count(*), count(*) FILTER (WHERE is_completed IS true) "
+        "FROM tasks GROUP BY owner_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('task_stats')
@@ -0,0 +1,29 @@
+"""versiones tareas
+
+Revision ID: 7a2e4c9d1b53
+Revises: 5d8f1b3c6a27
+Create Date: 2026-10-18 14:02:37.551204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a2e4c9d1b53'
+down_revision: Union[str, None] = '5d8f1b3c6a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Versiones para los ETag de cada tarea y de los listados de cada usuario
+    op.add_column('tasks', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('task_stats', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('task_stats', 'version')
+    op.drop_column('tasks', 'version')
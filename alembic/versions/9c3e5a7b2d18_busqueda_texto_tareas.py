@@ -0,0 +1,73 @@
+"""busqueda texto tareas
+
+Revision ID: 9c3e5a7b2d18
+Revises: 4b7d2c9e1f3a
+Create Date: 2026-10-18 12:05:13.402871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3e5a7b2d18'
+down_revision: Union[str, None] = '4b7d2c9e1f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        # Columna tsvector generada (el título pesa más) e índice GIN
+        op.execute(
+            "ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('spanish', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('spanish', coalesce(description, '')), 'B')"
+            ") STORED"
+        )
+        op.execute("CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)")
+
+    elif dialect == 'sqlite':
+        # Tabla FTS5 sobre tasks sincronizada con triggers
+        op.execute(
+            "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+            "title, description, owner_id, content='tasks', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+            "INSERT INTO tasks_fts(rowid, title, description, owner_id) "
+            "VALUES (new.id, new.title, new.description, new.owner_id); END"
+        )
+        op.execute(
+            "CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner_id) "
+            "VALUES ('delete', old.id, old.title, old.description, old.owner_id); END"
+        )
+        op.execute(
+            "CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description, owner_id ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner_id) "
+            "VALUES ('delete', old.id, old.title, old.description, old.owner_id); "
+            "INSERT INTO tasks_fts(rowid, title, description, owner_id) "
+            "VALUES (new.id, new.title, new.description, new.owner_id); END"
+        )
+        # Indexar las tareas que ya existen
+        op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.drop_index('ix_tasks_search_vector', table_name='tasks')
+        op.drop_column('tasks', 'search_vector')
+
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER tasks_fts_update")
+        op.execute("DROP TRIGGER tasks_fts_delete")
+        op.execute("DROP TRIGGER tasks_fts_insert")
+        op.execute("DROP TABLE tasks_fts")
@@ -0,0 +1,30 @@
+"""indice prefijo titulo
+
+Revision ID: b81f4d2a6c90
+Revises: 7a2e4c9d1b53
+Create Date: 2026-10-18 18:21:44.093517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4d2a6c90'
+down_revision: Union[str, None] = '7a2e4c9d1b53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # El filtro por prefijo del título compara con COLLATE "C"; en SQLite
+    # ya lo sirve ix_tasks_owner_title
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE INDEX ix_tasks_owner_title_c ON tasks (owner_id, title COLLATE "C", id)')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_tasks_owner_title_c', table_name='tasks')
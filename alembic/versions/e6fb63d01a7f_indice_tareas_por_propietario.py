@@ -0,0 +1,27 @@
+"""indice tareas por propietario
+
+Revision ID: e6fb63d01a7f
+Revises: 268fbf16ebcd
+Create Date: 2026-10-18 10:02:11.415208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6fb63d01a7f'
+down_revision: Union[str, None] = '268fbf16ebcd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Índice compuesto para la paginación por cursor (owner_id, id)
+    op.create_index('ix_tasks_owner_id_id', 'tasks', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_owner_id_id', table_name='tasks')
@@ -3,23 +3,76 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
+from app.core.cache import user_cache
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.db.database import get_db
+from app.db.database import (
+    close_session, get_db, open_session, pin_to_primary, reads_from_primary, run_db
+)
 from app.crud.user import get_user
-from app.models.user import User
+from app.schemas.user import CurrentUser
 
 # Define el esquema de autenticación OAuth2
 # tokenUrl es la ruta donde se obtendrá el token (la crearemos después)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-def get_current_user(
+def _token_user_id(token: str) -> Optional[int]:
+    """
+    ID del usuario del token, None si no es válido.
+    decode_access_token usa la caché de tokens: repetirlo es barato.
+    """
+    payload = decode_access_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+    return int(payload["sub"])
+
+
+async def _get_read_db(token: str = Depends(oauth2_scheme)):
+    """
+    Sesión para rutas de solo lectura: una réplica, salvo que el usuario
+    haya escrito hace menos de READ_YOUR_WRITES_SECONDS (entonces la
+    principal, para que vea sus propios cambios).
+    """
+    user_id = _token_user_id(token)
+    primary = user_id is not None and await reads_from_primary(user_id)
+    db = open_session(replica=not primary)
+    try:
+        yield db
+    finally:
+        await close_session(db)
+
+
+async def _get_write_db(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
-) -> User:
+):
+    """
+    Sesión de la principal para rutas que escriben. Si la ruta termina sin
+    error, las lecturas del usuario van a la principal durante
+    READ_YOUR_WRITES_SECONDS (antes de enviar la respuesta).
+    """
+    yield db
+    user_id = _token_user_id(token)
+    if user_id is not None:
+        await pin_to_primary(user_id)
+
+
+# Sin réplicas ambas son la sesión normal de get_db
+get_read_db = _get_read_db if settings.DATABASE_REPLICA_URLS else get_db
+get_write_db = _get_write_db if settings.DATABASE_REPLICA_URLS else get_db
+
+
+async def get_current_user(
+    db: Session = Depends(get_read_db),
+    token: str = Depends(oauth2_scheme)
+) -> CurrentUser:
     """
     Obtiene el usuario actual desde el token JWT.
     Se usa como dependencia en rutas protegidas.
+    
+    Los datos del usuario se guardan en caché durante USER_CACHE_TTL_SECONDS;
+    update_user y delete_user invalidan la entrada correspondiente.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,17 +90,26 @@ def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    # Obtener el usuario de la base de datos
-    user = get_user(db, user_id=int(user_id))
-    if user is None:
-        raise credentials_exception
+    # Buscar primero en la caché y si no está, en la base de datos
+    cache_key = str(int(user_id))
+    cached = await user_cache.aget(cache_key)
+    if cached is None:
+        user = await run_db(db, get_user, user_id=int(user_id))
+        if user is None:
+            raise credentials_exception
+        cached = {
+            "id": user.id,
+            "is_active": bool(user.is_active),
+            "is_superuser": bool(user.is_superuser),
+        }
+        await user_cache.aset(cache_key, cached)
     
-    return user
+    return CurrentUser(**cached)
 
 
-def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+async def get_current_active_user(
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """
     Verifica que el usuario actual esté activo.
     Se usa como dependencia en rutas que requieren usuarios activos.
@@ -0,0 +1,53 @@
+import hashlib
+
+from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from app.api.dependencies.auth import _token_user_id, oauth2_scheme
+from app.core.ratelimit import (
+    login_account_limit, login_ip_limit, register_ip_limit, task_user_limit
+)
+
+
+def client_ip(request: Request) -> str:
+    """
+    IP del cliente. Detrás de un proxy, uvicorn la toma de X-Forwarded-For
+    solo si el proxy está en FORWARDED_ALLOW_IPS (no se lee la cabecera
+    aquí: cualquier cliente podría falsificarla).
+    """
+    return request.client.host if request.client else "desconocida"
+
+
+def _account_key(email: str) -> str:
+    # Longitud fija en memoria y sin emails en claro en Redis
+    return hashlib.blake2b(email.strip().lower().encode(), digest_size=16).hexdigest()
+
+
+async def limit_login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends()
+) -> None:
+    """
+    Límites de login por IP y por cuenta, antes de consultar la base de
+    datos o calcular bcrypt. Cuentan todos los intentos, también los de
+    emails que no existen.
+    """
+    await login_ip_limit.hit(client_ip(request))
+    await login_account_limit.hit(_account_key(form_data.username))
+
+
+async def limit_register(request: Request) -> None:
+    """
+    Límite de registros por IP (cada registro calcula un hash de bcrypt).
+    """
+    await register_ip_limit.hit(client_ip(request))
+
+
+async def limit_task_requests(token: str = Depends(oauth2_scheme)) -> None:
+    """
+    Límite de peticiones a /api/tasks por usuario, antes de cargar el
+    usuario. Los tokens no válidos no cuentan: la ruta responderá 401.
+    """
+    user_id = _token_user_id(token)
+    if user_id is not None:
+        await task_user_limit.hit(str(user_id))
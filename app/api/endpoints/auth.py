@@ -3,18 +3,29 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.api.dependencies.ratelimit import limit_login, limit_register
+from app.db.database import get_db, pin_to_primary, run_db
 from app.schemas.user import UserCreate, User, Token
 from app.schemas.token import TokenData
-from app.crud.user import create_user, get_user_by_email, authenticate_user
-from app.core.security import create_access_token
+from app.crud.user import create_user, get_user_by_email, set_password_hash
+from app.core.security import (
+    create_access_token,
+    get_password_hash_async,
+    verify_and_update_password_async
+)
 from app.core.config import settings
 
 router = APIRouter()
 
 
-@router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-def register(
+# Los límites de frecuencia se comprueban antes que el resto de dependencias
+@router.post(
+    "/register",
+    response_model=User,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_register)]
+)
+async def register(
     user_in: UserCreate,
     db: Session = Depends(get_db)
 ):
@@ -26,20 +37,25 @@ def register(
     - **password**: Contraseña (mínimo 8 caracteres)
     """
     # Verificar si el email ya existe
-    user = get_user_by_email(db, email=user_in.email)
+    user = await run_db(db, get_user_by_email, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El email ya está registrado"
         )
     
-    # Crear el usuario
-    user = create_user(db=db, user=user_in)
+    # Crear el usuario (el hash se calcula en el pool de bcrypt)
+    hashed_password = await get_password_hash_async(user_in.password)
+    user = await run_db(db, create_user, user=user_in, hashed_password=hashed_password)
+    
+    # Las réplicas pueden tardar en ver al usuario nuevo
+    if settings.DATABASE_REPLICA_URLS:
+        await pin_to_primary(user.id)
     return user
 
 
-@router.post("/login", response_model=Token)
-def login(
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_login)])
+async def login(
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
@@ -52,8 +68,14 @@ def login(
     Retorna un token JWT que debe incluirse en las peticiones protegidas.
     """
     # Autenticar usuario (username en OAuth2 será nuestro email)
-    user = authenticate_user(db, email=form_data.username, password=form_data.password)
-    if not user:
+    # bcrypt se ejecuta en su propio pool para no bloquear el resto de peticiones
+    user = await run_db(db, get_user_by_email, email=form_data.username)
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await verify_and_update_password_async(
+            form_data.password, user.hashed_password
+        )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
@@ -67,6 +89,10 @@ def login(
             detail="Usuario inactivo"
         )
     
+    # Actualizar el hash si se generó con otro coste de bcrypt
+    if new_hash:
+        await run_db(db, set_password_hash, user_id=user.id, hashed_password=new_hash)
+    
     # Crear token de acceso
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -1,43 +1,235 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from datetime import datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
-from app.schemas.task import Task, TaskCreate, TaskUpdate
+from app.db.database import run_db
+from app.schemas.task import (
+    Task,
+    TaskCreate,
+    TaskUpdate,
+    TaskFilters,
+    TaskStats,
+    TaskBulkCreate,
+    TaskBulkUpdate,
+    TaskBulkDelete,
+    TaskBulkResult,
+    TaskImportResult
+)
 from app.crud import task as crud_task
-from app.api.dependencies.auth import get_current_active_user
-from app.models.user import User
+from app.crud import task_stats as crud_task_stats
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.etag import list_etag, match_versions, none_match, not_modified, task_etag
+from app.core.export import EXPORT_MEDIA_TYPES, export_stream
+from app.core.importer import import_tasks as import_task_stream
+from app.core.cache import task_cache
+from app.core.responses import cache_entry, cached_response, task_list_response, task_response
+from app.api.dependencies.auth import get_current_active_user, get_read_db, get_write_db
+from app.schemas.user import CurrentUser
 
 router = APIRouter()
 
+# Tipo del valor del campo de orden que debe traer el cursor del listado
+CURSOR_VALUE_TYPES = {"created_at": datetime, "title": str}
+
+
+def get_task_filters(
+    is_completed: Optional[bool] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    updated_from: Optional[datetime] = Query(None),
+    updated_to: Optional[datetime] = Query(None),
+    title_prefix: Optional[str] = Query(None, min_length=1, max_length=200)
+) -> TaskFilters:
+    """
+    Reúne los filtros del listado de tareas desde los parámetros de consulta.
+    """
+    return TaskFilters(
+        is_completed=is_completed,
+        created_from=created_from,
+        created_to=created_to,
+        updated_from=updated_from,
+        updated_to=updated_to,
+        title_prefix=title_prefix
+    )
+
 
 @router.get("/", response_model=List[Task])
-def get_my_tasks(
+async def get_my_tasks(
+    request: Request,
+    filters: TaskFilters = Depends(get_task_filters),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    cursor: Optional[str] = Query(None),
+    sort: Literal["id", "created_at", "title"] = Query("id"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    include_total: bool = Query(False),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
     Obtener todas las tareas del usuario autenticado.
     
     - **skip**: Cantidad de registros a saltar (para paginación)
     - **limit**: Cantidad máxima de registros a devolver (máximo 100)
+    - **cursor**: Cursor de la cabecera X-Next-Cursor de la respuesta anterior.
+      Si se indica, se ignora skip.
+    - **is_completed**: Filtrar por estado
+    - **created_from** / **created_to**: Rango de fecha de creación
+    - **updated_from** / **updated_to**: Rango de fecha de modificación
+    - **title_prefix**: Títulos que empiezan por este texto (distingue mayúsculas)
+    - **sort**: Campo de orden (id, created_at o title)
+    - **order**: asc o desc
+    - **include_total**: Añadir la cabecera X-Total-Count con el total de
+      tareas que cumplen el filtro. Sale de los contadores del usuario, así
+      que solo se incluye sin filtros o filtrando únicamente por is_completed.
+    
+    Si hay más resultados, la respuesta incluye la cabecera X-Next-Cursor.
+    La respuesta lleva un ETag; con If-None-Match se responde 304 sin leer
+    las tareas si el usuario no ha modificado ninguna desde entonces.
+    Las respuestas se guardan en la caché del usuario hasta su próxima escritura.
     """
-    tasks = crud_task.get_tasks_by_owner(
-        db=db,
+    cache_key = await task_cache.akey(current_user.id, f"list?{request.url.query}")
+    cached = await task_cache.aget(cache_key)
+    if cached is not None:
+        return cached_response(cached, if_none_match)
+    
+    # La versión se lee antes que las tareas: si cambian entre las dos
+    # lecturas, el ETag queda antiguo y la siguiente petición descarga de nuevo
+    total, completed, version = await run_db(
+        db, crud_task_stats.get_task_stats, owner_id=current_user.id
+    )
+    etag = list_etag(current_user.id, version, request.url.query)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    
+    descending = order == "desc"
+    sort_spec = f"{sort}:desc" if descending else sort
+    
+    after_id, after_value = None, None
+    if cursor is not None:
+        decoded = decode_cursor(cursor, sort=sort_spec)
+        # Un valor de otro tipo llegaría a la comparación en SQL
+        if decoded is None or (
+            sort in CURSOR_VALUE_TYPES and not isinstance(decoded[1], CURSOR_VALUE_TYPES[sort])
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+        after_id, after_value = decoded
+    
+    # Se pide un elemento extra para saber si existe una página siguiente
+    # Se leen solo columnas y se serializan directamente a JSON
+    rows = await run_db(
+        db,
+        crud_task.get_task_rows_by_owner,
         owner_id=current_user.id,
         skip=skip,
-        limit=limit
+        limit=limit + 1,
+        after_id=after_id,
+        filters=filters,
+        sort=sort,
+        descending=descending,
+        after_value=after_value
     )
-    return tasks
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            last.id,
+            sort=sort_spec,
+            value=None if sort == "id" else last._mapping[sort]
+        )
+    
+    response = task_list_response(rows)
+    response.headers["ETag"] = etag
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    
+    if include_total and filters.model_dump(exclude_none=True).keys() <= {"is_completed"}:
+        if filters.is_completed is not None:
+            total = completed if filters.is_completed else total - completed
+        response.headers["X-Total-Count"] = str(total)
+    
+    await task_cache.aset(cache_key, cache_entry(response))
+    return response
+
+
+@router.get("/stats", response_model=TaskStats)
+async def get_task_stats(
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Obtener cuántas tareas tiene el usuario autenticado, cuántas están
+    completadas y cuántas pendientes.
+    
+    Se lee de los contadores que se actualizan con cada escritura, sin COUNT(*).
+    """
+    total, completed, _ = await run_db(db, crud_task_stats.get_task_stats, owner_id=current_user.id)
+    return TaskStats(total=total, completed=completed, open=total - completed)
+
+
+@router.get("/search", response_model=List[Task])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Buscar tareas del usuario autenticado por título y descripción.
+    
+    - **q**: Palabras a buscar (deben aparecer todas)
+    - **limit**: Cantidad máxima de resultados (máximo 100)
+    - **cursor**: Cursor de la cabecera X-Next-Cursor de la respuesta anterior
+    
+    Los resultados se ordenan por relevancia; las coincidencias en el título
+    cuentan más que en la descripción.
+    """
+    after_rank, after_id = None, None
+    if cursor is not None:
+        decoded = decode_cursor(cursor, sort="rank")
+        if decoded is None or not isinstance(decoded[1], (int, float)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+        after_id, after_rank = decoded
+    
+    rows = await run_db(
+        db,
+        crud_task.search_tasks_by_owner,
+        owner_id=current_user.id,
+        q=q,
+        limit=limit + 1,
+        after_rank=after_rank,
+        after_id=after_id
+    )
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.id, sort="rank", value=last.rank)
+    
+    response = task_list_response(rows)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
 
 
 @router.post("/", response_model=Task, status_code=status.HTTP_201_CREATED)
-def create_task(
+async def create_task(
     task_in: TaskCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: Session = Depends(get_write_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
     Crear una nueva tarea para el usuario autenticado.
@@ -46,22 +238,175 @@ def create_task(
     - **description**: Descripción detallada (opcional)
     - **is_completed**: Estado inicial (por defecto False)
     """
-    task = crud_task.create_task(db=db, task=task_in, owner_id=current_user.id)
+    task = await run_db(db, crud_task.create_task, task=task_in, owner_id=current_user.id)
+    await task_cache.ainvalidate(current_user.id)
     return task
 
 
+@router.get("/export")
+async def export_tasks(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    gzip: bool = Query(False),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Exportar todas las tareas del usuario autenticado.
+    
+    - **format**: ndjson (una tarea JSON por línea) o csv
+    - **gzip**: Comprimir el archivo con gzip
+    
+    Las filas se leen y se envían por lotes, sin límite de cantidad.
+    """
+    filename = f"tareas.{export_format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_stream(
+            crud_task.export_tasks_query(current_user.id),
+            format=export_format,
+            gzip=gzip
+        ),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.post("/import", response_model=TaskImportResult)
+async def import_tasks(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    db: Session = Depends(get_write_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Importar tareas desde un archivo NDJSON o CSV enviado como cuerpo de la petición.
+    
+    - **format**: ndjson (un objeto JSON por línea) o csv (con cabecera)
+    
+    Cada fila debe tener al menos title; description e is_completed son opcionales
+    y el resto de campos se ignoran (se pueden importar archivos de /export).
+    Las filas con errores se omiten y se resumen en la respuesta.
+    """
+    return await import_task_stream(
+        request.stream(),
+        format=import_format,
+        db=db,
+        owner_id=current_user.id
+    )
+
+
+@router.post("/bulk", response_model=List[Task], status_code=status.HTTP_201_CREATED)
+async def create_tasks_bulk(
+    bulk_in: TaskBulkCreate,
+    db: Session = Depends(get_write_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Crear varias tareas en una sola transacción.
+    
+    - **items**: Lista de tareas (máximo TASK_BULK_MAX_ITEMS)
+    
+    Devuelve las tareas creadas en el mismo orden que se enviaron.
+    """
+    created = await run_db(
+        db,
+        crud_task.create_tasks_bulk,
+        tasks=bulk_in.items,
+        owner_id=current_user.id
+    )
+    await task_cache.ainvalidate(current_user.id)
+    return created
+
+
+@router.patch("/bulk", response_model=TaskBulkResult)
+async def update_tasks_bulk(
+    bulk_in: TaskBulkUpdate,
+    db: Session = Depends(get_write_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Aplicar los mismos cambios a varias tareas en una sola transacción.
+    
+    - **ids**: IDs de las tareas (máximo TASK_BULK_MAX_ITEMS)
+    - **changes**: Campos a modificar, igual que en PUT /api/tasks/{id}
+    
+    Las tareas que no existen o son de otro usuario se devuelven como not_found.
+    """
+    task_ids = list(dict.fromkeys(bulk_in.ids))
+    updated = await run_db(
+        db,
+        crud_task.update_tasks_bulk,
+        task_ids=task_ids,
+        task=bulk_in.changes,
+        owner_id=current_user.id
+    )
+    if updated:
+        await task_cache.ainvalidate(current_user.id)
+    return {
+        "processed": len(updated),
+        "results": [
+            {"id": task_id, "status": "updated" if task_id in updated else "not_found"}
+            for task_id in task_ids
+        ],
+    }
+
+
+@router.delete("/bulk", response_model=TaskBulkResult)
+async def delete_tasks_bulk(
+    bulk_in: TaskBulkDelete,
+    db: Session = Depends(get_write_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """
+    Eliminar varias tareas en una sola transacción.
+    
+    - **ids**: IDs de las tareas (máximo TASK_BULK_MAX_ITEMS)
+    
+    Las tareas que no existen o son de otro usuario se devuelven como not_found.
+    """
+    task_ids = list(dict.fromkeys(bulk_in.ids))
+    deleted = await run_db(
+        db,
+        crud_task.delete_tasks_bulk,
+        task_ids=task_ids,
+        owner_id=current_user.id
+    )
+    if deleted:
+        await task_cache.ainvalidate(current_user.id)
+    return {
+        "processed": len(deleted),
+        "results": [
+            {"id": task_id, "status": "deleted" if task_id in deleted else "not_found"}
+            for task_id in task_ids
+        ],
+    }
+
+
 @router.get("/{task_id}", response_model=Task)
-def get_task(
+async def get_task(
     task_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
     Obtener una tarea específica por su ID.
     
     Solo se puede acceder a tareas propias del usuario.
+    La respuesta lleva un ETag; con If-None-Match se responde 304 si la
+    tarea no ha cambiado (solo se consulta su versión).
     """
-    task = crud_task.get_task(db=db, task_id=task_id)
+    cache_key = await task_cache.akey(current_user.id, f"task:{task_id}")
+    cached = await task_cache.aget(cache_key)
+    if cached is not None:
+        return cached_response(cached, if_none_match)
+    
+    if if_none_match is not None:
+        current = await run_db(db, crud_task.get_task_version, task_id=task_id)
+        if current is not None and current.owner_id == current_user.id:
+            etag = task_etag(task_id, current.version)
+            if none_match(if_none_match, etag):
+                return not_modified(etag)
+    
+    task = await run_db(db, crud_task.get_task, task_id=task_id)
     
     if not task:
         raise HTTPException(
@@ -76,68 +421,105 @@ def get_task(
             detail="No tienes permiso para acceder a esta tarea"
         )
     
-    return task
+    response = task_response(task)
+    await task_cache.aset(cache_key, cache_entry(response))
+    return response
 
 
 @router.put("/{task_id}", response_model=Task)
-def update_task(
+async def update_task(
     task_id: int,
     task_in: TaskUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_write_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
     Actualizar una tarea existente.
     
     Solo se pueden actualizar tareas propias del usuario.
     Todos los campos son opcionales.
-    """
-    # Verificar que la tarea existe y pertenece al usuario
-    task = crud_task.get_task(db=db, task_id=task_id)
     
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tarea no encontrada"
-        )
+    Con If-Match (el ETag obtenido al leer la tarea) solo se actualiza si
+    nadie la ha modificado desde entonces; si no, se responde 412.
+    """
+    # Actualizar en una sola sentencia comprobando la propiedad (y la
+    # versión, si hay If-Match) en el WHERE
+    expected_versions = match_versions(if_match, task_id)
+    task = await run_db(
+        db,
+        crud_task.update_owned_task,
+        task_id=task_id,
+        owner_id=current_user.id,
+        task=task_in,
+        expected_versions=expected_versions
+    )
     
-    if task.owner_id != current_user.id:
+    # Si no se actualizó nada, averiguar si no existe, es de otro usuario
+    # o ha cambiado desde que el cliente la leyó
+    if task is None:
+        current = await run_db(db, crud_task.get_task_version, task_id=task_id)
+        if current is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Tarea no encontrada"
+            )
+        if current.owner_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permiso para modificar esta tarea"
+            )
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permiso para modificar esta tarea"
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="La tarea ha cambiado desde que se leyó",
+            headers={"ETag": task_etag(task_id, current.version)}
         )
     
-    # Actualizar la tarea
-    task = crud_task.update_task(db=db, task_id=task_id, task=task_in)
+    await task_cache.ainvalidate(current_user.id)
+    response.headers["ETag"] = task_etag(task.id, task.version)
     return task
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: Session = Depends(get_write_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
     Eliminar una tarea.
     
     Solo se pueden eliminar tareas propias del usuario.
     """
-    # Verificar que la tarea existe y pertenece al usuario
-    task = crud_task.get_task(db=db, task_id=task_id)
+    deleted = await run_db(
+        db,
+        crud_task.delete_owned_task,
+        task_id=task_id,
+        owner_id=current_user.id
+    )
     
-    if not task:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Tarea no encontrada"
+    if deleted:
+        await task_cache.ainvalidate(current_user.id)
+    else:
+        await raise_not_found_or_forbidden(
+            db, task_id, "No tienes permiso para eliminar esta tarea"
         )
     
-    if task.owner_id != current_user.id:
+    return None
+
+
+async def raise_not_found_or_forbidden(db: Session, task_id: int, forbidden_detail: str):
+    """
+    Lanza 404 si la tarea no existe o 403 si pertenece a otro usuario.
+    Solo se consulta cuando la escritura no afectó a ninguna fila.
+    """
+    if await run_db(db, crud_task.task_exists, task_id=task_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permiso para eliminar esta tarea"
+            detail=forbidden_detail
         )
-    
-    # Eliminar la tarea
-    crud_task.delete_task(db=db, task_id=task_id)
-    return None
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Tarea no encontrada"
+    )
@@ -0,0 +1,40 @@
+"""
+Recalcula los contadores de tareas (tabla task_stats) de todos los usuarios.
+
+Sirve para reparar contadores desajustados o inicializarlos tras cargar
+datos fuera de la API. Procesa los usuarios por lotes, cada uno en su
+propia transacción, así que puede ejecutarse con la API en marcha.
+
+Uso:
+    python -m app.commands.rebuild_task_stats --batch-size 1000
+"""
+import argparse
+
+from app.crud.task_stats import rebuild_task_stats
+from app.db.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    processed = 0
+    last_id = 0
+    while True:
+        db = SessionLocal()
+        try:
+            next_id = rebuild_task_stats(db, after_id=last_id, batch_size=args.batch_size)
+        finally:
+            db.close()
+        if next_id is None:
+            break
+        last_id = next_id
+        processed += 1
+        print(f"Lote {processed}: usuarios hasta el id {last_id} recalculados")
+
+    print(f"Contadores recalculados en {processed} lotes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Arranca la API para producción: varios workers de uvicorn, sin recarga
+automática (run.py es solo para desarrollo).
+
+- Un worker por núcleo disponible (respeta la afinidad de CPU y la cuota
+  de cgroups de un contenedor), o WEB_CONCURRENCY / --workers.
+- Bucle uvloop y parser httptools si están instalados (uvicorn[standard]).
+- Con SIGTERM cada worker deja de aceptar conexiones y termina las
+  peticiones en curso durante SERVER_GRACEFUL_SHUTDOWN_SECONDS.
+- Con SERVER_MAX_REQUESTS cada worker se reinicia tras ese número de
+  peticiones (más un margen aleatorio distinto en cada uno); el proceso
+  principal arranca uno nuevo en su lugar.
+
+Cada worker es un proceso nuevo que importa la aplicación y crea sus
+propios pools de conexiones. En total puede haber hasta
+workers x (pool_size + max_overflow) conexiones a la base de datos.
+
+Uso:
+    python -m app.commands.serve
+    python -m app.commands.serve --workers 4 --port 8080
+"""
+import argparse
+import importlib.util
+import math
+import os
+
+import uvicorn
+
+from app.core.cache import task_cache_ttl
+from app.core.config import settings
+
+
+def available_cpus() -> int:
+    """
+    Núcleos que puede usar el proceso.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    # Límite de CPU del contenedor (cgroups v2), p. ej. docker run --cpus 2
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    args = parser.parse_args()
+
+    workers = args.workers or available_cpus()
+    loop = "uvloop" if _installed("uvloop") else "asyncio"
+    http = "httptools" if _installed("httptools") else "h11"
+
+    print(f"Iniciando {workers} workers en {args.host}:{args.port} (bucle {loop}, HTTP {http})")
+    if loop == "asyncio" or http == "h11":
+        print("Aviso: instala uvicorn[standard] para usar uvloop y httptools")
+    if settings.SERVER_MAX_REQUESTS and workers == 1:
+        # Con un solo worker uvicorn no usa proceso principal: nadie lo reinicia
+        # (MaxRequestsMiddleware)
+        print("Aviso: con un worker, SERVER_MAX_REQUESTS termina el servidor; "
+              "debe reiniciarlo el gestor de procesos (systemd, Docker...)")
+
+    if workers > 1 and settings.CACHE_BACKEND == "memory" and task_cache_ttl() > 0:
+        # Una escritura solo invalida la caché del worker que la atiende
+        print(f"AVISO: TASK_CACHE_TTL_SECONDS={settings.TASK_CACHE_TTL_SECONDS:g} con CACHE_BACKEND=memory "
+              f"y {workers} workers: los demás workers servirán listados, tareas y ETags antiguos "
+              f"(y If-Match fallará con 412) hasta que caduquen. Usa CACHE_BACKEND=redis o "
+              f"TASK_CACHE_TTL_SECONDS=0")
+    if workers > 1 and settings.CACHE_BACKEND == "memory" and settings.DATABASE_REPLICA_URLS:
+        # Solo el worker que atiende la escritura sabe que el usuario debe
+        # leer de la principal (primary_pins)
+        print(f"AVISO: DATABASE_REPLICA_URLS con CACHE_BACKEND=memory y {workers} workers: "
+              f"tras escribir, un usuario puede leer de una réplica desde los demás workers "
+              f"y no ver sus propios cambios durante el retraso de replicación. "
+              f"Usa CACHE_BACKEND=redis")
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE_SECONDS,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_SHUTDOWN_SECONDS,
+        access_log=settings.SERVER_ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()
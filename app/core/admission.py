@@ -0,0 +1,249 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge, Histogram, registry
+
+
+class AdmissionGate:
+    """
+    Límite de peticiones simultáneas de una clase de rutas, con una cola
+    de espera corta y acotada.
+
+    Las peticiones que no caben en la cola, o que esperan más de
+    queue_timeout, se rechazan enseguida: es mejor que unas pocas fallen
+    rápido a que todas esperen al pool de la base de datos hasta agotar
+    el tiempo del cliente. Solo se usa desde el event loop, sin locks.
+    """
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        queue_limit: int,
+        queue_timeout: float,
+        yields_to: tuple["AdmissionGate", ...] = ()
+    ):
+        """
+        Args:
+            name: Clase de rutas, etiqueta de las métricas
+            limit: Peticiones simultáneas
+            queue_limit: Peticiones que pueden esperar un hueco
+            queue_timeout: Segundos máximos de espera en la cola
+            yields_to: Clases con más prioridad: mientras tengan peticiones
+                en cola, esta no admite peticiones nuevas
+        """
+        self.name = name
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.yields_to = yields_to
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> Optional[str]:
+        """
+        Espera un hueco como mucho min(timeout, queue_timeout) segundos.
+
+        Returns:
+            None si la petición entra, o el motivo del rechazo
+        """
+        if any(gate.queued for gate in self.yields_to):
+            return "priority"
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return None
+        if len(self._waiters) >= self.queue_limit:
+            return "queue_full"
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        # release() cede el hueco resolviendo el futuro con True; al
+        # caducar se resuelve con False
+        expire = loop.call_later(min(timeout, self.queue_timeout), self._expire, waiter)
+        try:
+            admitted = await waiter
+        except asyncio.CancelledError:
+            # El cliente se fue mientras esperaba, o justo cuando se le cedía el hueco
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled() and waiter.result():
+                self.release()
+            raise
+        finally:
+            expire.cancel()
+        return None if admitted else "queue_timeout"
+
+    def _expire(self, waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            waiter.set_result(False)
+
+    def release(self) -> None:
+        # El hueco pasa a la primera petición en cola que siga esperando
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self.active -= 1
+
+
+admission_in_flight = registry.register(Gauge(
+    "admission_in_flight", "Peticiones admitidas en curso por clase de ruta", ("route_class",),
+    callback=lambda: [((gate.name,), gate.active) for gate in GATES.values()]
+))
+admission_queue_depth = registry.register(Gauge(
+    "admission_queue_depth", "Peticiones esperando un hueco por clase de ruta", ("route_class",),
+    callback=lambda: [((gate.name,), gate.queued) for gate in GATES.values()]
+))
+admission_queue_wait_seconds = registry.register(Histogram(
+    "admission_queue_wait_seconds", "Espera en la cola de admisión de las peticiones admitidas",
+    ("route_class",)
+))
+admission_shed_total = registry.register(Counter(
+    "admission_shed_total", "Peticiones rechazadas con 503 por control de admisión",
+    ("route_class", "reason")
+))
+
+# Las lecturas de tareas son baratas y las más frecuentes; el login y el
+# registro calculan bcrypt. Mientras haya lecturas o escrituras en cola no
+# se admiten peticiones de autenticación nuevas
+_task_read = AdmissionGate(
+    "task_read",
+    limit=settings.ADMISSION_TASK_READ_CONCURRENCY,
+    queue_limit=settings.ADMISSION_TASK_READ_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+)
+_task_write = AdmissionGate(
+    "task_write",
+    limit=settings.ADMISSION_TASK_WRITE_CONCURRENCY,
+    queue_limit=settings.ADMISSION_TASK_WRITE_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS
+)
+_auth = AdmissionGate(
+    "auth",
+    limit=settings.ADMISSION_AUTH_CONCURRENCY,
+    queue_limit=settings.ADMISSION_AUTH_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    yields_to=(_task_read, _task_write)
+)
+GATES = {gate.name: gate for gate in (_task_read, _task_write, _auth)}
+
+
+def route_class(method: str, path: str) -> Optional[AdmissionGate]:
+    """
+    Clase de la ruta (None para health, métricas y documentación,
+    que no pasan por el control de admisión).
+    """
+    if path.startswith("/api/auth/"):
+        return _auth
+    if path == "/api/tasks" or path.startswith("/api/tasks/"):
+        return _task_read if method in ("GET", "HEAD") else _task_write
+    return None
+
+
+# Solo las lecturas tienen plazo: una escritura (también el registro o la
+# importación, que guarda lotes antes de responder) puede haber hecho
+# commit cuando vence, y un 503 con Retry-After haría que el cliente la
+# repitiera. La exportación envía el cuerpo por bloques y tampoco lo tiene
+DEADLINE_METHODS = frozenset({"GET", "HEAD"})
+NO_DEADLINE_PATHS = frozenset({"/api/tasks/export"})
+
+
+def _has_deadline(scope) -> bool:
+    return scope["method"] in DEADLINE_METHODS and scope["path"].rstrip("/") not in NO_DEADLINE_PATHS
+
+
+def _shed_response() -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servicio saturado, inténtalo de nuevo"},
+        headers={"Retry-After": "1"}
+    )
+
+
+class AdmissionControlMiddleware:
+    """
+    Middleware ASGI que limita las peticiones simultáneas por clase de
+    ruta (ver AdmissionGate) y aplica un plazo a cada lectura: si pasados
+    ADMISSION_DEADLINE_SECONDS desde que llegó todavía no ha empezado la
+    respuesta, se cancela y se responde 503. Los rechazos llevan
+    Retry-After y se cuentan en admission_shed_total.
+
+    Con el threadpool (DB_ASYNC=false) el 503 sale a tiempo, pero la
+    consulta en curso no se interrumpe: su hilo y su conexión siguen
+    ocupados hasta que termina. Para acotarla hay que configurar también
+    un statement_timeout en la base de datos.
+
+    Las escrituras y las rutas de NO_DEADLINE_PATHS ocupan un hueco de su
+    clase, y solo se rechazan mientras esperan en la cola: una vez
+    admitidas no tienen plazo.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        gate = route_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.perf_counter()
+        deadline = settings.ADMISSION_DEADLINE_SECONDS
+        reason = await gate.acquire(deadline)
+        if reason is not None:
+            admission_shed_total.inc(gate.name, reason)
+            await _shed_response()(scope, receive, send)
+            return
+        waited = time.perf_counter() - arrived
+        if settings.METRICS_ENABLED:
+            admission_queue_wait_seconds.observe(waited, gate.name)
+
+        if not _has_deadline(scope):
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                gate.release()
+            return
+
+        task = asyncio.current_task()
+        started = False
+        expired = False
+
+        def on_deadline():
+            nonlocal expired
+            if not started:
+                expired = True
+                task.cancel()
+
+        timer = asyncio.get_running_loop().call_later(deadline - waited, on_deadline)
+
+        async def send_and_stop_timer(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                timer.cancel()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_stop_timer)
+        except asyncio.CancelledError:
+            if not expired:
+                raise
+            # La cancelación es nuestra: la petición sigue con la respuesta 503
+            if hasattr(task, "uncancel"):
+                task.uncancel()
+            admission_shed_total.inc(gate.name, "deadline")
+            await _shed_response()(scope, receive, send)
+        finally:
+            timer.cancel()
+            gate.release()
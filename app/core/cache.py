@@ -0,0 +1,405 @@
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.cache")
+
+
+def size_of(value: Any) -> int:
+    """
+    Tamaño aproximado en bytes de un valor de la caché.
+    Cuenta el contenido de textos y colecciones, no la sobrecarga de cada objeto.
+    """
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(size_of(item) for item in value)
+    if isinstance(value, dict):
+        return sum(size_of(key) + size_of(item) for key, item in value.items())
+    return sys.getsizeof(value)
+
+
+class MemoryBackend:
+    """
+    Caché en la memoria del proceso con expiración por entrada (TTL)
+    y desalojo LRU cuando se supera el número máximo de entradas o,
+    si se indica, el máximo de bytes.
+    """
+    # Las operaciones son instantáneas, se pueden llamar desde el event loop
+    blocking = False
+
+    def __init__(self, max_entries: int, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: "OrderedDict[str, tuple[float, Any, int]]" = OrderedDict()
+        self._counters: "OrderedDict[str, int]" = OrderedDict()
+        # Valor de partida de los contadores que no existen
+        self._counter_floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value, _ = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        size = size_of(value)
+        with self._lock:
+            self._remove(key)
+            # Un valor mayor que toda la caché no se guarda
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (time.monotonic() + ttl, value, size)
+            self.bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self.bytes > self.max_bytes
+            ):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.bytes -= item[2]
+
+    def counter(self, key: str) -> int:
+        """
+        Valor de un contador. Se guardan como mucho max_entries contadores
+        (LRU); uno que no existe, o que se desalojó, vale más que cualquier
+        contador desalojado, así nunca repite un valor anterior.
+        """
+        with self._lock:
+            value = self._counters.get(key)
+            if value is None:
+                return self._counter_floor
+            self._counters.move_to_end(key)
+            return value
+
+    def incr(self, key: str) -> bool:
+        """
+        Aumenta un contador.
+
+        Returns:
+            True (en memoria no puede fallar)
+        """
+        with self._lock:
+            self._counters[key] = self._counters.pop(key, self._counter_floor) + 1
+            if len(self._counters) > self.max_entries:
+                _, evicted = self._counters.popitem(last=False)
+                self._counter_floor = max(self._counter_floor, evicted + 1)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RedisBackend:
+    """
+    Caché compartida entre procesos y servidores usando Redis.
+    Los valores se guardan como JSON. Si Redis no responde, la caché
+    se comporta como vacía en lugar de fallar la petición.
+    """
+    # Cada operación es una llamada de red
+    blocking = True
+
+    def __init__(self, url: str, prefix: str):
+        import redis  # Dependencia opcional, solo necesaria con CACHE_BACKEND=redis
+
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(url, socket_timeout=0.1)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = self._client.get(self.prefix + key)
+        except self._errors:
+            return None
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            self._client.set(self.prefix + key, json.dumps(value), px=max(1, int(ttl * 1000)))
+        except self._errors:
+            pass
+
+    def delete(self, key: str) -> None:
+        try:
+            self._client.delete(self.prefix + key)
+        except self._errors:
+            pass
+
+    def counter(self, key: str) -> Optional[int]:
+        """
+        Valor de un contador (0 si no existe, None si Redis no responde).
+        Los contadores no tienen TTL; con una política maxmemory volatile-*
+        Redis no los desaloja.
+        """
+        try:
+            raw = self._client.get(self.prefix + key)
+        except self._errors:
+            return None
+        return int(raw or 0)
+
+    def incr(self, key: str) -> bool:
+        """
+        Aumenta un contador.
+
+        Returns:
+            False si Redis no responde
+        """
+        try:
+            self._client.incr(self.prefix + key)
+        except self._errors:
+            return False
+        return True
+
+
+class FakeSharedBackend(MemoryBackend):
+    """
+    Falso en memoria de un backend compartido, para pruebas y benchmarks
+    sin Redis. Se comporta como RedisBackend: es bloqueante y guarda los
+    valores como JSON, así que falla igual con valores no serializables.
+    """
+    blocking = True
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = super().get(key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        super().set(key, json.dumps(value), ttl)
+
+
+class Cache:
+    """
+    Caché con TTL sobre un backend intercambiable.
+    Lleva la cuenta de aciertos y fallos.
+    
+    Cualquier objeto con los métodos get, set, delete y el atributo
+    blocking sirve como backend (por ejemplo, FakeSharedBackend).
+    """
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if self.enabled:
+            self.backend.set(key, value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """
+        Igual que get, pero no bloquea el event loop con backends de red.
+        """
+        if self.backend.blocking:
+            return await run_in_threadpool(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if self.backend.blocking:
+            await run_in_threadpool(self.set, key, value, ttl)
+        else:
+            self.set(key, value, ttl)
+
+    def stats(self) -> dict:
+        """
+        Aciertos, fallos, entradas y bytes ocupados (None si el backend
+        no los conoce, como Redis, que limita su memoria con maxmemory).
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "entries": len(self.backend) if hasattr(self.backend, "__len__") else None,
+            "bytes": getattr(self.backend, "bytes", None),
+        }
+
+
+class GenerationCache(Cache):
+    """
+    Caché con las entradas agrupadas por usuario.
+    
+    Cada clave incluye el número de generación del usuario; invalidar sus
+    entradas es aumentar ese número, sin buscarlas ni borrarlas: las
+    antiguas dejan de ser alcanzables y salen por LRU o TTL.
+    
+    La clave debe calcularse antes de leer los datos de la base de datos:
+    así, una escritura confirmada durante la lectura cambia la generación
+    y el resultado, que puede estar desfasado, se guarda con una clave vieja.
+    
+    Si falla una invalidación (Redis no responde), este proceso deja de usar
+    la caché de ese usuario y la reintenta en cada acceso, hasta que se
+    consiga o caduquen las entradas anteriores. Mientras tanto los demás
+    workers pueden servir esas entradas si sí llegan a Redis.
+    """
+    def __init__(self, backend, ttl: float):
+        super().__init__(backend, ttl)
+        # Usuarios con una invalidación pendiente: instante en que caducan
+        # todas sus entradas anteriores
+        self._pending: dict[int, float] = {}
+
+    def key(self, owner_id: int, name: str) -> str:
+        """
+        Clave de una entrada del usuario (vacía si la caché está desactivada
+        o no se puede usar para el usuario).
+        """
+        if not self.enabled:
+            return ""
+        if owner_id in self._pending and not self._retry_invalidation(owner_id):
+            return ""
+        generation = self.backend.counter(f"gen:{owner_id}")
+        # Sin generación (backend caído) no se puede garantizar la invalidación
+        if generation is None:
+            return ""
+        return f"{owner_id}:{generation}:{name}"
+
+    async def akey(self, owner_id: int, name: str) -> str:
+        if self.backend.blocking and self.enabled:
+            return await run_in_threadpool(self.key, owner_id, name)
+        return self.key(owner_id, name)
+
+    def get(self, key: str) -> Optional[Any]:
+        return super().get(key) if key else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if key:
+            super().set(key, value, ttl)
+
+    def invalidate(self, owner_id: int) -> None:
+        """
+        Invalida todas las entradas de un usuario.
+        Debe llamarse después del commit de la escritura.
+        """
+        if self.enabled and not self.backend.incr(f"gen:{owner_id}"):
+            logger.error(
+                "No se pudo invalidar la caché del usuario %s; no se usará "
+                "en este worker hasta conseguirlo", owner_id
+            )
+            now = time.monotonic()
+            for pending_owner, expires_at in list(self._pending.items()):
+                if expires_at <= now:
+                    self._pending.pop(pending_owner, None)
+            self._pending[owner_id] = now + self.ttl
+
+    async def ainvalidate(self, owner_id: int) -> None:
+        """
+        Igual que invalidate, pero no bloquea el event loop con backends de red.
+        """
+        if self.backend.blocking and self.enabled:
+            await run_in_threadpool(self.invalidate, owner_id)
+        else:
+            self.invalidate(owner_id)
+
+    def _retry_invalidation(self, owner_id: int) -> bool:
+        """
+        Reintenta una invalidación pendiente.
+
+        Returns:
+            True si ya se puede usar la caché del usuario
+        """
+        if self._pending.get(owner_id, 0.0) <= time.monotonic() or self.backend.incr(f"gen:{owner_id}"):
+            self._pending.pop(owner_id, None)
+            return True
+        return False
+
+
+def build_cache(
+    name: str,
+    ttl: float,
+    max_entries: int,
+    max_bytes: Optional[int] = None,
+    cache_class: type = Cache
+) -> Cache:
+    """
+    Crea una caché con el backend elegido en CACHE_BACKEND.
+    
+    Args:
+        name: Prefijo de las claves en el backend compartido
+        ttl: Tiempo de vida de las entradas en segundos
+        max_entries: Máximo de entradas del backend en memoria
+        max_bytes: Máximo de bytes del backend en memoria (None sin límite)
+        cache_class: Cache o GenerationCache
+    """
+    if settings.CACHE_BACKEND == "redis":
+        backend = RedisBackend(settings.REDIS_URL, prefix=f"{name}:")
+    elif settings.CACHE_BACKEND == "fake":
+        backend = FakeSharedBackend(max_entries, max_bytes)
+    else:
+        backend = MemoryBackend(max_entries, max_bytes)
+    return cache_class(backend, ttl)
+
+
+# Datos del usuario autenticado (id, is_active, is_superuser) por id de usuario
+user_cache = build_cache(
+    "user",
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    max_entries=settings.USER_CACHE_MAX_ENTRIES
+)
+
+# Usuarios que han escrito hace poco y deben leer de la base de datos principal
+# (ver DATABASE_REPLICA_URLS). Las entradas son pequeñas: el límite es alto
+# para que el LRU no expulse un usuario antes de tiempo
+primary_pins = build_cache(
+    "primary",
+    ttl=settings.READ_YOUR_WRITES_SECONDS,
+    max_entries=100_000
+)
+
+
+def task_cache_ttl() -> float:
+    """
+    TTL de la caché de tareas: el configurado o, si no hay, 30 s con un
+    backend compartido y 0 (desactivada) con el backend en memoria.
+    """
+    if settings.TASK_CACHE_TTL_SECONDS is not None:
+        return settings.TASK_CACHE_TTL_SECONDS
+    return 0.0 if settings.CACHE_BACKEND == "memory" else 30.0
+
+
+# Respuestas de lectura de tareas (listados y tareas) por usuario
+task_cache = build_cache(
+    "tasks",
+    ttl=task_cache_ttl(),
+    max_entries=settings.TASK_CACHE_MAX_ENTRIES,
+    max_bytes=settings.TASK_CACHE_MAX_BYTES,
+    cache_class=GenerationCache
+)
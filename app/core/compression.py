@@ -0,0 +1,208 @@
+import zlib
+from functools import lru_cache
+from typing import Optional
+
+from app.core.config import settings
+
+# Dependencias opcionales: sin ellas solo se ofrece gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Codificaciones disponibles, de mayor a menor preferencia del servidor
+# cuando el cliente acepta varias con el mismo peso
+ENCODINGS = tuple(
+    name for name, available in (("zstd", zstandard), ("br", brotli), ("gzip", zlib))
+    if available is not None
+)
+
+# Tipos que merece la pena comprimir (las imágenes o application/gzip ya lo están)
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/",
+)
+
+
+@lru_cache(maxsize=256)
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Elige la codificación según la cabecera Accept-Encoding del cliente.
+    Se respetan los pesos q; q=0 excluye una codificación y "*" acepta
+    cualquiera no mencionada.
+
+    Returns:
+        "zstd", "br", "gzip" o None para no comprimir
+    """
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for name in ENCODINGS:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class Compressor:
+    """
+    Compresión incremental con cualquiera de las codificaciones.
+    compress() devuelve los bytes comprimidos hasta ese punto (vaciando el
+    búfer del compresor para que el cliente los reciba ya) y finish() el
+    final del flujo.
+    """
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        """
+        Args:
+            encoding: "zstd", "br" o "gzip"
+            level: Nivel de compresión; por defecto el de la configuración
+        """
+        self.encoding = encoding
+        if encoding == "zstd":
+            level = settings.COMPRESSION_ZSTD_LEVEL if level is None else level
+            self._zstd = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            level = settings.COMPRESSION_BROTLI_QUALITY if level is None else level
+            self._br = brotli.Compressor(quality=level)
+        else:
+            level = settings.COMPRESSION_GZIP_LEVEL if level is None else level
+            self._gzip = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.compress(data) + self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.compress(data) + self._zstd.flush()
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gzip.compress(data) + self._gzip.flush()
+
+
+def uncompressed(endpoint):
+    """
+    Decorador para rutas cuyas respuestas no se deben comprimir, por
+    ejemplo porque el cliente necesita la longitud exacta del cuerpo.
+    Se aplica debajo del decorador de la ruta.
+    """
+    endpoint.compress = False
+    return endpoint
+
+
+def _header(headers: list, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime las respuestas con la codificación que
+    acepta el cliente (zstd, brotli o gzip). Solo se comprimen los tipos de
+    COMPRESSIBLE_TYPES: JSON, NDJSON y text/* (la exportación CSV).
+
+    - Una respuesta de un solo bloque se comprime si ocupa al menos
+      COMPRESSION_MIN_BYTES.
+    - Una respuesta en streaming (StreamingResponse) se comprime bloque a
+      bloque, sin acumularla: cada bloque comprimido se envía enseguida.
+    - No se comprimen los tipos ya comprimidos, las respuestas que ya
+      traen Content-Encoding ni las rutas marcadas con @uncompressed.
+
+    El ETag no cambia: identifica la versión de la tarea o del listado y
+    If-Match lo compara tal cual, sea cual sea la codificación recibida.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                encoding = choose_encoding(value.decode("latin-1"))
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor: Optional[Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # Se decide con el primer bloque del cuerpo
+                start = message
+                return
+
+            headers = list(start.get("headers", []))
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+                route = scope.get("route")
+                eligible = (
+                    content_type.startswith(COMPRESSIBLE_TYPES)
+                    and _header(headers, b"content-encoding") is None
+                    and getattr(getattr(route, "endpoint", None), "compress", True)
+                )
+                if eligible:
+                    # Las cachés intermedias deben guardar una copia por codificación
+                    vary = _header(headers, b"vary")
+                    headers = [(key, value) for key, value in headers if key.lower() != b"vary"]
+                    headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+                if not eligible or (not more_body and len(body) < settings.COMPRESSION_MIN_BYTES):
+                    passthrough = True
+                    await send({**start, "headers": headers})
+                    await send(message)
+                    return
+
+                compressor = Compressor(encoding)
+                headers = [(key, value) for key, value in headers if key.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode()))
+                if not more_body:
+                    # Respuesta completa: se comprime de una vez y se conoce la longitud
+                    body = compressor.finish(body)
+                    headers.append((b"content-length", str(len(body)).encode()))
+                    await send({**start, "headers": headers})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send({**start, "headers": headers})
+
+            if more_body:
+                chunk = compressor.compress(body)
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finish(body)})
+
+        await self.app(scope, receive, send_compressed)
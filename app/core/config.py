@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,14 +14,139 @@ class Settings(BaseSettings):
     # Configuración de la base de datos
     DATABASE_URL: str
     
+    # Registro de SQL: SQL_ECHO muestra todas las sentencias en la consola
+    # (solo para depurar). La instrumentación mide cada petición: cabecera
+    # Server-Timing, sentencias lentas y consultas repetidas (posible N+1)
+    SQL_ECHO: bool = False
+    SQL_INSTRUMENTATION: bool = True
+    SQL_SERVER_TIMING: bool = True
+    SQL_SLOW_QUERY_MS: float = 100.0
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+    
+    # Métricas en formato Prometheus en GET /metrics (HTTP, pool de BD y autenticación)
+    METRICS_ENABLED: bool = True
+    
+    # Modo asíncrono: usa AsyncSession en lugar del threadpool de Starlette
+    # Si no se indica ASYNC_DATABASE_URL se deriva de DATABASE_URL
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+    
+    # Réplicas de solo lectura (lista JSON de URLs). Las lecturas de tareas
+    # se reparten entre ellas por turnos; un usuario que acaba de escribir
+    # sigue leyendo de la principal durante READ_YOUR_WRITES_SECONDS, que
+    # debe ser mayor que el retraso de replicación
+    DATABASE_REPLICA_URLS: list[str] = []
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    
     # Configuración de seguridad JWT
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     
+    # Rotación de claves: SECRET_KEY firma los tokens nuevos con el kid
+    # JWT_KEY_ID; JWT_PREVIOUS_KEYS ({"kid": "clave"} en JSON) solo verifica
+    JWT_KEY_ID: str = "default"
+    JWT_PREVIOUS_KEYS: dict[str, str] = {}
+    
+    # Caché de tokens ya verificados (0 la desactiva)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Hash de contraseñas: coste de bcrypt y pool de trabajo dedicado
+    # PASSWORD_HASH_EXECUTOR puede ser "thread" o "process"
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_EXECUTOR: str = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64
+    
+    # Límites de peticiones por minuto (0 desactiva cada uno): login por IP
+    # y por cuenta, registro por IP y rutas de tareas por usuario. Se
+    # guardan con el backend de CACHE_BACKEND; con "memory" cada worker
+    # lleva su cuenta y guarda como mucho RATE_LIMIT_MAX_KEYS claves por límite
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_PER_IP: int = 30
+    RATE_LIMIT_LOGIN_PER_ACCOUNT: int = 10
+    RATE_LIMIT_REGISTER_PER_IP: int = 10
+    RATE_LIMIT_TASKS_PER_USER: int = 600
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    
+    # Control de admisión: peticiones simultáneas y en cola por clase de
+    # ruta (autenticación, lecturas y escrituras de tareas), espera máxima
+    # en la cola y plazo de las lecturas para empezar a responder; por encima
+    # se responde 503
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_TASK_READ_CONCURRENCY: int = 32
+    ADMISSION_TASK_READ_QUEUE: int = 64
+    ADMISSION_TASK_WRITE_CONCURRENCY: int = 16
+    ADMISSION_TASK_WRITE_QUEUE: int = 32
+    ADMISSION_AUTH_CONCURRENCY: int = 8
+    ADMISSION_AUTH_QUEUE: int = 16
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 0.5
+    ADMISSION_DEADLINE_SECONDS: float = 10.0
+    
+    # Compresión de las respuestas JSON, NDJSON y text/* según
+    # Accept-Encoding: zstd y brotli si están instalados (zstandard, brotli),
+    # si no gzip. Las respuestas menores que COMPRESSION_MIN_BYTES se envían
+    # sin comprimir
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    
+    # Máximo de tareas por petición en los endpoints /api/tasks/bulk
+    TASK_BULK_MAX_ITEMS: int = 500
+    
+    # Filas leídas por lote al exportar tareas con un cursor de servidor
+    TASK_EXPORT_BATCH_SIZE: int = 1000
+    
+    # Importación de tareas: filas por INSERT/COPY, tamaño máximo de una
+    # línea y cantidad de errores detallados en la respuesta
+    TASK_IMPORT_BATCH_SIZE: int = 1000
+    TASK_IMPORT_MAX_LINE_BYTES: int = 65536
+    TASK_IMPORT_MAX_ERRORS: int = 100
+    
     # Entorno de ejecución
     ENVIRONMENT: str
     
+    # Servidor de producción (python -m app.commands.serve). WEB_CONCURRENCY
+    # es el número de workers; por defecto uno por núcleo disponible.
+    # SERVER_MAX_REQUESTS reinicia cada worker tras ese número de peticiones
+    # (0 nunca) más un margen aleatorio de hasta SERVER_MAX_REQUESTS_JITTER
+    # (por defecto el 10 %), para que no se reinicien todos a la vez.
+    # SERVER_GRACEFUL_SHUTDOWN_SECONDS es el tiempo que se espera a las
+    # peticiones en curso al recibir SIGTERM
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: Optional[int] = None
+    SERVER_KEEP_ALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_MAX_REQUESTS: int = 0
+    SERVER_MAX_REQUESTS_JITTER: Optional[int] = None
+    SERVER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    SERVER_ACCESS_LOG: bool = False
+    
+    # Calentamiento al arrancar cada worker, antes de aceptar peticiones:
+    # conexiones que se abren en cada pool (0 no calienta nada) y carga de
+    # las librerías de autenticación. Retrasa la primera respuesta de /health
+    STARTUP_WARMUP_CONNECTIONS: int = 0
+    
+    # Caché: "memory" (por proceso), "redis" (compartida entre workers)
+    # o "fake" (simula en memoria un backend compartido, para pruebas)
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: Optional[str] = None
+    
+    # Caché del usuario autenticado (0 desactiva la caché)
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Caché de respuestas de lectura de tareas por usuario (0 la desactiva).
+    # Por defecto (None) dura 30 s con un backend compartido y está
+    # desactivada con "memory": con varios workers cada proceso invalida
+    # solo su caché y las demás servirían datos y ETags antiguos
+    TASK_CACHE_TTL_SECONDS: Optional[float] = None
+    TASK_CACHE_MAX_ENTRIES: int = 10000
+    TASK_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    
     # Configuración para leer desde .env
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,75 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+
+def task_etag(task_id: int, version: int) -> str:
+    """
+    ETag fuerte de una tarea: cambia con cada modificación de la tarea.
+    """
+    return f'"t{task_id}-{version}"'
+
+
+def list_etag(owner_id: int, version: int, query: str) -> str:
+    """
+    ETag fuerte de un listado de tareas.
+    
+    Args:
+        owner_id: Usuario dueño de las tareas
+        version: Versión de sus contadores, cambia con cada escritura
+        query: Parámetros de la petición, porque cada página o filtro es
+            una representación distinta
+    """
+    digest = hashlib.blake2b(f"{owner_id}?{query}".encode(), digest_size=8).hexdigest()
+    return f'"l{version}-{digest}"'
+
+
+def parse_etags(header: Optional[str]) -> Optional[list[str]]:
+    """
+    Separa la lista de ETags de If-None-Match o If-Match.
+    
+    Returns:
+        Lista de ETags (con el prefijo W/ si lo tienen), ["*"] para cualquier
+        versión o None si no hay cabecera
+    """
+    if header is None:
+        return None
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(header: Optional[str], etag: str) -> bool:
+    """
+    Indica si la respuesta debe ser 304 según If-None-Match.
+    Usa comparación débil, como indica el RFC 9110 para este caso.
+    """
+    tags = parse_etags(header)
+    if not tags:
+        return False
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def match_versions(header: Optional[str], task_id: int) -> Optional[set[int]]:
+    """
+    Versiones de la tarea aceptadas por If-Match (comparación fuerte).
+    
+    Returns:
+        None si no hay condición (sin cabecera o "*"); si no, el conjunto de
+        versiones de la tarea cuyo ETag aparece en la cabecera (puede estar vacío)
+    """
+    tags = parse_etags(header)
+    if tags is None or "*" in tags:
+        return None
+    prefix = f'"t{task_id}-'
+    versions = set()
+    for tag in tags:
+        if tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit():
+            versions.add(int(tag[len(prefix):-1]))
+    return versions
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Respuesta 304 sin cuerpo.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
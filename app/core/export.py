@@ -0,0 +1,114 @@
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Sequence
+
+import orjson
+from sqlalchemy import Select
+from sqlalchemy.engine import Row
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.responses import ORJSON_OPTIONS
+from app.db import database
+
+# Columnas incluidas en la exportación, en este orden
+EXPORT_COLUMNS = ("id", "title", "description", "is_completed", "created_at", "updated_at")
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+async def stream_batches(stmt: Select, batch_size: int) -> AsyncIterator[Sequence[Row]]:
+    """
+    Ejecuta la consulta con un cursor de servidor y devuelve las filas por lotes.
+    
+    Usa su propia sesión porque la de get_db se cierra antes de que
+    StreamingResponse empiece a enviar el cuerpo.
+    """
+    options = {"yield_per": batch_size}
+    
+    if settings.DB_ASYNC:
+        async with database.AsyncSessionLocal() as db:
+            result = await db.stream(stmt, execution_options=options)
+            async for batch in result.partitions():
+                yield batch
+        return
+    
+    db = database.SessionLocal()
+    try:
+        result = await run_in_threadpool(db.execute, stmt, execution_options=options)
+        partitions = result.partitions()
+        while True:
+            # Cada lote se lee en el threadpool para no bloquear el event loop
+            batch = await run_in_threadpool(next, partitions, None)
+            if batch is None:
+                break
+            yield batch
+    finally:
+        db.close()
+
+
+def encode_ndjson(rows: Iterable[Row]) -> bytes:
+    """
+    Convierte un lote de filas en líneas JSON (una tarea por línea).
+    """
+    lines = [
+        orjson.dumps(
+            {column: row._mapping[column] for column in EXPORT_COLUMNS},
+            option=ORJSON_OPTIONS
+        )
+        for row in rows
+    ]
+    return b"\n".join(lines) + b"\n"
+
+
+def encode_csv(rows: Iterable[Row], header: bool = False) -> bytes:
+    """
+    Convierte un lote de filas en líneas CSV.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (getattr(row, column) for column in EXPORT_COLUMNS)
+        ])
+    return buffer.getvalue().encode()
+
+
+async def export_stream(
+    stmt: Select,
+    format: str,
+    gzip: bool = False
+) -> AsyncIterator[bytes]:
+    """
+    Genera el cuerpo de la exportación lote a lote.
+    La memoria usada depende del tamaño del lote, no del número de filas.
+    
+    Args:
+        stmt: Consulta con las columnas de EXPORT_COLUMNS
+        format: "ndjson" o "csv"
+        gzip: Si es True, comprime la salida de forma incremental
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    
+    if format == "csv":
+        chunk = encode_csv([], header=True)
+        yield compressor.compress(chunk) if compressor else chunk
+    
+    async for batch in stream_batches(stmt, settings.TASK_EXPORT_BATCH_SIZE):
+        chunk = encode_csv(batch) if format == "csv" else encode_ndjson(batch)
+        if compressor:
+            chunk = compressor.compress(chunk)
+            if not chunk:
+                continue
+        yield chunk
+    
+    if compressor:
+        yield compressor.flush()
@@ -0,0 +1,199 @@
+import csv
+import json
+from typing import AsyncIterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.cache import task_cache
+from app.core.config import settings
+from app.crud import task as crud_task
+from app.db.database import run_db
+from app.schemas.task import TaskCreate
+
+
+class LineTooLong(Exception):
+    """
+    Una línea del archivo supera TASK_IMPORT_MAX_LINE_BYTES.
+    """
+    pass
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, Optional[bytes]]]:
+    """
+    Separa en líneas un cuerpo recibido por bloques.
+
+    Devuelve (número de línea, contenido). Si una línea es demasiado larga se
+    devuelve con contenido None y se descarta el resto, sin acumularla en memoria.
+    """
+    buffer = b""
+    line_number = 0
+    skipping = False
+    max_bytes = settings.TASK_IMPORT_MAX_LINE_BYTES
+
+    async for chunk in chunks:
+        lines = (buffer + chunk).split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if skipping:
+                # Final de una línea larga que ya se notificó
+                skipping = False
+                continue
+            line_number += 1
+            yield line_number, line if len(line) <= max_bytes else None
+
+        if len(buffer) > max_bytes:
+            if not skipping:
+                line_number += 1
+                skipping = True
+                yield line_number, None
+            buffer = b""
+
+    if buffer and not skipping:
+        yield line_number + 1, buffer
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'fila'}: {error['msg']}"
+        for error in exc.errors()
+    )
+
+
+async def iter_ndjson(lines: AsyncIterator[tuple[int, Optional[bytes]]]) -> AsyncIterator[tuple[int, dict]]:
+    """
+    Convierte cada línea en un diccionario. Las líneas vacías se ignoran.
+    Los errores se devuelven como excepciones en lugar del diccionario.
+    """
+    async for line_number, line in lines:
+        if line is None:
+            yield line_number, LineTooLong()
+            continue
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield line_number, ValueError("JSON inválido")
+            continue
+        if not isinstance(data, dict):
+            yield line_number, ValueError("Se esperaba un objeto JSON")
+            continue
+        yield line_number, data
+
+
+async def iter_csv(lines: AsyncIterator[tuple[int, Optional[bytes]]]) -> AsyncIterator[tuple[int, dict]]:
+    """
+    Convierte cada registro CSV en un diccionario usando la primera fila como cabecera.
+
+    Un campo entre comillas puede ocupar varias líneas: se acumulan líneas
+    hasta que el número de comillas es par, es decir, hasta cerrar el registro.
+    """
+    header = None
+    pending: list[str] = []
+    pending_bytes = 0
+    first_line = 0
+
+    async for line_number, line in lines:
+        if line is None:
+            pending, pending_bytes = [], 0
+            yield line_number, LineTooLong()
+            continue
+
+        text = line.decode("utf-8-sig" if header is None and not pending else "utf-8", errors="replace")
+        if not pending:
+            first_line = line_number
+        pending.append(text.rstrip("\r"))
+        pending_bytes += len(line)
+        record = "\n".join(pending)
+
+        if record.count('"') % 2:
+            if pending_bytes > settings.TASK_IMPORT_MAX_LINE_BYTES:
+                pending, pending_bytes = [], 0
+                yield first_line, LineTooLong()
+            continue
+        pending, pending_bytes = [], 0
+
+        if not record.strip():
+            continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        # Los campos vacíos se tratan como ausentes (valor por defecto)
+        yield first_line, {
+            name: value
+            for name, value in zip(header, values)
+            if value != ""
+        }
+
+    if pending:
+        yield first_line, ValueError("Registro CSV sin cerrar")
+
+
+async def import_tasks(
+    chunks: AsyncIterator[bytes],
+    format: str,
+    db,
+    owner_id: int
+) -> dict:
+    """
+    Importa tareas desde un cuerpo NDJSON o CSV recibido en streaming.
+
+    Cada fila se valida con TaskCreate; las filas válidas se insertan en
+    lotes de TASK_IMPORT_BATCH_SIZE. Una fila con errores no detiene la
+    importación. La memoria usada depende del tamaño del lote, no del archivo.
+
+    Returns:
+        Diccionario con la forma de TaskImportResult
+    """
+    parser = iter_csv if format == "csv" else iter_ndjson
+    summary = {"received": 0, "imported": 0, "failed": 0, "errors": [], "errors_truncated": False}
+    batch: list[dict] = []
+    batch_lines: list[int] = []
+
+    def add_error(line_number: int, message: str):
+        summary["failed"] += 1
+        if len(summary["errors"]) < settings.TASK_IMPORT_MAX_ERRORS:
+            summary["errors"].append({"line": line_number, "error": message})
+        else:
+            summary["errors_truncated"] = True
+
+    async def flush():
+        try:
+            summary["imported"] += await run_db(
+                db, crud_task.import_tasks_batch, rows=batch, owner_id=owner_id
+            )
+        except SQLAlchemyError:
+            await run_db(db, lambda session: session.rollback())
+            for line_number in batch_lines:
+                add_error(line_number, "Error al guardar el lote en la base de datos")
+        else:
+            await task_cache.ainvalidate(owner_id)
+        batch.clear()
+        batch_lines.clear()
+
+    async for line_number, data in parser(iter_lines(chunks)):
+        summary["received"] += 1
+        if isinstance(data, LineTooLong):
+            add_error(line_number, f"Línea mayor de {settings.TASK_IMPORT_MAX_LINE_BYTES} bytes")
+            continue
+        if isinstance(data, Exception):
+            add_error(line_number, str(data))
+            continue
+        try:
+            task = TaskCreate.model_validate(data)
+        except ValidationError as exc:
+            add_error(line_number, _validation_message(exc))
+            continue
+
+        batch.append(task.model_dump())
+        batch_lines.append(line_number)
+        if len(batch) >= settings.TASK_IMPORT_BATCH_SIZE:
+            await flush()
+
+    if batch:
+        await flush()
+
+    return summary
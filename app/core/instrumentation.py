@@ -0,0 +1,169 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import db_pool_checkout_seconds, db_query_duration_seconds
+
+logger = logging.getLogger("app.sql")
+
+
+class QueryStats:
+    """
+    Consultas ejecutadas durante una petición.
+    """
+    __slots__ = ("queries", "db_time", "pool_wait", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.statements: Counter = Counter()
+
+
+# Estadísticas de la petición en curso. El threadpool y run_sync copian el
+# contexto, así que los eventos de SQLAlchemy ven el mismo objeto
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Marcadores de parámetros de los distintos drivers: ?, %(name)s, %s, :name
+# y $1 (que queda como $? al reemplazar los números)
+_PARAM = r"(?:\?|%\(\w+\)s|%s|\$\?|:\w+)"
+_PARAM_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    """
+    Sentencia sin valores concretos: las listas IN (...) de cualquier
+    longitud, los textos y los números se reemplazan por ?.
+    Dos ejecuciones de la misma consulta con distintos valores coinciden.
+    """
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _PARAM_LIST.sub("(?)", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # En el contexto de ejecución y no en conn.info: una sentencia que falla
+    # no llega a after_cursor_execute y dejaría un inicio huérfano que
+    # descuadraría la medida de las siguientes
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+        if settings.SQL_N_PLUS_ONE_THRESHOLD > 0:
+            stats.statements[statement] += 1
+
+    if settings.METRICS_ENABLED:
+        db_query_duration_seconds.observe(elapsed)
+
+    if elapsed * 1000 >= settings.SQL_SLOW_QUERY_MS:
+        logger.warning("Consulta lenta (%.1f ms): %s", elapsed * 1000, normalize_sql(statement))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Registra los eventos que miden cada sentencia y la espera para obtener
+    una conexión del pool. Con un motor asíncrono se pasa su sync_engine.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    # Toda conexión nueva de Engine.connect() pasa por raw_connection(), que
+    # la saca del pool; el tiempo incluye la espera si el pool está agotado
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = _current.get()
+            if stats is not None:
+                stats.pool_wait += elapsed
+            if settings.METRICS_ENABLED:
+                db_pool_checkout_seconds.observe(elapsed)
+
+    engine.raw_connection = timed_raw_connection
+
+
+def repeated_statements(stats: QueryStats) -> list[tuple[str, int]]:
+    """
+    Consultas ejecutadas al menos SQL_N_PLUS_ONE_THRESHOLD veces en la
+    petición, agrupadas por su forma normalizada.
+    """
+    threshold = settings.SQL_N_PLUS_ONE_THRESHOLD
+    if threshold <= 0:
+        return []
+    grouped: Counter = Counter()
+    for statement, count in stats.statements.items():
+        grouped[normalize_sql(statement)] += count
+    return [(statement, count) for statement, count in grouped.most_common() if count >= threshold]
+
+
+def server_timing(stats: QueryStats, total: float) -> str:
+    """
+    Valor de la cabecera Server-Timing (duraciones en milisegundos).
+    """
+    return (
+        f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} consultas", '
+        f"db-pool;dur={stats.pool_wait * 1000:.2f}, "
+        f"total;dur={total * 1000:.2f}"
+    )
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI que mide las consultas de cada petición HTTP.
+    
+    Añade la cabecera Server-Timing (si SQL_SERVER_TIMING está activado) y,
+    al terminar, avisa en el log de las consultas repetidas muchas veces,
+    que suelen indicar un problema N+1.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and settings.SQL_SERVER_TIMING:
+                headers = list(message.get("headers", []))
+                value = server_timing(stats, time.perf_counter() - start)
+                headers.append((b"server-timing", value.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            for statement, count in repeated_statements(stats):
+                logger.warning(
+                    "Posible N+1 en %s %s: %d ejecuciones de %s",
+                    scope["method"], scope["path"], count, statement
+                )
@@ -0,0 +1,310 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Iterable, Optional
+
+from app.core.config import settings
+
+# Límites de los histogramas de latencia, en segundos
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    """
+    Etiquetas en el formato de texto de Prometheus: {a="1",b="2"}.
+    """
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Base de las métricas: nombre, ayuda, etiquetas y un lock propio.
+    Los valores se guardan por tupla de valores de etiqueta.
+    """
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Valor que solo aumenta (peticiones, errores...).
+    """
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Gauge(Metric):
+    """
+    Valor que sube y baja (peticiones en curso, conexiones...).
+
+    Con callback, el valor se calcula al exponer las métricas: la función
+    devuelve pares (valores de etiqueta, valor) y no cuesta nada entre lecturas.
+    """
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        callback: Optional[Callable[[], Iterable[tuple[tuple, float]]]] = None
+    ):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+        self.callback = callback
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value: float) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def samples(self) -> Iterable[str]:
+        if self.callback is not None:
+            items = list(self.callback())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        for label_values, value in items:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """
+    Distribución de valores (latencias) en cubetas acumuladas, más suma y cuenta.
+    Observar un valor es una búsqueda binaria y un incremento.
+    """
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: [cuentas por cubeta (la última es +Inf), suma]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def time(self, *label_values):
+        """
+        Mide la duración de un bloque 'with' y la registra.
+        Con METRICS_ENABLED desactivado no mide nada.
+        """
+        if not settings.METRICS_ENABLED:
+            return nullcontext()
+        return _Timer(self, label_values)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        for label_values, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram: Histogram, label_values: tuple):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+
+
+class Registry:
+    """
+    Conjunto de métricas que se exponen juntas en /metrics.
+    """
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def expose(self) -> str:
+        """
+        Todas las métricas en el formato de texto de Prometheus.
+        """
+        return "\n".join(metric.expose() for metric in self._metrics.values()) + "\n"
+
+
+registry = Registry()
+
+# Peticiones HTTP (la ruta es la plantilla, p. ej. /api/tasks/{task_id})
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "Peticiones HTTP atendidas", ("method", "route", "status")
+))
+http_request_duration_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "Duración de las peticiones HTTP", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Peticiones HTTP en curso", ("method",)
+))
+
+# Base de datos
+db_query_duration_seconds = registry.register(Histogram(
+    "db_query_duration_seconds", "Duración de cada sentencia SQL"
+))
+db_pool_checkout_seconds = registry.register(Histogram(
+    "db_pool_checkout_seconds", "Tiempo para obtener una conexión del pool, incluida la espera"
+))
+
+# Motores vigilados, por nombre; el estado del pool se lee al exponer
+_engines: dict = {}
+
+
+def watch_engine(name: str, engine) -> None:
+    """
+    Incluye en /metrics el estado del pool de conexiones del motor.
+    Con un motor asíncrono se pasa su sync_engine.
+    """
+    _engines[name] = engine
+
+
+def _pool_samples(read: Callable):
+    def samples():
+        for name, engine in _engines.items():
+            # Los pools sin límite (SQLite en memoria, NullPool) no tienen estos datos
+            if hasattr(engine.pool, "checkedout"):
+                yield (name,), read(engine.pool)
+    return samples
+
+
+db_pool_size = registry.register(Gauge(
+    "db_pool_size", "Conexiones fijas del pool", ("engine",),
+    callback=_pool_samples(lambda pool: pool.size())
+))
+db_pool_checked_out = registry.register(Gauge(
+    "db_pool_checked_out", "Conexiones del pool en uso", ("engine",),
+    callback=_pool_samples(lambda pool: pool.checkedout())
+))
+# QueuePool.overflow() es negativo mientras el pool no se ha llenado
+db_pool_overflow = registry.register(Gauge(
+    "db_pool_overflow", "Conexiones abiertas por encima del tamaño del pool", ("engine",),
+    callback=_pool_samples(lambda pool: max(pool.overflow(), 0))
+))
+
+# Autenticación (en las funciones asíncronas, incluye la espera en el pool de bcrypt)
+auth_duration_seconds = registry.register(Histogram(
+    "auth_duration_seconds", "Duración de las operaciones de autenticación", ("operation",)
+))
+
+# Arranque del worker
+app_startup_seconds = registry.register(Gauge(
+    "app_startup_seconds", "Segundos desde que se empieza a importar app.main hasta terminar el arranque"
+))
+
+# Prometheus usa este tipo para la versión exacta del texto
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Métodos con etiqueta propia; cualquier otro verbo que envíe un cliente
+# se cuenta como "otro" para no crear series sin límite
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que registra cada petición HTTP: en curso, duración y
+    código de estado por método y plantilla de ruta.
+
+    La ruta se lee del scope al terminar (FastAPI guarda allí la ruta
+    elegida), así que las URLs con IDs no crean etiquetas nuevas.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"] if scope["method"] in HTTP_METHODS else "otro"
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec(method)
+            route = scope.get("route")
+            route = getattr(route, "path", None) or "sin_ruta"
+            http_request_duration_seconds.observe(time.perf_counter() - start, method, route)
+            http_requests_total.inc(method, route, str(status_code))
@@ -0,0 +1,55 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+
+def encode_cursor(last_id: int, sort: str = "id", value: Any = None) -> str:
+    """
+    Genera un cursor opaco a partir del último elemento de la página.
+    
+    Args:
+        last_id: ID de la última tarea devuelta
+        sort: Orden del listado ("id", "created_at:desc", ...)
+        value: Valor del campo de orden en la última tarea (si no es id)
+    
+    Returns:
+        El cursor codificado en base64 (seguro para URLs)
+    """
+    data = {"id": last_id}
+    if sort != "id":
+        data["s"] = sort
+    if value is not None:
+        if isinstance(value, datetime):
+            data["v"], data["t"] = value.isoformat(), "dt"
+        else:
+            data["v"] = value
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str = "id") -> Optional[tuple[int, Any]]:
+    """
+    Decodifica un cursor generado por encode_cursor.
+    
+    Args:
+        sort: Orden del listado actual; el cursor debe haberse generado con el mismo
+    
+    Returns:
+        (id, valor del campo de orden) o None si el cursor no es válido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = data["id"]
+        value = data.get("v")
+        if data.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+    except (binascii.Error, ValueError, TypeError, KeyError, AttributeError):
+        return None
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        return None
+    if data.get("s", "id") != sort:
+        return None
+    return last_id, value
@@ -0,0 +1,175 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.metrics import Counter, registry
+
+
+class RateLimitExceeded(Exception):
+    """
+    Se lanza cuando una clave supera su límite de peticiones.
+    La aplicación responde 429 con Retry-After.
+    """
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+# Los límites usan GCRA, equivalente a un token bucket: por cada clave solo
+# se guarda el instante teórico de la siguiente petición (TAT). Cada
+# petición lo adelanta un intervalo (60 / límite por minuto) y se rechaza
+# si quedaría más de una ráfaga completa por delante del reloj.
+
+class MemoryLimiterBackend:
+    """
+    Límites en la memoria del proceso: un float por clave, con desalojo
+    LRU por encima de max_keys. Una clave desalojada empieza con la
+    ráfaga completa, así que el límite de memoria nunca bloquea a nadie.
+    """
+    # Las operaciones son instantáneas, se pueden llamar desde el event loop
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, interval: float, burst: int) -> float:
+        """
+        Cuenta una petición de la clave.
+
+        Returns:
+            0 si se admite, o los segundos que faltan para poder admitirla
+        """
+        now = time.monotonic()
+        with self._lock:
+            tat = max(self._tats.get(key, now), now) + interval
+            retry_after = tat - burst * interval - now
+            if retry_after > 0:
+                return retry_after
+            self._tats[key] = tat
+            self._tats.move_to_end(key)
+            if len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+        return 0.0
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+# Mismo cálculo en Redis, atómico y con el reloj del servidor de Redis
+# para que todos los workers y servidores coincidan
+_REDIS_GCRA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now) + interval
+local retry_after = tat - burst * interval - now
+if retry_after > 0 then
+    return tostring(retry_after)
+end
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil((tat - now) * 1000))
+return '0'
+"""
+
+
+class RedisLimiterBackend:
+    """
+    Límites compartidos entre procesos y servidores usando Redis.
+    Cada clave caduca cuando su ráfaga vuelve a estar completa. Si Redis
+    no responde, las peticiones se admiten en lugar de fallar.
+    """
+    # Cada operación es una llamada de red
+    blocking = True
+
+    def __init__(self, url: str, prefix: str):
+        import redis  # Dependencia opcional, solo necesaria con CACHE_BACKEND=redis
+
+        self._errors = redis.RedisError
+        client = redis.Redis.from_url(url, socket_timeout=0.1)
+        self._script = client.register_script(_REDIS_GCRA)
+        self.prefix = prefix
+
+    def hit(self, key: str, interval: float, burst: int) -> float:
+        try:
+            return float(self._script(keys=[self.prefix + key], args=[interval, burst]))
+        except self._errors:
+            return 0.0
+
+
+class FakeSharedLimiterBackend(MemoryLimiterBackend):
+    """
+    Falso en memoria de un backend compartido, para pruebas y benchmarks
+    sin Redis: se llama desde el threadpool, como RedisLimiterBackend.
+    """
+    blocking = True
+
+
+rate_limited_total = registry.register(Counter(
+    "rate_limited_total", "Peticiones rechazadas con 429 por límite", ("limit",)
+))
+
+
+class RateLimit:
+    """
+    Límite de peticiones por minuto para cada clave (IP, cuenta, usuario).
+    La ráfaga admitida es el propio límite: un cliente inactivo puede
+    hacer todas sus peticiones del minuto seguidas.
+    """
+    def __init__(self, name: str, backend, per_minute: int):
+        self.name = name
+        self.backend = backend
+        self.per_minute = per_minute
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RATE_LIMIT_ENABLED and self.per_minute > 0
+
+    async def hit(self, key: str) -> None:
+        """
+        Cuenta una petición de la clave.
+        Lanza RateLimitExceeded si supera el límite.
+        """
+        if not self.enabled:
+            return
+        interval = 60 / self.per_minute
+        if self.backend.blocking:
+            retry_after = await run_in_threadpool(self.backend.hit, key, interval, self.per_minute)
+        else:
+            retry_after = self.backend.hit(key, interval, self.per_minute)
+        if retry_after > 0:
+            rate_limited_total.inc(self.name)
+            raise RateLimitExceeded(retry_after)
+
+
+def build_limit(name: str, per_minute: int) -> RateLimit:
+    """
+    Crea un límite con el backend elegido en CACHE_BACKEND.
+
+    Args:
+        name: Etiqueta en las métricas y prefijo de las claves en Redis
+        per_minute: Peticiones por minuto y clave (0 lo desactiva)
+    """
+    if settings.CACHE_BACKEND == "redis":
+        backend = RedisLimiterBackend(settings.REDIS_URL, prefix=f"ratelimit:{name}:")
+    elif settings.CACHE_BACKEND == "fake":
+        backend = FakeSharedLimiterBackend(settings.RATE_LIMIT_MAX_KEYS)
+    else:
+        backend = MemoryLimiterBackend(settings.RATE_LIMIT_MAX_KEYS)
+    return RateLimit(name, backend, per_minute)
+
+
+# Intentos de login por IP y por cuenta (contra fuerza bruta distribuida
+# entre varias IPs), registros por IP y peticiones a /api/tasks por usuario
+login_ip_limit = build_limit("login_ip", settings.RATE_LIMIT_LOGIN_PER_IP)
+login_account_limit = build_limit("login_account", settings.RATE_LIMIT_LOGIN_PER_ACCOUNT)
+register_ip_limit = build_limit("register_ip", settings.RATE_LIMIT_REGISTER_PER_IP)
+task_user_limit = build_limit("task_user", settings.RATE_LIMIT_TASKS_PER_USER)
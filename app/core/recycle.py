@@ -0,0 +1,27 @@
+import os
+import random
+import signal
+
+
+class MaxRequestsMiddleware:
+    """
+    Middleware ASGI que reinicia el worker tras un número de peticiones,
+    para acotar fugas de memoria o fragmentación en procesos longevos.
+
+    El límite de cada proceso es max_requests más un margen aleatorio de
+    hasta jitter: si todos los workers se reiniciaran a la vez, el servidor
+    dejaría de responder mientras arrancan los nuevos. Al llegar al límite
+    el proceso se envía SIGTERM: uvicorn deja de aceptar conexiones,
+    termina las peticiones en curso y el proceso principal lo sustituye.
+    """
+    def __init__(self, app, max_requests: int, jitter: int = 0):
+        self.app = app
+        self.limit = max_requests + random.randint(0, max(jitter, 0))
+        self.requests = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.requests += 1
+            if self.requests == self.limit:
+                os.kill(os.getpid(), signal.SIGTERM)
+        await self.app(scope, receive, send)
@@ -0,0 +1,77 @@
+from operator import itemgetter
+from typing import Optional, Sequence
+
+import orjson
+from fastapi import Response
+from sqlalchemy.engine import Row
+
+from app.core.etag import none_match, not_modified, task_etag
+from app.schemas.task import Task
+
+# Campos de la respuesta en el mismo orden que el esquema Task
+TASK_FIELDS = tuple(Task.model_fields)
+
+# Mismo formato de fechas que Pydantic (UTC como "Z")
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def dump_task_rows(rows: Sequence[Row]) -> bytes:
+    """
+    Serializa filas de tareas directamente a JSON.
+    
+    Las filas vienen de una consulta de columnas (sin objetos ORM) y ya
+    tienen los tipos de la base de datos, así que no se validan otra vez
+    con Pydantic. El resultado es igual al de response_model=List[Task].
+    """
+    if not rows:
+        return b"[]"
+    
+    # Posición de cada campo en la fila, calculada una vez por lista
+    columns = rows[0]._fields
+    values = itemgetter(*(columns.index(field) for field in TASK_FIELDS))
+    return orjson.dumps(
+        [dict(zip(TASK_FIELDS, values(row))) for row in rows],
+        option=ORJSON_OPTIONS
+    )
+
+
+def task_list_response(rows: Sequence[Row]) -> Response:
+    """
+    Respuesta JSON con una lista de tareas ya serializada.
+    """
+    return Response(content=dump_task_rows(rows), media_type="application/json")
+
+
+def task_response(task) -> Response:
+    """
+    Respuesta JSON de una tarea con su ETag.
+    """
+    return Response(
+        content=Task.model_validate(task).model_dump_json(),
+        media_type="application/json",
+        headers={"ETag": task_etag(task.id, task.version)}
+    )
+
+
+# Cabeceras que forman parte de una respuesta guardada en caché
+CACHED_HEADERS = ("ETag", "X-Next-Cursor", "X-Total-Count")
+
+
+def cache_entry(response: Response) -> list:
+    """
+    Convierte una respuesta JSON en un valor para la caché.
+    Solo usa textos, así que sirve también para backends que guardan JSON.
+    """
+    headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+    return [response.body.decode(), headers]
+
+
+def cached_response(entry: list, if_none_match: Optional[str]) -> Response:
+    """
+    Reconstruye una respuesta guardada con cache_entry.
+    Responde 304 si el ETag guardado coincide con If-None-Match.
+    """
+    body, headers = entry
+    if none_match(if_none_match, headers["ETag"]):
+        return not_modified(headers["ETag"])
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,13 +1,75 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-
+from app.core.cache import Cache, MemoryBackend
 from app.core.config import settings
+from app.core.metrics import Gauge, auth_duration_seconds, registry
+
+# passlib y jose (que carga cryptography) tardan unos 70 ms en importarse:
+# se importan en el primer uso para que el worker arranque antes
+_pwd_context = None
+
+
+def get_pwd_context():
+    """
+    Devuelve el contexto de passlib para bcrypt, creándolo en el primer uso.
+    """
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+
+        # Los hashes con otro coste se marcan para actualizar (needs_update)
+        _pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__rounds=settings.BCRYPT_ROUNDS
+        )
+    return _pwd_context
+
+
+def load_auth_backends() -> None:
+    """
+    Importa passlib, bcrypt y jose por adelantado (calentamiento al arrancar).
+    """
+    import jose.jwt  # noqa: F401
+
+    # Carga el backend de bcrypt sin calcular ningún hash
+    get_pwd_context().handler("bcrypt").get_backend()
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Se lanza cuando hay demasiadas operaciones de hash pendientes.
+    """
+    pass
 
-# Configurar el contexto para hash de contraseñas con bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Claves con las que se aceptan tokens, por kid
+# La actual firma los tokens nuevos; las anteriores siguen siendo válidas
+verification_keys = {
+    **settings.JWT_PREVIOUS_KEYS,
+    settings.JWT_KEY_ID: settings.SECRET_KEY,
+}
+
+# Payloads de tokens ya verificados, por token
+# Cada entrada caduca como mucho en el 'exp' del propio token
+token_cache = Cache(
+    MemoryBackend(settings.TOKEN_CACHE_MAX_ENTRIES),
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60 if settings.TOKEN_CACHE_MAX_ENTRIES else 0
+)
+
+
+# Pool dedicado a bcrypt, se crea en el primer uso
+_hash_executor: Optional[Executor] = None
+_hash_pending = 0
+
+registry.register(Gauge(
+    "auth_hash_pending", "Operaciones de bcrypt en curso o en cola",
+    callback=lambda: [((), _hash_pending)]
+))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -21,7 +83,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True si coinciden, False si no
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -34,7 +96,93 @@ def get_password_hash(password: str) -> str:
     Returns:
         La contraseña encriptada que se guardará en la base de datos
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verifica la contraseña y, si el hash usa un coste distinto al
+    configurado, genera uno nuevo.
+    
+    Returns:
+        (True/False según coincida, nuevo hash o None si no hace falta)
+    """
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+def _get_hash_executor() -> Executor:
+    """
+    Devuelve el pool de bcrypt, creándolo si todavía no existe.
+    bcrypt libera el GIL, así que un pool de hilos ya aprovecha varios núcleos.
+    """
+    global _hash_executor
+    if _hash_executor is None:
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        else:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                thread_name_prefix="bcrypt"
+            )
+    return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    """
+    Detiene el pool de bcrypt (y sus procesos, con PASSWORD_HASH_EXECUTOR=process).
+    """
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+
+
+async def _run_in_hash_pool(fn, *args):
+    """
+    Ejecuta fn en el pool de bcrypt sin ocupar el threadpool de Starlette.
+    Lanza PasswordHasherBusy si se supera PASSWORD_HASH_QUEUE_LIMIT.
+    """
+    global _hash_pending
+    if _hash_pending >= settings.PASSWORD_HASH_QUEUE_LIMIT:
+        raise PasswordHasherBusy()
+    
+    # Solo se modifica desde el event loop, no necesita lock
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), fn, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Versión awaitable de verify_password que usa el pool de bcrypt.
+    """
+    with auth_duration_seconds.time("verify_password"):
+        return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Versión awaitable de get_password_hash que usa el pool de bcrypt.
+    """
+    with auth_duration_seconds.time("get_password_hash"):
+        return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Versión awaitable de verify_and_update_password que usa el pool de bcrypt.
+    """
+    with auth_duration_seconds.time("verify_password"):
+        return await _run_in_hash_pool(
+            verify_and_update_password, plain_password, hashed_password
+        )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -48,6 +196,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         El token JWT como string
     """
+    from jose import jwt
+
     to_encode = data.copy()
     
     # Establecer tiempo de expiración
@@ -62,10 +212,12 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     
     # Crear el token JWT
+    # El kid indica con qué clave se firmó, para poder rotar SECRET_KEY
     encoded_jwt = jwt.encode(
         to_encode,
         settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM
+        algorithm=settings.ALGORITHM,
+        headers={"kid": settings.JWT_KEY_ID}
     )
     
     return encoded_jwt
@@ -75,18 +227,49 @@ def decode_access_token(token: str) -> Optional[dict]:
     """
     Decodifica y valida un token JWT.
     
+    Los tokens válidos se guardan en token_cache hasta su expiración, así
+    que las peticiones repetidas con el mismo token no vuelven a verificar
+    la firma. El payload devuelto es compartido y no debe modificarse.
+    
     Args:
         token: El token JWT a decodificar
     
     Returns:
         El payload del token si es válido, None si no es válido
     """
+    with auth_duration_seconds.time("decode_access_token"):
+        return _decode_access_token(token)
+
+
+def _decode_access_token(token: str) -> Optional[dict]:
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    
+    from jose import JWTError, jwt
+
     try:
+        # Elegir la clave según el kid; los tokens sin kid usan la actual
+        kid = jwt.get_unverified_header(token).get("kid", settings.JWT_KEY_ID)
+        # La cabecera aún no está verificada: el kid puede ser cualquier JSON
+        if not isinstance(kid, str):
+            return None
+        key = verification_keys.get(kid)
+        if key is None:
+            return None
         payload = jwt.decode(
             token,
-            settings.SECRET_KEY,
+            key,
             algorithms=[settings.ALGORITHM]
         )
-        return payload
     except JWTError:
         return None
+    
+    # Nunca guardar la entrada más allá del 'exp' del token
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        remaining = exp - time.time()
+        if remaining > 0:
+            token_cache.set(token, payload, ttl=min(remaining, token_cache.ttl))
+    
+    return payload
@@ -6,13 +6,30 @@ from app.crud.user import (
     create_user,
     update_user,
     delete_user,
+    set_password_hash,
     authenticate_user
 )
 from app.crud.task import (
     get_task,
     get_tasks,
     get_tasks_by_owner,
+    get_task_rows_by_owner,
+    search_tasks_by_owner,
     create_task,
     update_task,
-    delete_task
+    delete_task,
+    get_task_version,
+    task_exists,
+    update_owned_task,
+    delete_owned_task,
+    create_tasks_bulk,
+    update_tasks_bulk,
+    delete_tasks_bulk,
+    export_tasks_query,
+    import_tasks_batch
+)
+from app.crud.task_stats import (
+    adjust_task_stats,
+    get_task_stats,
+    rebuild_task_stats
 )
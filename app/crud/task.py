@@ -1,8 +1,31 @@
+import io
+import re
 from typing import Optional
+from sqlalchemy import (
+    Float, Select, cast, column, delete, false, func, insert, literal_column,
+    select, table, true, tuple_, update
+)
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 
-from app.models.task import Task
-from app.schemas.task import TaskCreate, TaskUpdate
+from app.crud.task_stats import adjust_task_stats
+from app.models.task import TASK_SEARCH_CONFIG, Task, byte_order
+from app.schemas.task import TaskCreate, TaskFilters, TaskUpdate
+
+# Las escrituras no invalidan la caché de tareas: lo hace quien las llama
+# después del commit (task_cache.ainvalidate en los endpoints), para no
+# bloquear el event loop con Redis cuando se ejecutan con DB_ASYNC=true
+
+# Columnas devueltas con RETURNING en las escrituras de una sola sentencia
+TASK_COLUMNS = tuple(Task.__table__.c)
+
+# Campos por los que se puede ordenar el listado; cada uno tiene un índice
+# (owner_id, campo, id) para poder paginar por cursor
+TASK_SORT_COLUMNS = {
+    "id": Task.id,
+    "created_at": Task.created_at,
+    "title": Task.title,
+}
 
 
 def get_task(db: Session, task_id: int) -> Optional[Task]:
@@ -19,18 +42,226 @@ def get_tasks(db: Session, skip: int = 0, limit: int = 100) -> list[Task]:
     return db.query(Task).offset(skip).limit(limit).all()
 
 
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    """
+    Menor texto mayor que todos los que empiezan por prefix, en orden de
+    código de carácter (None si no hay ninguno).
+    """
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    # Los sustitutos no se pueden guardar en UTF-8
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+
+def _apply_filters(query, filters: Optional[TaskFilters]):
+    """
+    Añade a la consulta los filtros indicados.
+    """
+    if filters is None:
+        return query
+    
+    # true()/false() se escriben como literales para que PostgreSQL y SQLite
+    # puedan usar el índice parcial de tareas pendientes
+    if filters.is_completed is not None:
+        query = query.where(Task.is_completed == (true() if filters.is_completed else false()))
+    if filters.created_from is not None:
+        query = query.where(Task.created_at >= filters.created_from)
+    if filters.created_to is not None:
+        query = query.where(Task.created_at < filters.created_to)
+    if filters.updated_from is not None:
+        query = query.where(Task.updated_at >= filters.updated_from)
+    if filters.updated_to is not None:
+        query = query.where(Task.updated_at < filters.updated_to)
+    if filters.title_prefix:
+        # Como rango y no con LIKE, que ningún índice resuelve: el prefijo
+        # acota ix_tasks_owner_title (SQLite) o ix_tasks_owner_title_c
+        # (PostgreSQL). Distingue mayúsculas en ambos motores
+        title = byte_order(Task.title)
+        query = query.where(title >= filters.title_prefix)
+        upper = _prefix_upper_bound(filters.title_prefix)
+        if upper is not None:
+            query = query.where(title < upper)
+    return query
+
+
+def _tasks_by_owner_query(
+    query,
+    owner_id: int,
+    skip: int,
+    limit: int,
+    after_id: Optional[int],
+    filters: Optional[TaskFilters] = None,
+    sort: str = "id",
+    descending: bool = False,
+    after_value=None
+):
+    query = _apply_filters(query.where(Task.owner_id == owner_id), filters)
+    
+    # Siempre se desempata por id para que el orden sea estable
+    sort_column = TASK_SORT_COLUMNS[sort]
+    columns = (Task.id,) if sort == "id" else (sort_column, Task.id)
+    query = query.order_by(*(column.desc() if descending else column for column in columns))
+    
+    if after_id is not None:
+        if sort == "id":
+            key, bound = Task.id, after_id
+        else:
+            key = tuple_(sort_column, Task.id)
+            bound = tuple_(after_value, after_id, types=(sort_column.type, Task.id.type))
+        query = query.where(key < bound if descending else key > bound)
+    elif skip:
+        query = query.offset(skip)
+    
+    return query.limit(limit)
+
+
 def get_tasks_by_owner(
     db: Session, 
     owner_id: int, 
     skip: int = 0, 
-    limit: int = 100
+    limit: int = 100,
+    after_id: Optional[int] = None
 ) -> list[Task]:
     """
-    Obtiene todas las tareas de un usuario específico.
+    Obtiene todas las tareas de un usuario específico ordenadas por id.
+    
+    Args:
+        skip: Cantidad de registros a saltar (paginación por offset)
+        limit: Cantidad máxima de registros a devolver
+        after_id: Si se indica, devuelve las tareas con id mayor (paginación
+            por cursor). Usa el índice (owner_id, id) y no recorre las
+            filas anteriores, por lo que cualquier página cuesta lo mismo.
+    """
+    return _tasks_by_owner_query(
+        db.query(Task), owner_id, skip, limit, after_id
+    ).all()
+
+
+def get_task_rows_by_owner(
+    db: Session,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filters: Optional[TaskFilters] = None,
+    sort: str = "id",
+    descending: bool = False,
+    after_value=None
+) -> list[Row]:
+    """
+    Igual que get_tasks_by_owner pero devuelve filas de columnas en lugar
+    de objetos ORM: no pasan por el identity map ni se rastrean cambios.
+    Es la versión que usa el listado de la API.
+    
+    Args:
+        filters: Filtros por estado, fechas y prefijo del título
+        sort: Campo de orden, una clave de TASK_SORT_COLUMNS
+        descending: Orden descendente
+        after_value: Valor del campo de orden de la última tarea de la
+            página anterior (paginación por cursor cuando sort no es id)
+    """
+    stmt = _tasks_by_owner_query(
+        select(*TASK_COLUMNS), owner_id, skip, limit, after_id,
+        filters=filters, sort=sort, descending=descending, after_value=after_value
+    )
+    return db.execute(stmt).all()
+
+
+def search_terms(q: str) -> list[str]:
+    """
+    Palabras de una búsqueda, sin signos ni operadores.
     """
-    return db.query(Task).filter(
-        Task.owner_id == owner_id
-    ).offset(skip).limit(limit).all()
+    return re.findall(r"\w+", q)
+
+
+def search_tasks_by_owner(
+    db: Session,
+    owner_id: int,
+    q: str,
+    limit: int = 100,
+    after_rank: Optional[float] = None,
+    after_id: Optional[int] = None
+) -> list[Row]:
+    """
+    Busca tareas de un usuario cuyo título o descripción contengan todas
+    las palabras de q, de más a menos relevantes.
+    
+    En PostgreSQL usa la columna search_vector (índice GIN) y ts_rank; en
+    SQLite la tabla FTS5 tasks_fts y bm25. En ambos casos una relevancia
+    mayor es mejor y el título pesa más que la descripción. bm25 depende de
+    las estadísticas de todo el índice, así que en SQLite la relevancia de
+    una tarea puede cambiar entre dos páginas si se modifican otras tareas.
+    
+    Args:
+        q: Texto buscado; se usan solo sus palabras (sin sintaxis de búsqueda)
+        after_rank / after_id: Relevancia e id de la última tarea de la
+            página anterior (paginación por cursor)
+    
+    Returns:
+        Filas con las columnas de la tarea y su relevancia (rank)
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    
+    if db.get_bind().dialect.name == "postgresql":
+        config = literal_column(f"'{TASK_SEARCH_CONFIG}'::regconfig")
+        tsquery = func.plainto_tsquery(config, " ".join(terms))
+        vector = literal_column("tasks.search_vector")
+        # ts_rank devuelve real (float4); el cursor trae un float de Python
+        # (float8). Comparar float4 con float8 repite o salta filas en el
+        # límite de la página, así que se ordena y compara en float8
+        rank = cast(func.ts_rank(vector, tsquery), Float(precision=53))
+        stmt = select(*TASK_COLUMNS, rank.label("rank")).where(vector.op("@@")(tsquery))
+    else:
+        # Cada palabra entre comillas: FTS5 no interpreta operadores y exige
+        # todas. El filtro por owner_id dentro del MATCH evita puntuar las
+        # coincidencias de otros usuarios (owner_id no cuenta en bm25)
+        fts = table("tasks_fts", column("rowid"))
+        rank = -func.bm25(literal_column("tasks_fts"), 10.0, 1.0, 0.0)
+        match = " ".join(f'"{term}"' for term in terms)
+        stmt = (
+            select(*TASK_COLUMNS, rank.label("rank"))
+            .join_from(Task, fts, fts.c.rowid == Task.id)
+            .where(literal_column("tasks_fts").op("MATCH")(
+                f'owner_id : "{owner_id}" AND {{title description}} : ({match})'
+            ))
+        )
+    
+    stmt = stmt.where(Task.owner_id == owner_id)
+    if after_id is not None:
+        stmt = stmt.where(tuple_(rank, Task.id) < tuple_(after_rank, after_id))
+    return db.execute(stmt.order_by(rank.desc(), Task.id.desc()).limit(limit)).all()
+
+
+def export_tasks_query(owner_id: int) -> Select:
+    """
+    Consulta con todas las tareas de un usuario para exportarlas.
+    Se ejecuta con yield_per para leerla por lotes con un cursor de servidor.
+    """
+    return (
+        select(*TASK_COLUMNS)
+        .where(Task.owner_id == owner_id)
+        .order_by(Task.id)
+    )
+
+
+def _count_completion_flips(db: Session, condition, is_completed: Optional[bool]) -> int:
+    """
+    Cambio en el número de tareas completadas si las tareas que cumplen
+    condition pasan a is_completed. Bloquea esas tareas hasta el commit
+    para que el recuento coincida con lo que modifica el UPDATE siguiente.
+    """
+    if is_completed:
+        flipping = Task.is_completed.is_not(true())
+    else:
+        flipping = Task.is_completed.is_(true())
+    count = len(db.scalars(select(Task.id).where(*condition, flipping).with_for_update()).all())
+    return count if is_completed else -count
 
 
 def create_task(db: Session, task: TaskCreate, owner_id: int) -> Task:
@@ -42,11 +273,101 @@ def create_task(db: Session, task: TaskCreate, owner_id: int) -> Task:
         owner_id=owner_id
     )
     db.add(db_task)
+    adjust_task_stats(db, owner_id, total=1, completed=int(task.is_completed))
     db.commit()
     db.refresh(db_task)
     return db_task
 
 
+def get_task_version(db: Session, task_id: int) -> Optional[Row]:
+    """
+    Obtiene solo el propietario y la versión de una tarea.
+    Basta para responder a peticiones condicionales sin leer la fila completa.
+    
+    Returns:
+        Fila con owner_id y version, None si no existe
+    """
+    return db.execute(
+        select(Task.owner_id, Task.version).where(Task.id == task_id)
+    ).first()
+
+
+def task_exists(db: Session, task_id: int) -> bool:
+    """
+    Indica si existe una tarea con ese ID, sea de quien sea.
+    Se usa para distinguir 404 de 403 cuando una escritura no afecta a ninguna fila.
+    """
+    return db.scalar(select(Task.id).where(Task.id == task_id)) is not None
+
+
+def update_owned_task(
+    db: Session,
+    task_id: int,
+    owner_id: int,
+    task: TaskUpdate,
+    expected_versions: Optional[set[int]] = None
+) -> Optional[Row]:
+    """
+    Actualiza una tarea del usuario con un único UPDATE ... RETURNING.
+    La propiedad se comprueba en el WHERE. Si el cambio incluye is_completed,
+    antes se bloquea la tarea para ajustar el contador de completadas.
+    
+    Args:
+        expected_versions: Si se indica, solo se actualiza si la versión de la
+            tarea es una de estas (If-Match, concurrencia optimista)
+    
+    Returns:
+        La fila actualizada, None si no existe, pertenece a otro usuario o
+        su versión no coincide
+    """
+    update_data = task.model_dump(exclude_unset=True)
+    condition = (Task.id == task_id, Task.owner_id == owner_id)
+    if expected_versions is not None:
+        condition += (Task.version.in_(expected_versions),)
+    
+    # Sin cambios basta con leer la tarea
+    if not update_data:
+        return db.execute(select(*TASK_COLUMNS).where(*condition)).first()
+    
+    # Si cambia el estado, se ajusta el contador de completadas
+    flips = 0
+    if "is_completed" in update_data:
+        flips = _count_completion_flips(db, condition, update_data["is_completed"])
+    
+    stmt = (
+        update(Task)
+        .where(*condition)
+        .values(**update_data, version=Task.version + 1)
+        .returning(*TASK_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).first()
+    if row is not None:
+        adjust_task_stats(db, owner_id, completed=flips)
+    db.commit()
+    return row
+
+
+def delete_owned_task(db: Session, task_id: int, owner_id: int) -> bool:
+    """
+    Elimina una tarea del usuario con un único DELETE ... RETURNING.
+    
+    Returns:
+        True si se eliminó, False si no existe o pertenece a otro usuario
+    """
+    stmt = (
+        delete(Task)
+        .where(Task.id == task_id, Task.owner_id == owner_id)
+        .returning(Task.is_completed)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = db.execute(stmt).first()
+    if deleted is not None:
+        adjust_task_stats(db, owner_id, total=-1, completed=-int(deleted.is_completed is True))
+    db.commit()
+    return deleted is not None
+
+
 def update_task(db: Session, task_id: int, task: TaskUpdate) -> Optional[Task]:
     """
     Actualiza una tarea existente.
@@ -58,8 +379,15 @@ def update_task(db: Session, task_id: int, task: TaskUpdate) -> Optional[Task]:
     
     update_data = task.model_dump(exclude_unset=True)
     
+    was_completed = db_task.is_completed is True
     for field, value in update_data.items():
         setattr(db_task, field, value)
+    db_task.version = Task.version + 1
+    adjust_task_stats(
+        db,
+        db_task.owner_id,
+        completed=int(db_task.is_completed is True) - int(was_completed)
+    )
     
     db.commit()
     db.refresh(db_task)
@@ -75,6 +403,146 @@ def delete_task(db: Session, task_id: int) -> bool:
     if not db_task:
         return False
     
+    owner_id = db_task.owner_id
     db.delete(db_task)
+    adjust_task_stats(db, owner_id, total=-1, completed=-int(db_task.is_completed is True))
     db.commit()
     return True
+
+
+def create_tasks_bulk(db: Session, tasks: list[TaskCreate], owner_id: int) -> list[Row]:
+    """
+    Crea varias tareas con un único INSERT ... RETURNING en una transacción.
+    Devuelve las filas creadas en el mismo orden que la entrada.
+    """
+    rows = [{**task.model_dump(), "owner_id": owner_id} for task in tasks]
+    stmt = insert(Task).returning(*TASK_COLUMNS, sort_by_parameter_order=True)
+    created = db.execute(stmt, rows).all()
+    adjust_task_stats(
+        db,
+        owner_id,
+        total=len(created),
+        completed=sum(1 for task in tasks if task.is_completed)
+    )
+    db.commit()
+    return created
+
+
+def update_tasks_bulk(
+    db: Session,
+    task_ids: list[int],
+    task: TaskUpdate,
+    owner_id: int
+) -> set[int]:
+    """
+    Aplica los mismos cambios a varias tareas con un único UPDATE.
+    La propiedad se comprueba en el WHERE, así que solo se modifican
+    las tareas del usuario.
+    
+    Returns:
+        Los IDs de las tareas modificadas
+    """
+    update_data = task.model_dump(exclude_unset=True)
+    
+    # Sin cambios no hay nada que escribir, solo se comprueba qué tareas existen
+    if not update_data:
+        return set(db.scalars(
+            select(Task.id).where(Task.id.in_(task_ids), Task.owner_id == owner_id)
+        ))
+    
+    condition = (Task.id.in_(task_ids), Task.owner_id == owner_id)
+    flips = 0
+    if "is_completed" in update_data:
+        flips = _count_completion_flips(db, condition, update_data["is_completed"])
+    
+    stmt = (
+        update(Task)
+        .where(*condition)
+        .values(**update_data, version=Task.version + 1)
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+    updated = set(db.scalars(stmt))
+    if updated:
+        adjust_task_stats(db, owner_id, completed=flips)
+    db.commit()
+    return updated
+
+
+def delete_tasks_bulk(db: Session, task_ids: list[int], owner_id: int) -> set[int]:
+    """
+    Elimina varias tareas del usuario con un único DELETE ... RETURNING.
+    
+    Returns:
+        Los IDs de las tareas eliminadas
+    """
+    stmt = (
+        delete(Task)
+        .where(Task.id.in_(task_ids), Task.owner_id == owner_id)
+        .returning(Task.id, Task.is_completed)
+        .execution_options(synchronize_session=False)
+    )
+    rows = db.execute(stmt).all()
+    if rows:
+        adjust_task_stats(
+            db,
+            owner_id,
+            total=-len(rows),
+            completed=-sum(1 for row in rows if row.is_completed is True)
+        )
+    db.commit()
+    return {row.id for row in rows}
+
+
+# Columnas que se rellenan al importar, en el orden usado por COPY
+IMPORT_COLUMNS = ("title", "description", "is_completed", "owner_id")
+
+# Caracteres que hay que escapar en el formato de texto de COPY
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value) -> str:
+    # Formato de texto de COPY: \N es NULL, así un texto vacío sigue siendo ''
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def import_tasks_batch(db: Session, rows: list[dict], owner_id: int) -> int:
+    """
+    Inserta un lote de tareas ya validadas.
+    
+    Con PostgreSQL y psycopg2 usa COPY, que es la forma más rápida de cargar
+    muchas filas. Con otros drivers hace un executemany de un INSERT.
+    
+    Returns:
+        Cantidad de tareas insertadas
+    """
+    if db.get_bind().dialect.driver == "psycopg2":
+        buffer = io.StringIO()
+        for row in rows:
+            values = (row["title"], row["description"], row["is_completed"], owner_id)
+            buffer.write("\t".join(map(_copy_value, values)) + "\n")
+        buffer.seek(0)
+        
+        cursor = db.connection().connection.cursor()
+        cursor.copy_expert(
+            f"COPY tasks ({', '.join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT text)",
+            buffer
+        )
+    else:
+        db.execute(
+            insert(Task.__table__),
+            [{**row, "owner_id": owner_id} for row in rows]
+        )
+    
+    adjust_task_stats(
+        db,
+        owner_id,
+        total=len(rows),
+        completed=sum(1 for row in rows if row["is_completed"])
+    )
+    db.commit()
+    return len(rows)
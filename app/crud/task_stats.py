@@ -0,0 +1,121 @@
+from typing import Optional
+from sqlalchemy import func, select, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.cache import task_cache
+from app.models.task import Task
+from app.models.task_stats import TaskStats
+from app.models.user import User
+
+
+def _insert(db: Session):
+    """
+    INSERT con soporte de ON CONFLICT para el motor de la sesión.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(TaskStats)
+    return sqlite.insert(TaskStats)
+
+
+def adjust_task_stats(db: Session, owner_id: int, total: int = 0, completed: int = 0) -> None:
+    """
+    Suma los incrementos a los contadores de un usuario (crea la fila si no
+    existe) y aumenta su versión.
+    
+    No hace commit: se llama desde las funciones CRUD de tareas antes de su
+    commit, así la tarea y el contador cambian en la misma transacción.
+    Se llama en toda escritura que modifique alguna tarea, aunque los
+    contadores no cambien, para que cambie el ETag de los listados.
+    El incremento es atómico en la base de datos, sin leer el valor antes.
+    
+    Args:
+        total: Cambio en el número de tareas
+        completed: Cambio en el número de tareas completadas
+    """
+    stmt = _insert(db).values(owner_id=owner_id, total=total, completed=completed, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TaskStats.owner_id],
+        set_={
+            "total": TaskStats.total + stmt.excluded.total,
+            "completed": TaskStats.completed + stmt.excluded.completed,
+            "version": TaskStats.version + 1,
+        }
+    )
+    db.execute(stmt)
+
+
+def get_task_stats(db: Session, owner_id: int) -> tuple[int, int, int]:
+    """
+    Obtiene los contadores de un usuario.
+    
+    Returns:
+        (total, completadas, versión); (0, 0, 0) si el usuario nunca ha tenido tareas
+    """
+    row = db.execute(
+        select(TaskStats.total, TaskStats.completed, TaskStats.version)
+        .where(TaskStats.owner_id == owner_id)
+    ).first()
+    return (row.total, row.completed, row.version) if row else (0, 0, 0)
+
+
+def rebuild_task_stats(db: Session, after_id: int = 0, batch_size: int = 1000) -> Optional[int]:
+    """
+    Recalcula con COUNT(*) los contadores de un lote de usuarios.
+    
+    Los contadores existentes del lote se bloquean antes de contar (FOR
+    UPDATE en PostgreSQL): una escritura concurrente espera al final del lote
+    o ya está incluida en el recuento, así que no se pierden incrementos.
+    
+    Args:
+        after_id: Se procesan los usuarios con id mayor (paginación por cursor)
+        batch_size: Usuarios por lote; cada lote es una transacción
+    
+    Returns:
+        El id del último usuario procesado, None si no quedan usuarios
+    """
+    user_ids = db.scalars(
+        select(User.id).where(User.id > after_id).order_by(User.id).limit(batch_size)
+    ).all()
+    if not user_ids:
+        return None
+    
+    db.execute(
+        select(TaskStats.owner_id).where(TaskStats.owner_id.in_(user_ids)).with_for_update()
+    ).all()
+    counts = {
+        row.owner_id: row
+        for row in db.execute(
+            select(
+                Task.owner_id,
+                func.count().label("total"),
+                func.count().filter(Task.is_completed.is_(true())).label("completed")
+            )
+            .where(Task.owner_id.in_(user_ids))
+            .group_by(Task.owner_id)
+        )
+    }
+    
+    stmt = _insert(db)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TaskStats.owner_id],
+        set_={
+            "total": stmt.excluded.total,
+            "completed": stmt.excluded.completed,
+            "version": TaskStats.version + 1,
+        }
+    )
+    db.execute(stmt, [
+        {
+            "owner_id": user_id,
+            "total": counts[user_id].total if user_id in counts else 0,
+            "completed": counts[user_id].completed if user_id in counts else 0,
+            "version": 1,
+        }
+        for user_id in user_ids
+    ])
+    db.commit()
+    # Los listados en caché incluyen X-Total-Count
+    for user_id in user_ids:
+        task_cache.invalidate(user_id)
+    return user_ids[-1]
@@ -1,9 +1,12 @@
 from typing import Optional
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 
+from app.models.task_stats import TaskStats
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_and_update_password
+from app.core.cache import task_cache, user_cache
 
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
@@ -39,12 +42,21 @@ def get_users(db: Session, skip: int = 0, limit: int = 100) -> list[User]:
     return db.query(User).offset(skip).limit(limit).all()
 
 
-def create_user(db: Session, user: UserCreate) -> User:
+def create_user(
+    db: Session,
+    user: UserCreate,
+    hashed_password: Optional[str] = None
+) -> User:
     """
     Crea un nuevo usuario en la base de datos.
     Encripta la contraseña antes de guardarla.
+    
+    Args:
+        hashed_password: Hash ya calculado (por ejemplo en el pool de bcrypt).
+            Si no se indica, se calcula aquí.
     """
-    hashed_password = get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = User(
         email=user.email,
         username=user.username,
@@ -75,6 +87,8 @@ def update_user(db: Session, user_id: int, user: UserUpdate) -> Optional[User]:
         setattr(db_user, field, value)
     
     db.commit()
+    # Invalidar los datos cacheados por get_current_user
+    user_cache.delete(str(user_id))
     db.refresh(db_user)
     return db_user
 
@@ -88,11 +102,27 @@ def delete_user(db: Session, user_id: int) -> bool:
     if not db_user:
         return False
     
+    # Sus tareas se eliminan en cascada; también sus contadores
+    db.execute(delete(TaskStats).where(TaskStats.owner_id == user_id))
     db.delete(db_user)
     db.commit()
+    user_cache.delete(str(user_id))
+    task_cache.invalidate(user_id)
     return True
 
 
+def set_password_hash(db: Session, user_id: int, hashed_password: str) -> None:
+    """
+    Reemplaza el hash de la contraseña de un usuario.
+    Se usa para actualizar hashes con un coste de bcrypt antiguo al iniciar sesión.
+    """
+    db.query(User).filter(User.id == user_id).update(
+        {"hashed_password": hashed_password},
+        synchronize_session=False
+    )
+    db.commit()
+
+
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """
     Autentica un usuario verificando email y contraseña.
@@ -101,6 +131,9 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     user = get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        set_password_hash(db, user.id, new_hash)
     return user
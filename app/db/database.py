@@ -1,38 +1,341 @@
+import itertools
+import os
+import threading
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 
+from app.core.cache import primary_pins
 from app.core.config import settings
+from app.core.instrumentation import instrument_engine
+from app.core.metrics import watch_engine
+
+# sqlalchemy.ext.asyncio solo hace falta en modo asíncrono
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+# Drivers asíncronos equivalentes a cada driver síncrono
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Cambia el driver de una URL síncrona por su equivalente asíncrono.
+    """
+    scheme, _, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+def get_async_database_url() -> str:
+    """
+    Devuelve la URL para el motor asíncrono.
+    Usa ASYNC_DATABASE_URL si está definida o la deriva de DATABASE_URL.
+    """
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return to_async_url(settings.DATABASE_URL)
+
+
+def _connect_args(url: str) -> dict:
+    """
+    SQLite no permite compartir conexiones entre hilos por defecto.
+    """
+    if url.startswith("sqlite"):
+        return {"check_same_thread": False}
+    return {}
+
+
+# Los motores se crean al arrancar el worker (lifespan de app.main) o en
+# el primer uso, no al importar el módulo: así importar la aplicación no
+# carga el driver de la base de datos. "from app.db.database import engine"
+# también los crea (ver __getattr__ al final del módulo).
+_LAZY_NAMES = {
+    "engine", "SessionLocal", "replica_engines", "ReplicaSessionLocals",
+    "async_engine", "AsyncSessionLocal", "async_replica_engines", "AsyncReplicaSessionLocals",
+}
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def init_engines() -> None:
+    """
+    Crea los motores y los fabricantes de sesiones si todavía no existen.
+    """
+    global engine, SessionLocal, replica_engines, ReplicaSessionLocals
+    global async_engine, AsyncSessionLocal, async_replica_engines, AsyncReplicaSessionLocals
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+
+        # Crear el motor de la base de datos
+        # Con SQL_ECHO=true se muestran las consultas SQL en la consola (útil para aprendizaje)
+        engine = create_engine(
+            settings.DATABASE_URL,
+            echo=settings.SQL_ECHO,
+            pool_pre_ping=True,
+            connect_args=_connect_args(settings.DATABASE_URL)
+        )
+        if settings.SQL_INSTRUMENTATION or settings.METRICS_ENABLED:
+            instrument_engine(engine)
+        watch_engine("sync", engine)
+
+        # Crear el fabricante de sesiones
+        # Una sesión es lo que usaremos para hacer operaciones en la base de datos
+        SessionLocal = sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            bind=engine
+        )
+
+        # Réplicas de solo lectura, con la misma configuración que el motor principal
+        replica_engines = [
+            create_engine(
+                url,
+                echo=settings.SQL_ECHO,
+                pool_pre_ping=True,
+                connect_args=_connect_args(url)
+            )
+            for url in settings.DATABASE_REPLICA_URLS
+        ]
+        ReplicaSessionLocals = [
+            sessionmaker(autocommit=False, autoflush=False, bind=replica)
+            for replica in replica_engines
+        ]
+
+        # Motor y sesiones asíncronas (solo se crean si DB_ASYNC está activado)
+        # expire_on_commit=False evita recargas implícitas fuera del event loop
+        async_engine = None
+        AsyncSessionLocal = None
+        async_replica_engines = []
+        AsyncReplicaSessionLocals = []
+
+        if settings.DB_ASYNC:
+            async_engine = create_async_engine(
+                get_async_database_url(),
+                echo=settings.SQL_ECHO,
+                pool_pre_ping=True
+            )
+            if settings.SQL_INSTRUMENTATION or settings.METRICS_ENABLED:
+                instrument_engine(async_engine.sync_engine)
+            watch_engine("async", async_engine.sync_engine)
+            AsyncSessionLocal = async_sessionmaker(
+                bind=async_engine,
+                autoflush=False,
+                expire_on_commit=False
+            )
+            async_replica_engines = [
+                create_async_engine(to_async_url(url), echo=settings.SQL_ECHO, pool_pre_ping=True)
+                for url in settings.DATABASE_REPLICA_URLS
+            ]
+            AsyncReplicaSessionLocals = [
+                async_sessionmaker(bind=replica, autoflush=False, expire_on_commit=False)
+                for replica in async_replica_engines
+            ]
+
+        for number, replica in enumerate(replica_engines):
+            if settings.SQL_INSTRUMENTATION or settings.METRICS_ENABLED:
+                instrument_engine(replica)
+            watch_engine(f"replica{number}", replica)
+        for number, replica in enumerate(async_replica_engines):
+            if settings.SQL_INSTRUMENTATION or settings.METRICS_ENABLED:
+                instrument_engine(replica.sync_engine)
+            watch_engine(f"async_replica{number}", replica.sync_engine)
+
+        _initialized = True
+
+
+def _dispose_pools_after_fork():
+    """
+    Un proceso hijo creado con fork hereda las conexiones abiertas del
+    padre; compartir el socket corrompe ambas. El hijo descarta los pools
+    heredados (sin cerrarlos, siguen siendo del padre) y abre los suyos.
+    """
+    if not _initialized:
+        return
+    for sync_engine in [engine, *replica_engines]:
+        sync_engine.dispose(close=False)
+    for engine_async in [async_engine, *async_replica_engines]:
+        if engine_async is not None:
+            engine_async.sync_engine.dispose(close=False)
+
+
+# uvicorn crea los workers con spawn, pero gunicorn --preload o
+# ProcessPoolExecutor en Linux usan fork
+os.register_at_fork(after_in_child=_dispose_pools_after_fork)
+
+
+async def dispose_engines():
+    """
+    Cierra las conexiones de todos los pools. Se llama al parar el worker.
+    """
+    if not _initialized:
+        return
+    for sync_engine in [engine, *replica_engines]:
+        sync_engine.dispose()
+    for engine_async in [async_engine, *async_replica_engines]:
+        if engine_async is not None:
+            await engine_async.dispose()
+
+
+def _warmup_count(pool, connections: int) -> int:
+    # Las conexiones por encima del tamaño del pool se cerrarían al
+    # devolverlas, y NullPool (aiosqlite) no guarda ninguna
+    size = getattr(pool, "size", None)
+    return min(connections, size()) if size else 0
+
+
+def _open_connections(sync_engine, connections: int) -> None:
+    opened = [sync_engine.connect() for _ in range(_warmup_count(sync_engine.pool, connections))]
+    for connection in opened:
+        connection.close()
+
+
+async def warm_up_pools(connections: int) -> None:
+    """
+    Abre conexiones en los pools de los motores que atienden peticiones y
+    las devuelve al pool, para que las primeras peticiones no esperen a
+    conectarse.
+
+    Args:
+        connections: Conexiones por motor, como mucho el tamaño del pool
+    """
+    init_engines()
+    if not settings.DB_ASYNC:
+        for sync_engine in [engine, *replica_engines]:
+            await run_in_threadpool(_open_connections, sync_engine, connections)
+        return
+    for engine_async in [async_engine, *async_replica_engines]:
+        opened = [
+            await engine_async.connect()
+            for _ in range(_warmup_count(engine_async.sync_engine.pool, connections))
+        ]
+        for connection in opened:
+            await connection.close()
 
-# Crear el motor de la base de datos
-# echo=True muestra las consultas SQL en la consola (útil para aprendizaje)
-engine = create_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True
-)
-
-# Crear el fabricante de sesiones
-# Una sesión es lo que usaremos para hacer operaciones en la base de datos
-SessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine
-)
 
 # Crear la clase base para los modelos
 # Todos los modelos heredarán de esta clase
 Base = declarative_base()
 
 
-# Función de dependencia para obtener una sesión de base de datos
-def get_db():
+def get_sync_db():
     """
     Crea una sesión de base de datos y la cierra automáticamente al terminar.
     Se usa como dependencia en los endpoints de FastAPI.
     """
+    init_engines()
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Igual que get_sync_db pero con una AsyncSession.
+    No ocupa un hilo del threadpool mientras espera a la base de datos.
+    """
+    init_engines()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Función de dependencia para obtener una sesión de base de datos
+# El modo se elige con DB_ASYNC en la configuración
+get_db = get_async_db if settings.DB_ASYNC else get_sync_db
+
+# Turno de reparto entre réplicas
+_replica_turn = itertools.count()
+
+
+def open_session(replica: bool = False):
+    """
+    Abre una sesión (Session o AsyncSession según DB_ASYNC).
+    
+    Args:
+        replica: Usar la siguiente réplica, por turnos. Sin réplicas
+            configuradas se usa la principal.
+    """
+    init_engines()
+    factories = AsyncReplicaSessionLocals if settings.DB_ASYNC else ReplicaSessionLocals
+    if not replica or not factories:
+        return AsyncSessionLocal() if settings.DB_ASYNC else SessionLocal()
+    return factories[next(_replica_turn) % len(factories)]()
+
+
+async def close_session(db) -> None:
+    """
+    Cierra una sesión abierta con open_session.
+    """
+    if settings.DB_ASYNC and isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        db.close()
+
+
+async def reads_from_primary(user_id: int) -> bool:
+    """
+    Indica si el usuario escribió hace menos de READ_YOUR_WRITES_SECONDS:
+    sus lecturas deben ir a la principal para ver sus propios cambios.
+    """
+    return await primary_pins.aget(str(user_id)) is not None
+
+
+async def pin_to_primary(user_id: int) -> None:
+    """
+    Envía las lecturas del usuario a la principal durante
+    READ_YOUR_WRITES_SECONDS. Debe llamarse al confirmar una escritura.
+    Con varios workers hace falta CACHE_BACKEND=redis para que todos lo vean.
+    """
+    await primary_pins.aset(str(user_id), 1)
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Ejecuta una función CRUD síncrona con la sesión recibida.
+
+    Con una AsyncSession se usa run_sync: la función corre en el event loop
+    y cada consulta se espera de forma asíncrona (sin hilos). Con una Session
+    normal se ejecuta en el threadpool, como hacía FastAPI con los endpoints def.
+
+    Args:
+        db: Session o AsyncSession devuelta por get_db
+        fn: Función CRUD cuyo primer argumento es la sesión
+    """
+    if settings.DB_ASYNC and isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(_run_and_release, fn, db, *args, **kwargs)
+
+
+def _run_and_release(fn, db, *args, **kwargs):
+    """
+    Ejecuta fn y devuelve la conexión al pool en el mismo hilo.
+
+    Si un hilo se quedara con la conexión mientras la petición espera otro
+    hilo libre, el pool y el threadpool podrían bloquearse mutuamente.
+    Los objetos devueltos quedan desligados de la sesión con sus datos cargados.
+    """
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+def __getattr__(name: str):
+    """
+    Crea los motores al acceder por primera vez a engine, SessionLocal, etc.
+    """
+    if name in _LAZY_NAMES:
+        init_engines()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
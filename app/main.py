@@ -1,20 +1,69 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+# Inicio de la importación de la aplicación, para app_startup_seconds
+_import_started = time.perf_counter()
+
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 
+from app.core.admission import AdmissionControlMiddleware
+from app.core.cache import task_cache, user_cache
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.instrumentation import QueryStatsMiddleware
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, app_startup_seconds, registry
+from app.core.ratelimit import RateLimitExceeded
+from app.core.recycle import MaxRequestsMiddleware
+from app.core.security import (
+    PasswordHasherBusy, load_auth_backends, shutdown_hash_executor, token_cache
+)
+from app.db.database import dispose_engines, init_engines, warm_up_pools
+from app.api.dependencies.ratelimit import limit_task_requests
 from app.api.endpoints.auth import router as auth_router
 from app.api.endpoints.task import router as tasks_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Al arrancar el worker crea los motores de la base de datos y, con
+    STARTUP_WARMUP_CONNECTIONS, abre conexiones y carga las librerías de
+    autenticación antes de aceptar peticiones.
+
+    Al parar el worker (SIGTERM, reinicio tras SERVER_MAX_REQUESTS),
+    una vez terminadas las peticiones en curso, cierra las conexiones
+    a la base de datos y el pool de bcrypt.
+    """
+    init_engines()
+    if settings.STARTUP_WARMUP_CONNECTIONS:
+        await warm_up_pools(settings.STARTUP_WARMUP_CONNECTIONS)
+        load_auth_backends()
+    app_startup_seconds.set(value=time.perf_counter() - _import_started)
+    yield
+    await dispose_engines()
+    shutdown_hash_executor()
+
+
 # Crear la aplicación FastAPI
+# ORJSONResponse serializa las respuestas con orjson, más rápido que json
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API para gestión de tareas con autenticación JWT",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Limitar las peticiones simultáneas por clase de ruta y rechazar con 503
+# las que no caben. Se añade antes que CORS para quedar por dentro: las
+# respuestas 503 también llevan las cabeceras CORS
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 # Configurar CORS (Cross-Origin Resource Sharing)
 # Permite que el frontend en otros dominios pueda consumir la API
 app.add_middleware(
@@ -23,8 +72,34 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Permite todos los métodos HTTP
     allow_headers=["*"],  # Permite todos los headers
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "ETag", "Server-Timing"],  # Cabeceras legibles desde el navegador
 )
 
+# Medir las consultas SQL de cada petición (Server-Timing, log de N+1)
+if settings.SQL_INSTRUMENTATION:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Comprimir las respuestas según Accept-Encoding (dentro de las métricas,
+# para que la latencia medida incluya la compresión)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Latencia, peticiones en curso y códigos de estado por ruta (GET /metrics)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Reiniciar el worker tras SERVER_MAX_REQUESTS peticiones (ver app.commands.serve)
+if settings.SERVER_MAX_REQUESTS:
+    app.add_middleware(
+        MaxRequestsMiddleware,
+        max_requests=settings.SERVER_MAX_REQUESTS,
+        jitter=(
+            settings.SERVER_MAX_REQUESTS // 10
+            if settings.SERVER_MAX_REQUESTS_JITTER is None
+            else settings.SERVER_MAX_REQUESTS_JITTER
+        )
+    )
+
 # Incluir routers de la API
 app.include_router(
     auth_router,
@@ -35,10 +110,30 @@ app.include_router(
 app.include_router(
     tasks_router,
     prefix="/api/tasks",
-    tags=["Tareas"]
+    tags=["Tareas"],
+    dependencies=[Depends(limit_task_requests)]
 )
 
 
+# Responder 503 cuando el pool de bcrypt está saturado
+@app.exception_handler(PasswordHasherBusy)
+def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servicio de autenticación saturado, inténtalo de nuevo"},
+        headers={"Retry-After": "1"}
+    )
+
+
+# Responder 429 cuando un cliente supera su límite de peticiones
+@app.exception_handler(RateLimitExceeded)
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Demasiadas peticiones, inténtalo más tarde"},
+        headers={"Retry-After": exc.retry_after_header}
+    )
+
 
 # Ruta raíz de bienvenida
 @app.get("/", tags=["Root"])
@@ -65,3 +160,28 @@ def health_check():
         "status": "ok",
         "environment": settings.ENVIRONMENT
     }
+
+
+# Estadísticas de las cachés del proceso
+@app.get("/health/cache", tags=["Health"])
+def cache_stats():
+    """
+    Aciertos, fallos, entradas y memoria usada por cada caché.
+    Con el backend en memoria los valores son de este worker.
+    """
+    return {
+        "token": token_cache.stats(),
+        "user": user_cache.stats(),
+        "tasks": task_cache.stats(),
+    }
+
+
+# Métricas para Prometheus
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    """
+    Métricas de este worker en el formato de texto de Prometheus.
+    """
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return Response(registry.expose(), media_type=CONTENT_TYPE)
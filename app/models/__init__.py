@@ -1,2 +1,3 @@
 from app.models.user import User
 from app.models.task import Task
+from app.models.task_stats import TaskStats
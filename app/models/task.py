@@ -1,9 +1,21 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import DDL, Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Index, event
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
+from sqlalchemy.sql.functions import FunctionElement
 
 from app.db.database import Base
 
+# En SQLite CURRENT_TIMESTAMP guarda las fechas sin microsegundos; las fechas
+# enviadas desde Python usan el mismo formato para que se puedan comparar
+# (filtros por fecha y cursores ordenados por created_at)
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite"
+)
 
 class Task(Base):
     """
@@ -12,16 +24,111 @@ class Task(Base):
     """
     __tablename__ = "tasks"
     
+    # Índices compuestos para listar, filtrar y ordenar las tareas de un
+    # usuario; todos terminan en id para poder paginar por cursor
+    __table_args__ = (
+        Index("ix_tasks_owner_id_id", "owner_id", "id"),
+        Index("ix_tasks_owner_created", "owner_id", "created_at", "id"),
+        Index("ix_tasks_owner_updated", "owner_id", "updated_at", "id"),
+        Index("ix_tasks_owner_title", "owner_id", "title", "id"),
+        # Índice parcial con solo las tareas pendientes
+        Index(
+            "ix_tasks_owner_open",
+            "owner_id",
+            "id",
+            postgresql_where=text("is_completed = false"),
+            sqlite_where=text("is_completed = 0")
+        ),
+    )
+    
     # Columnas de la tabla
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     description = Column(Text, nullable=True)
     is_completed = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, onupdate=func.now())
+    # Aumenta con cada modificación; de ella sale el ETag de la tarea
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Llave foránea que conecta con el usuario
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Relación con usuario
     owner = relationship("User", back_populates="tasks")
+
+
+# Búsqueda de texto completo sobre título y descripción.
+# En PostgreSQL es una columna tsvector generada con un índice GIN (el título
+# pesa más que la descripción). En SQLite es una tabla FTS5 que apunta a
+# tasks y se mantiene sincronizada con triggers; incluye owner_id para que
+# la búsqueda se limite a las tareas del usuario dentro del propio índice
+# en lugar de puntuar las coincidencias de todos los usuarios. Ninguno de los dos objetos
+# forma parte del modelo: se crean con DDL propio de cada motor.
+TASK_SEARCH_CONFIG = "spanish"
+
+TASK_SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE tasks ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(description, '')), 'B')"
+        ") STORED",
+        "CREATE INDEX ix_tasks_search_vector ON tasks USING gin (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+        "title, description, owner_id, content='tasks', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+        "INSERT INTO tasks_fts(rowid, title, description, owner_id) "
+        "VALUES (new.id, new.title, new.description, new.owner_id); END",
+        "CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.owner_id); END",
+        "CREATE TRIGGER tasks_fts_update AFTER UPDATE OF title, description, owner_id ON tasks BEGIN "
+        "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, owner_id) "
+        "VALUES ('delete', old.id, old.title, old.description, old.owner_id); "
+        "INSERT INTO tasks_fts(rowid, title, description, owner_id) "
+        "VALUES (new.id, new.title, new.description, new.owner_id); END",
+    ],
+}
+
+# Nombres que Alembic no debe comparar con el modelo al autogenerar (incluye
+# el índice del prefijo del título, más abajo)
+TASK_SEARCH_OBJECTS = {"search_vector", "ix_tasks_search_vector", "tasks_fts", "ix_tasks_owner_title_c"}
+
+for dialect, statements in TASK_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect=dialect))
+
+
+class byte_order(FunctionElement):
+    """
+    Un texto comparado por código de carácter, para filtrar por prefijo
+    como un rango que use un índice. En SQLite es la colación por defecto
+    (BINARY); en PostgreSQL se añade COLLATE "C", que es la del índice
+    ix_tasks_owner_title_c (con la colación del idioma un rango no
+    equivale a un prefijo).
+    """
+    type = String()
+    name = "byte_order"
+    inherit_cache = True
+
+
+@compiles(byte_order)
+def _compile_byte_order(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(byte_order, "postgresql")
+def _compile_byte_order_postgresql(element, compiler, **kw):
+    return f'{compiler.process(element.clauses, **kw)} COLLATE "C"'
+
+
+# Filtro por prefijo del título en PostgreSQL. En SQLite basta ix_tasks_owner_title
+TASK_TITLE_PREFIX_INDEX = (
+    'CREATE INDEX ix_tasks_owner_title_c ON tasks (owner_id, title COLLATE "C", id)'
+)
+event.listen(
+    Task.__table__, "after_create", DDL(TASK_TITLE_PREFIX_INDEX).execute_if(dialect="postgresql")
+)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, ForeignKey, Integer
+
+from app.db.database import Base
+
+
+class TaskStats(Base):
+    """
+    Modelo de contadores de tareas por usuario.
+    Representa la tabla 'task_stats' en la base de datos.
+    
+    Las funciones CRUD de tareas actualizan los contadores en la misma
+    transacción que cada escritura, así que contar no requiere COUNT(*).
+    Las tareas pendientes son total - completed. version aumenta con cada
+    escritura en las tareas del usuario y sirve de ETag para sus listados.
+    """
+    __tablename__ = "task_stats"
+    
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
@@ -1,3 +1,17 @@
-from app.schemas.user import User, UserCreate, UserUpdate, UserInDB
-from app.schemas.task import Task, TaskCreate, TaskUpdate, TaskInDB
+from app.schemas.user import User, UserCreate, UserUpdate, UserInDB, CurrentUser
+from app.schemas.task import (
+    Task,
+    TaskCreate,
+    TaskUpdate,
+    TaskFilters,
+    TaskStats,
+    TaskInDB,
+    TaskBulkCreate,
+    TaskBulkUpdate,
+    TaskBulkDelete,
+    TaskBulkItemResult,
+    TaskBulkResult,
+    TaskImportError,
+    TaskImportResult
+)
 from app.schemas.token import Token, TokenData
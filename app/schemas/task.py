@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
+
 
 class TaskBase(BaseModel):
     """
@@ -29,6 +31,28 @@ class TaskUpdate(BaseModel):
     is_completed: Optional[bool] = None
 
 
+class TaskFilters(BaseModel):
+    """
+    Filtros del listado de tareas (parámetros de consulta).
+    Las fechas "from" son inclusivas y las "to" exclusivas.
+    """
+    is_completed: Optional[bool] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    updated_from: Optional[datetime] = None
+    updated_to: Optional[datetime] = None
+    title_prefix: Optional[str] = Field(None, min_length=1, max_length=200)
+
+
+class TaskStats(BaseModel):
+    """
+    Contadores de tareas del usuario.
+    """
+    total: int
+    completed: int
+    open: int
+
+
 class TaskInDB(TaskBase):
     """
     Propiedades almacenadas en la base de datos.
@@ -47,3 +71,63 @@ class Task(TaskInDB):
     Propiedades para devolver al cliente.
     """
     pass
+
+
+class TaskBulkCreate(BaseModel):
+    """
+    Tareas a crear en una sola operación.
+    """
+    items: List[TaskCreate] = Field(..., min_length=1, max_length=settings.TASK_BULK_MAX_ITEMS)
+
+
+class TaskBulkUpdate(BaseModel):
+    """
+    Cambios que se aplican por igual a varias tareas
+    (por ejemplo, marcar N tareas como completadas).
+    """
+    ids: List[int] = Field(..., min_length=1, max_length=settings.TASK_BULK_MAX_ITEMS)
+    changes: TaskUpdate
+
+
+class TaskBulkDelete(BaseModel):
+    """
+    IDs de las tareas a eliminar en una sola operación.
+    """
+    ids: List[int] = Field(..., min_length=1, max_length=settings.TASK_BULK_MAX_ITEMS)
+
+
+class TaskBulkItemResult(BaseModel):
+    """
+    Resultado de una tarea dentro de una operación masiva.
+    not_found se usa tanto si no existe como si pertenece a otro usuario.
+    """
+    id: int
+    status: Literal["updated", "deleted", "not_found"]
+
+
+class TaskBulkResult(BaseModel):
+    """
+    Resultado de una actualización o eliminación masiva.
+    """
+    processed: int
+    results: List[TaskBulkItemResult]
+
+
+class TaskImportError(BaseModel):
+    """
+    Error de una fila durante la importación.
+    """
+    line: int
+    error: str
+
+
+class TaskImportResult(BaseModel):
+    """
+    Resumen de una importación de tareas.
+    Solo se detallan los primeros TASK_IMPORT_MAX_ERRORS errores.
+    """
+    received: int
+    imported: int
+    failed: int
+    errors: List[TaskImportError]
+    errors_truncated: bool
@@ -27,6 +27,7 @@ class UserUpdate(BaseModel):
     email: Optional[EmailStr] = None
     username: Optional[str] = Field(None, min_length=3, max_length=50)
     password: Optional[str] = Field(None, min_length=8)
+    is_active: Optional[bool] = None
 
 
 class UserInDB(UserBase):
@@ -51,6 +52,16 @@ class User(UserInDB):
     pass
 
 
+class CurrentUser(BaseModel):
+    """
+    Datos mínimos del usuario autenticado que usan las rutas protegidas.
+    Se guardan en caché para no consultar la tabla users en cada petición.
+    """
+    id: int
+    is_active: bool
+    is_superuser: bool
+
+
 class Token(BaseModel):
     """
     Esquema para el token de acceso.
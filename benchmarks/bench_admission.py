@@ -0,0 +1,125 @@
+"""
+Simula una base de datos lenta (cada sentencia tarda --query-delay) con
+muchos clientes leyendo tareas y algunos haciendo login, con y sin
+control de admisión (ADMISSION_CONTROL_ENABLED).
+
+Los clientes abandonan una petición que tarda más de --client-timeout
+(se cuenta como timeout) y esperan Retry-After tras un 503. Se informa de
+las respuestas útiles por segundo (200 dentro del timeout), los 503, los
+timeouts y la latencia de las respuestas correctas.
+
+Uso:
+    python benchmarks/bench_admission.py --clients 300 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from common import Timer, configure, run_isolated
+
+
+def run_mode(args) -> dict:
+    configure(
+        ADMISSION_CONTROL_ENABLED=args.mode == "on",
+        # Cada petición llega a la base de datos
+        TASK_CACHE_TTL_SECONDS=0,
+        USER_CACHE_TTL_SECONDS=0,
+        SQL_INSTRUMENTATION=False,
+        BCRYPT_ROUNDS=4,
+    )
+
+    import httpx
+    import logging
+    from sqlalchemy import event
+    from common import create_schema, create_user_with_tasks, summarize, token_for
+    from app.core.admission import admission_shed_total
+    from app.db.database import engine
+    from app.main import app
+
+    create_schema()
+    # Todas las consultas son lentas a propósito
+    logging.getLogger("app.sql").setLevel(logging.ERROR)
+    user_id = create_user_with_tasks("bench@example.com", n_tasks=20)
+    headers = {"Authorization": f"Bearer {token_for(user_id)}"}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def slow_database(*_):
+        time.sleep(args.query_delay)
+
+    results = {"tasks": {"ok": [], "503": 0, "timeout": 0}, "login": {"ok": 0, "503": 0, "timeout": 0}}
+
+    async def client_loop(client, kind: str, stop: float):
+        while time.perf_counter() < stop:
+            with Timer() as t:
+                if kind == "tasks":
+                    response = await client.get("/api/tasks/", headers=headers)
+                else:
+                    response = await client.post("/api/auth/login", data={
+                        "username": "bench@example.com", "password": "benchmark-pass"
+                    })
+            outcome = results[kind]
+            if t.elapsed > args.client_timeout:
+                outcome["timeout"] += 1
+            elif response.status_code == 503:
+                outcome["503"] += 1
+                await asyncio.sleep(int(response.headers.get("Retry-After", 1)))
+            elif kind == "tasks":
+                outcome["ok"].append(t.elapsed)
+            else:
+                outcome["ok"] += 1
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            stop = time.perf_counter() + args.duration
+            await asyncio.gather(
+                *(client_loop(client, "tasks", stop) for _ in range(args.clients)),
+                *(client_loop(client, "login", stop) for _ in range(args.login_clients)),
+            )
+
+    with Timer() as total:
+        asyncio.run(main())
+
+    tasks = results["tasks"]
+    return {
+        "mode": args.mode,
+        "goodput": len(tasks["ok"]) / total.elapsed,
+        "tasks_503": tasks["503"],
+        "tasks_timeout": tasks["timeout"],
+        "login": results["login"],
+        "shed": {"/".join(labels): value for labels, value in admission_shed_total._values.items()},
+        **summarize(tasks["ok"] or [0.0]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--login-clients", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--query-delay", type=float, default=0.02)
+    parser.add_argument("--client-timeout", type=float, default=2.0)
+    parser.add_argument("--mode", choices=["on", "off"])
+    args = parser.parse_args()
+
+    common = ["--clients", str(args.clients), "--login-clients", str(args.login_clients),
+              "--duration", str(args.duration), "--query-delay", str(args.query_delay),
+              "--client-timeout", str(args.client_timeout)]
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    for mode in ("off", "on"):
+        result = run_isolated(__file__, "--mode", mode, *common)
+        login = result["login"]
+        print(f"admisión {mode:>3}: {result['goodput']:7.1f} lecturas útiles/s  "
+              f"p50={result['p50_ms']:.0f}ms p99={result['p99_ms']:.0f}ms  "
+              f"503={result['tasks_503']} timeouts={result['tasks_timeout']}  "
+              f"login ok={login['ok']} 503={login['503']} timeouts={login['timeout']}")
+        if result["shed"]:
+            print(f"              rechazos: {result['shed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compara peticiones por segundo con alta concurrencia entre el modo
+síncrono (threadpool) y el modo asíncrono (DB_ASYNC=true).
+
+Cada modo se ejecuta en un subproceso porque la configuración se lee al
+importar la aplicación.
+
+Uso:
+    python benchmarks/bench_async_db.py --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import json
+
+from common import Timer, configure, run_isolated
+
+
+def run_mode(args) -> dict:
+    configure(DB_ASYNC=args.mode == "async")
+
+    import httpx
+    from common import create_schema, create_user_with_tasks, summarize, token_for
+    from app.main import app
+
+    create_schema()
+    if args.mode == "async":
+        from app.db.database import async_engine
+        async_engine.echo = False
+
+    user_id = create_user_with_tasks("bench@example.com", n_tasks=50)
+    headers = {"Authorization": f"Bearer {token_for(user_id)}"}
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            semaphore = asyncio.Semaphore(args.concurrency)
+            latencies = []
+
+            async def one():
+                async with semaphore:
+                    with Timer() as t:
+                        response = await client.get("/api/tasks/", headers=headers)
+                    response.raise_for_status()
+                    latencies.append(t.elapsed)
+
+            # Calentamiento
+            await asyncio.gather(*(one() for _ in range(50)))
+            latencies.clear()
+
+            with Timer() as total:
+                await asyncio.gather(*(one() for _ in range(args.requests)))
+            return total.elapsed, latencies
+
+    elapsed, latencies = asyncio.run(main())
+    return {
+        "mode": args.mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "rps": args.requests / elapsed,
+        **summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--mode", choices=["sync", "async"])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = [
+        run_isolated(__file__, "--mode", mode,
+                     "--requests", str(args.requests), "--concurrency", str(args.concurrency))
+        for mode in ("sync", "async")
+    ]
+
+    for result in results:
+        print(f"{result['mode']:>5}: {result['rps']:8.1f} req/s  "
+              f"p50={result['p50_ms']:.1f}ms  p99={result['p99_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Crear, completar y eliminar N tareas: un bucle de peticiones individuales
+frente a los endpoints /api/tasks/bulk.
+
+Uso:
+    python benchmarks/bench_bulk.py --items 500
+"""
+import argparse
+import asyncio
+
+from common import Timer, configure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+
+    configure(TASK_BULK_MAX_ITEMS=max(args.items, 500))
+
+    import httpx
+    from common import create_schema, create_user_with_tasks, token_for
+    from app.main import app
+
+    create_schema()
+    user_id = create_user_with_tasks("bench@example.com", n_tasks=0)
+    headers = {"Authorization": f"Bearer {token_for(user_id)}"}
+    items = [{"title": f"Tarea {i}", "description": "x" * 80} for i in range(args.items)]
+
+    async def per_item(client) -> dict:
+        timings = {}
+        with Timer() as t:
+            ids = []
+            for item in items:
+                response = await client.post("/api/tasks/", json=item, headers=headers)
+                ids.append(response.json()["id"])
+        timings["create"] = t.elapsed
+        with Timer() as t:
+            for task_id in ids:
+                await client.put(f"/api/tasks/{task_id}", json={"is_completed": True}, headers=headers)
+        timings["update"] = t.elapsed
+        with Timer() as t:
+            for task_id in ids:
+                await client.delete(f"/api/tasks/{task_id}", headers=headers)
+        timings["delete"] = t.elapsed
+        return timings
+
+    async def bulk(client) -> dict:
+        timings = {}
+        with Timer() as t:
+            response = await client.post("/api/tasks/bulk", json={"items": items}, headers=headers)
+            ids = [task["id"] for task in response.json()]
+        timings["create"] = t.elapsed
+        with Timer() as t:
+            await client.patch(
+                "/api/tasks/bulk",
+                json={"ids": ids, "changes": {"is_completed": True}},
+                headers=headers
+            )
+        timings["update"] = t.elapsed
+        with Timer() as t:
+            await client.request("DELETE", "/api/tasks/bulk", json={"ids": ids}, headers=headers)
+        timings["delete"] = t.elapsed
+        return timings
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await per_item(client), await bulk(client)
+
+    loop_timings, bulk_timings = asyncio.run(run())
+    print(f"{args.items} tareas   {'bucle':>10} {'bulk':>10}")
+    for op in ("create", "update", "delete"):
+        print(f"{op:>12}   {loop_timings[op] * 1000:8.1f}ms {bulk_timings[op] * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Compara gzip, brotli y zstd con distintos niveles sobre respuestas reales
+de la API: el listado de tareas (una respuesta de un bloque) y la
+exportación NDJSON (en streaming, comprimida bloque a bloque como hace
+CompressionMiddleware). Para cada combinación se mide el tamaño
+comprimido y el tiempo de CPU por respuesta.
+
+Después mide el listado de extremo a extremo con la compresión de la
+configuración por defecto frente a COMPRESSION_ENABLED=false.
+
+Uso:
+    python benchmarks/bench_compression.py --tasks 100 --export-tasks 5000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from common import Timer, configure, run_isolated, summarize
+
+LEVELS = {
+    "gzip": (1, 6, 9),
+    "br": (1, 4, 6, 11),
+    "zstd": (1, 3, 9),
+}
+
+
+def _setup(args, **overrides):
+    configure(TASK_CACHE_TTL_SECONDS=0, TASK_EXPORT_BATCH_SIZE=500, **overrides)
+    from common import create_schema, create_user_with_tasks, token_for
+    create_schema()
+    list_user = create_user_with_tasks("lista@example.com", n_tasks=args.tasks)
+    export_user = create_user_with_tasks("export@example.com", n_tasks=args.export_tasks)
+    return token_for(list_user), token_for(export_user)
+
+
+def _export_chunks(token: str) -> list[bytes]:
+    # Bloques tal como los envía la aplicación, sin pasar por httpx (que
+    # junta todo el cuerpo)
+    from app.main import app
+
+    messages = []
+    done = asyncio.Event()
+    received = False
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/api/tasks/export",
+        "raw_path": b"/api/tasks/export", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 40000), "server": ("bench", 80),
+    }
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    asyncio.run(app(scope, receive, send))
+    return [m["body"] for m in messages if m["type"] == "http.response.body" and m["body"]]
+
+
+def _measure(chunks: list[bytes], encoding: str, level: int, repeat: int) -> tuple[int, float]:
+    from app.core.compression import Compressor
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        compressor = Compressor(encoding, level)
+        size = sum(len(compressor.compress(chunk)) for chunk in chunks[:-1])
+        size += len(compressor.finish(chunks[-1]))
+        best = min(best, time.process_time() - start)
+    return size, best
+
+
+def run_codecs(args) -> None:
+    list_token, export_token = _setup(args)
+    import httpx
+    from app.main import app
+
+    async def fetch_list() -> bytes:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get(
+                f"/api/tasks/?limit={args.tasks}",
+                headers={"Authorization": f"Bearer {list_token}", "Accept-Encoding": "identity"}
+            )
+            return response.content
+
+    payloads = {
+        f"listado ({args.tasks} tareas)": [asyncio.run(fetch_list())],
+        f"exportación ({args.export_tasks} tareas)": _export_chunks(export_token),
+    }
+    for name, chunks in payloads.items():
+        original = sum(map(len, chunks))
+        print(f"{name}: {original} bytes en {len(chunks)} bloques")
+        for encoding, levels in LEVELS.items():
+            for level in levels:
+                size, seconds = _measure(chunks, encoding, level, args.repeat)
+                print(f"  {encoding:>4} {level:>2}: {size:>8} bytes  ratio {original / size:5.1f}x  "
+                      f"{seconds * 1e6:9.0f} µs CPU  ({original / seconds / 1e6:6.1f} MB/s)")
+
+
+def run_end_to_end(args) -> dict:
+    list_token, _ = _setup(args, COMPRESSION_ENABLED=args.mode == "on")
+    import httpx
+    from app.main import app
+
+    headers = {"Authorization": f"Bearer {list_token}", "Accept-Encoding": "gzip, br, zstd"}
+
+    async def main():
+        latencies, downloaded = [], 0
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for _ in range(args.requests):
+                with Timer() as t:
+                    response = await client.get(f"/api/tasks/?limit={args.tasks}", headers=headers)
+                latencies.append(t.elapsed)
+                downloaded += response.num_bytes_downloaded
+        return latencies, downloaded, response.headers.get("content-encoding", "identity")
+
+    latencies, downloaded, encoding = asyncio.run(main())
+    return {
+        "mode": args.mode,
+        "encoding": encoding,
+        "bytes_per_response": downloaded / args.requests,
+        **summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--export-tasks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones por nivel (se toma la mejor)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--mode", choices=["on", "off"])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_end_to_end(args)))
+        return
+
+    isolated_args = ["--tasks", str(args.tasks), "--export-tasks", "0", "--requests", str(args.requests)]
+    run_codecs(args)
+    print(f"\nlistado de extremo a extremo ({args.requests} peticiones):")
+    for mode in ("off", "on"):
+        result = run_isolated(__file__, "--mode", mode, *isolated_args)
+        print(f"  compresión {mode:>3} ({result['encoding']}): {result['bytes_per_response']:8.0f} bytes/respuesta  "
+              f"p50={result['p50_ms']:.2f}ms p99={result['p99_ms']:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
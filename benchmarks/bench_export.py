@@ -0,0 +1,127 @@
+"""
+Exporta N tareas (1M por defecto) con GET /api/tasks/export y comprueba
+que el pico de memoria (RSS) no crece con el número de filas.
+
+La carga de datos se hace en un subproceso aparte para que no cuente en
+el pico de memoria de la exportación.
+
+Uso:
+    python benchmarks/bench_export.py --rows 1000000 --max-rss-growth-mb 64
+"""
+import argparse
+import asyncio
+import json
+import resource
+
+from common import Timer, configure, run_isolated
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(args) -> dict:
+    configure(db_path=args.db)
+    from common import create_schema, create_user_with_tasks
+
+    create_schema()
+    return {"user_id": create_user_with_tasks("export@example.com", n_tasks=args.rows)}
+
+
+def export(args) -> dict:
+    configure(db_path=args.db)
+
+    from common import token_for
+    from app.db.database import engine
+    from app.main import app
+
+    engine.echo = False
+    path = "/api/tasks/export"
+    query = f"format={args.format}&gzip={str(args.gzip).lower()}"
+    headers = [(b"authorization", f"Bearer {token_for(args.user_id)}".encode())]
+
+    async def main():
+        # Se llama a la app ASGI directamente y se descarta cada bloque al
+        # recibirlo: httpx.ASGITransport acumula todo el cuerpo en memoria
+        received = 0
+        status = None
+        request_sent = False
+        finished = asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # El cliente no se desconecta hasta que termina la respuesta
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal received, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                received += len(message.get("body", b""))
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": query.encode(), "root_path": "", "headers": headers,
+            "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+        }
+        baseline = peak_rss_mb()
+        with Timer() as t:
+            await app(scope, receive, send)
+        finished.set()
+        assert status == 200, status
+        return baseline, received, t.elapsed
+
+    baseline, received, elapsed = asyncio.run(main())
+    return {
+        "bytes": received,
+        "seconds": elapsed,
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=64)
+    parser.add_argument("--step", choices=["seed", "export"])
+    parser.add_argument("--db")
+    parser.add_argument("--user-id", type=int)
+    args = parser.parse_args()
+
+    if args.step == "seed":
+        print(json.dumps(seed(args)))
+        return
+    if args.step == "export":
+        print(json.dumps(export(args)))
+        return
+
+    db_path = configure()
+    seeded = run_isolated(__file__, "--step", "seed", "--db", db_path, "--rows", str(args.rows))
+    extra = ["--gzip"] if args.gzip else []
+    result = run_isolated(
+        __file__, "--step", "export", "--db", db_path, "--format", args.format,
+        "--user-id", str(seeded["user_id"]), *extra
+    )
+
+    growth = result["peak_rss_mb"] - result["baseline_rss_mb"]
+    print(f"{args.rows} filas, {result['bytes'] / 1e6:.1f} MB en {result['seconds']:.1f}s "
+          f"({args.rows / result['seconds']:.0f} filas/s)")
+    print(f"RSS: base {result['baseline_rss_mb']:.1f} MB, pico {result['peak_rss_mb']:.1f} MB "
+          f"(+{growth:.1f} MB)")
+    assert growth <= args.max_rss_growth_mb, (
+        f"La memoria creció {growth:.1f} MB (máximo {args.max_rss_growth_mb} MB)"
+    )
+
+
+if __name__ == "__main__":
+    main()
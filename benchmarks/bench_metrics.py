@@ -0,0 +1,132 @@
+"""
+Mide el coste de las métricas de Prometheus: peticiones por segundo y
+latencia de GET /api/tasks/ con METRICS_ENABLED activado y desactivado,
+el coste directo de registrar una petición y el tiempo de generar /metrics.
+
+Cada modo se ejecuta en un subproceso porque la configuración se lee al
+importar la aplicación. La instrumentación SQL y la caché de respuestas se
+desactivan en ambos para aislar el coste de las métricas y que cada
+petición llegue a la base de datos.
+
+Uso:
+    python benchmarks/bench_metrics.py --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+
+from common import Timer, configure, run_isolated
+
+
+def recording_cost(iterations: int = 200_000) -> float:
+    """
+    Microsegundos que cuesta registrar una petición típica del listado:
+    middleware (gauge en curso, duración y estado), decode_access_token,
+    una conexión del pool y dos consultas.
+    """
+    from app.core.metrics import (
+        auth_duration_seconds, db_pool_checkout_seconds, db_query_duration_seconds,
+        http_request_duration_seconds, http_requests_in_flight, http_requests_total
+    )
+
+    with Timer() as t:
+        for _ in range(iterations):
+            http_requests_in_flight.inc("GET")
+            http_requests_in_flight.dec("GET")
+            http_request_duration_seconds.observe(0.004, "GET", "/api/tasks/")
+            http_requests_total.inc("GET", "/api/tasks/", "200")
+            with auth_duration_seconds.time("decode_access_token"):
+                pass
+            db_pool_checkout_seconds.observe(0.0001)
+            db_query_duration_seconds.observe(0.0002)
+            db_query_duration_seconds.observe(0.0002)
+    return t.elapsed / iterations * 1e6
+
+
+def run_mode(args) -> dict:
+    configure(METRICS_ENABLED=args.mode == "on", SQL_INSTRUMENTATION=False,
+              TASK_CACHE_TTL_SECONDS=0)
+
+    import httpx
+    from common import create_schema, create_user_with_tasks, summarize, token_for
+    from app.main import app
+
+    create_schema()
+    user_id = create_user_with_tasks("bench@example.com", n_tasks=20)
+    headers = {"Authorization": f"Bearer {token_for(user_id)}"}
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            semaphore = asyncio.Semaphore(args.concurrency)
+            latencies = []
+
+            async def one():
+                async with semaphore:
+                    with Timer() as t:
+                        response = await client.get("/api/tasks/", headers=headers)
+                    response.raise_for_status()
+                    latencies.append(t.elapsed)
+
+            # Calentamiento
+            await asyncio.gather(*(one() for _ in range(100)))
+            latencies.clear()
+
+            with Timer() as total:
+                await asyncio.gather(*(one() for _ in range(args.requests)))
+
+            scrape = None
+            if args.mode == "on":
+                with Timer() as t:
+                    response = await client.get("/metrics")
+                response.raise_for_status()
+                scrape = {"ms": t.elapsed * 1000, "bytes": len(response.content),
+                          "record_us": recording_cost()}
+            return total.elapsed, latencies, scrape
+
+    elapsed, latencies, scrape = asyncio.run(main())
+    return {
+        "mode": args.mode,
+        "rps": args.requests / elapsed,
+        "scrape": scrape,
+        **summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="Repeticiones alternando modos; se muestra la mejor")
+    parser.add_argument("--mode", choices=["on", "off"])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    best = {}
+    for _ in range(args.rounds):
+        for mode in ("off", "on"):
+            result = run_isolated(__file__, "--mode", mode,
+                                  "--requests", str(args.requests),
+                                  "--concurrency", str(args.concurrency))
+            if mode not in best or result["rps"] > best[mode]["rps"]:
+                best[mode] = result
+
+    for mode in ("off", "on"):
+        result = best[mode]
+        print(f"métricas {mode:>3}: {result['rps']:8.1f} req/s  "
+              f"p50={result['p50_ms']:.2f}ms  p99={result['p99_ms']:.2f}ms")
+
+    overhead = (best["off"]["rps"] / best["on"]["rps"] - 1) * 100
+    per_request = (1 / best["on"]["rps"] - 1 / best["off"]["rps"]) * 1e6
+    print(f"coste: {overhead:+.1f}% ({per_request:+.0f} µs por petición)")
+    scrape = best["on"]["scrape"]
+    print(f"registro por petición: {scrape['record_us']:.2f} µs")
+    print(f"GET /metrics: {scrape['ms']:.2f}ms, {scrape['bytes']} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Latencia de una página profunda con paginación por offset (skip) frente a
+paginación por cursor, a medida que crece la tabla de tareas.
+
+Uso:
+    python benchmarks/bench_pagination.py --sizes 10000 100000 500000
+"""
+import argparse
+
+from common import Timer, configure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    configure()
+    from common import create_schema, create_user_with_tasks
+    from app.crud.task import get_tasks_by_owner
+    from app.db.database import SessionLocal
+
+    create_schema()
+    # Otro usuario con tareas intercaladas para que el filtro por owner importe
+    create_user_with_tasks("otro@example.com", n_tasks=1000)
+
+    print(f"{'filas':>8} {'offset p50':>12} {'cursor p50':>12}")
+    created = 0
+    for i, size in enumerate(args.sizes):
+        user_id = create_user_with_tasks(f"bench{i}@example.com", n_tasks=size)
+        created += size
+
+        db = SessionLocal()
+        try:
+            # Página situada al 90% del listado del usuario
+            skip = int(size * 0.9)
+            boundary = get_tasks_by_owner(db, owner_id=user_id, skip=skip - 1, limit=1)[0].id
+
+            offset_samples, cursor_samples = [], []
+            for _ in range(args.repeat):
+                with Timer() as t:
+                    get_tasks_by_owner(db, owner_id=user_id, skip=skip, limit=args.page_size)
+                offset_samples.append(t.elapsed)
+                with Timer() as t:
+                    get_tasks_by_owner(db, owner_id=user_id, limit=args.page_size, after_id=boundary)
+                cursor_samples.append(t.elapsed)
+                db.expunge_all()
+        finally:
+            db.close()
+
+        print(f"{size:>8} {summarize(offset_samples)['p50_ms']:>10.2f}ms "
+              f"{summarize(cursor_samples)['p50_ms']:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
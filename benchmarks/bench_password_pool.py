@@ -0,0 +1,98 @@
+"""
+Carga mixta: ráfaga de logins (bcrypt) mientras otros clientes leen tareas.
+
+Compara un pool de bcrypt tan grande como el threadpool de Starlette
+(equivalente a ejecutar bcrypt en línea, como antes) con un pool pequeño
+y acotado. Mide logins por segundo y la latencia de GET /api/tasks/.
+
+Uso:
+    python benchmarks/bench_password_pool.py --workers 40 2 --duration 5
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from common import Timer, configure, run_isolated
+
+
+def run_config(args) -> dict:
+    configure(
+        PASSWORD_HASH_WORKERS=args.run_workers,
+        PASSWORD_HASH_QUEUE_LIMIT=10_000,
+        BCRYPT_ROUNDS=args.rounds
+    )
+
+    import httpx
+    from common import create_schema, create_user_with_tasks, summarize, token_for
+    from app.main import app
+
+    create_schema()
+    user_id = create_user_with_tasks("bench@example.com", n_tasks=20)
+    headers = {"Authorization": f"Bearer {token_for(user_id)}"}
+    login_form = {"username": "bench@example.com", "password": "benchmark-pass"}
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            deadline = time.perf_counter() + args.duration
+            logins = 0
+            task_latencies = []
+
+            async def login_loop():
+                nonlocal logins
+                while time.perf_counter() < deadline:
+                    response = await client.post("/api/auth/login", data=login_form)
+                    response.raise_for_status()
+                    logins += 1
+
+            async def tasks_loop():
+                while time.perf_counter() < deadline:
+                    with Timer() as t:
+                        response = await client.get("/api/tasks/", headers=headers)
+                    response.raise_for_status()
+                    task_latencies.append(t.elapsed)
+
+            await asyncio.gather(
+                *(login_loop() for _ in range(args.login_clients)),
+                *(tasks_loop() for _ in range(args.task_clients))
+            )
+            return logins, task_latencies
+
+    logins, task_latencies = asyncio.run(main())
+    return {
+        "workers": args.run_workers,
+        "logins_per_s": logins / args.duration,
+        "tasks_per_s": len(task_latencies) / args.duration,
+        **{f"tasks_{k}": v for k, v in summarize(task_latencies).items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[40, 2])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--login-clients", type=int, default=64)
+    parser.add_argument("--task-clients", type=int, default=16)
+    parser.add_argument("--run-workers", type=int)
+    args = parser.parse_args()
+
+    if args.run_workers:
+        print(json.dumps(run_config(args)))
+        return
+
+    for workers in args.workers:
+        result = run_isolated(
+            __file__, "--run-workers", str(workers), "--rounds", str(args.rounds),
+            "--duration", str(args.duration),
+            "--login-clients", str(args.login_clients),
+            "--task-clients", str(args.task_clients)
+        )
+        print(f"workers={workers:>3}: {result['logins_per_s']:7.1f} logins/s  "
+              f"{result['tasks_per_s']:7.1f} GET tasks/s  "
+              f"p50={result['tasks_p50_ms']:.1f}ms  p99={result['tasks_p99_ms']:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Carga de sondeo (polling): varios clientes piden una y otra vez su
+listado de tareas y una tarea concreta, mientras de vez en cuando se
+modifica una tarea. Compara bytes descargados y latencia con y sin
+peticiones condicionales (If-None-Match con el último ETag recibido).
+
+Uso:
+    python benchmarks/bench_polling.py --clients 20 --polls 100 --write-every 25
+"""
+import argparse
+import asyncio
+
+from common import Timer, configure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--polls", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--write-every", type=int, default=25,
+                        help="Cada cuántos sondeos de un cliente se modifica una de sus tareas")
+    args = parser.parse_args()
+
+    configure()
+    import httpx
+    from common import create_schema, create_user_with_tasks, token_for
+    from app.main import app
+
+    create_schema()
+    users = [
+        create_user_with_tasks(f"poll{n}@example.com", n_tasks=args.tasks)
+        for n in range(args.clients)
+    ]
+    # Contadores iniciales para que los listados tengan versión
+    from app.crud.task_stats import rebuild_task_stats
+    from app.db.database import SessionLocal
+    db = SessionLocal()
+    try:
+        rebuild_task_stats(db, batch_size=args.clients)
+    finally:
+        db.close()
+
+    async def run(conditional: bool) -> dict:
+        transport = httpx.ASGITransport(app=app)
+        latencies, sent = [], {"bytes": 0, "304": 0, "200": 0}
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def poller(user_id: int):
+                headers = {"Authorization": f"Bearer {token_for(user_id)}"}
+                first = (await client.get("/api/tasks/?limit=1", headers=headers)).json()[0]["id"]
+                etags = {}
+                for n in range(args.polls):
+                    if n and n % args.write_every == 0:
+                        await client.put(f"/api/tasks/{first}", json={"title": f"cambio {n}"}, headers=headers)
+                    for url in ("/api/tasks/?limit=100", f"/api/tasks/{first}"):
+                        request_headers = dict(headers)
+                        if conditional and url in etags:
+                            request_headers["If-None-Match"] = etags[url]
+                        with Timer() as t:
+                            response = await client.get(url, headers=request_headers)
+                        latencies.append(t.elapsed)
+                        sent["bytes"] += len(response.content)
+                        sent[str(response.status_code)] += 1
+                        etags[url] = response.headers["ETag"]
+
+            with Timer() as total:
+                await asyncio.gather(*(poller(user_id) for user_id in users))
+
+        return {"elapsed": total.elapsed, **sent, **summarize(latencies)}
+
+    for conditional in (False, True):
+        result = asyncio.run(run(conditional))
+        name = "If-None-Match" if conditional else "sin condición"
+        print(f"{name:>14}: {result['bytes'] / 1024:9.1f} KiB  "
+              f"200={result['200']:5d} 304={result['304']:5d}  "
+              f"p50={result['p50_ms']:.2f}ms  p99={result['p99_ms']:.2f}ms  "
+              f"total={result['elapsed']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Lecturas repetidas de la primera página y de tareas concretas con
+escrituras ocasionales, con y sin la caché de respuestas de tareas.
+
+Cada modo se ejecuta en un subproceso porque la configuración se lee al
+importar la aplicación.
+
+Uso:
+    python benchmarks/bench_response_cache.py --users 20 --reads 200 --write-every 50
+"""
+import argparse
+import asyncio
+import json
+
+from common import Timer, configure, run_isolated
+
+
+def run_mode(args) -> dict:
+    configure(
+        TASK_CACHE_TTL_SECONDS=0 if args.mode == "sin caché" else 60,
+        CACHE_BACKEND="fake" if args.mode == "compartida (falso)" else "memory",
+    )
+
+    import httpx
+    from common import create_schema, create_user_with_tasks, summarize, token_for
+    from app.core.cache import task_cache
+    from app.main import app
+
+    create_schema()
+    users = [create_user_with_tasks(f"cache{n}@example.com", n_tasks=200) for n in range(args.users)]
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            latencies = []
+
+            async def reader(user_id: int):
+                headers = {"Authorization": f"Bearer {token_for(user_id)}"}
+                first = (await client.get("/api/tasks/?limit=1", headers=headers)).json()[0]["id"]
+                for n in range(args.reads):
+                    if n and n % args.write_every == 0:
+                        await client.put(f"/api/tasks/{first}", json={"title": f"cambio {n}"}, headers=headers)
+                    url = "/api/tasks/?limit=100" if n % 2 else f"/api/tasks/{first + n % 10}"
+                    with Timer() as t:
+                        response = await client.get(url, headers=headers)
+                    response.raise_for_status()
+                    latencies.append(t.elapsed)
+
+            with Timer() as total:
+                await asyncio.gather(*(reader(user_id) for user_id in users))
+            return total.elapsed, latencies
+
+    elapsed, latencies = asyncio.run(main())
+    return {
+        "mode": args.mode,
+        "rps": len(latencies) / elapsed,
+        **summarize(latencies),
+        **task_cache.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--write-every", type=int, default=50)
+    parser.add_argument("--mode")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    for mode in ("sin caché", "memoria", "compartida (falso)"):
+        result = run_isolated(
+            __file__, "--mode", mode, "--users", str(args.users),
+            "--reads", str(args.reads), "--write-every", str(args.write_every)
+        )
+        print(f"{mode:>19}: {result['rps']:8.1f} lecturas/s  p50={result['p50_ms']:.2f}ms  "
+              f"p99={result['p99_ms']:.2f}ms  aciertos={result['hit_ratio']:.0%}  "
+              f"entradas={result['entries']}  bytes={result['bytes']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Cuenta las sentencias SQL (idas y vueltas a la base de datos) que ejecuta
+cada escritura de una tarea: la ruta anterior (get_task + update_task /
+delete_task) frente a los endpoints actuales de una sola sentencia.
+
+Uso:
+    python benchmarks/bench_round_trips.py
+"""
+from common import configure
+
+
+def main():
+    configure()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from common import create_schema, create_user_with_tasks, token_for
+    from app.crud import task as crud_task
+    from app.db.database import SessionLocal, engine
+    from app.main import app
+    from app.schemas.task import TaskUpdate
+
+    create_schema()
+    owner_id = create_user_with_tasks("owner@example.com", n_tasks=10)
+    other_id = create_user_with_tasks("other@example.com", n_tasks=0)
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token_for(owner_id)}"}
+    other_headers = {"Authorization": f"Bearer {token_for(other_id)}"}
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    # COMMIT no pasa por before_cursor_execute
+    event.listen(engine, "commit", lambda conn: statements.append("COMMIT"))
+
+    def count(fn) -> int:
+        statements.clear()
+        fn()
+        return len(statements)
+
+    # Calentar la caché del usuario autenticado para medir solo la escritura
+    client.get("/api/tasks/?limit=1", headers=headers)
+    client.get("/api/tasks/?limit=1", headers=other_headers)
+
+    def legacy_update():
+        db = SessionLocal()
+        task = crud_task.get_task(db, 1)
+        assert task.owner_id == owner_id
+        crud_task.update_task(db, 1, TaskUpdate(is_completed=True))
+        db.close()
+
+    def legacy_delete():
+        db = SessionLocal()
+        task = crud_task.get_task(db, 2)
+        assert task.owner_id == owner_id
+        crud_task.delete_task(db, 2)
+        db.close()
+
+    rows = [
+        ("PUT (anterior)", count(legacy_update)),
+        ("PUT", count(lambda: client.put("/api/tasks/3", json={"is_completed": True}, headers=headers))),
+        ("PUT ajena (403)", count(lambda: client.put("/api/tasks/4", json={"is_completed": True}, headers=other_headers))),
+        ("DELETE (anterior)", count(legacy_delete)),
+        ("DELETE", count(lambda: client.delete("/api/tasks/5", headers=headers))),
+        ("DELETE inexistente (404)", count(lambda: client.delete("/api/tasks/999", headers=headers))),
+    ]
+    for name, n in rows:
+        print(f"{name:>26}: {n} idas y vueltas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Latencia de la búsqueda de texto completo (GET /api/tasks/search) con
+1M de tareas, frente a un LIKE '%palabra%' sobre título y descripción.
+
+Las palabras siguen una distribución de Zipf para tener términos muy
+frecuentes y términos raros. Se mide la primera página y una página
+obtenida con cursor para cada tipo de búsqueda. El LIKE no ordena por
+relevancia: con términos frecuentes termina en cuanto reúne una página y
+con términos raros recorre todas las tareas del usuario.
+
+Uso:
+    python benchmarks/bench_search.py --tasks 1000000 --owners 100
+"""
+import argparse
+import random
+
+from common import Timer, configure, summarize
+
+
+def seed(n_tasks: int, n_owners: int, vocabulary: list[str]) -> list[int]:
+    """
+    Inserta n_owners usuarios con tareas de texto aleatorio intercaladas.
+
+    Returns:
+        Los ids de los usuarios
+    """
+    from sqlalchemy import insert
+    from app.db.database import SessionLocal
+    from app.models import Task, User
+
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+
+    def words(k: int) -> str:
+        return " ".join(rng.choices(vocabulary, weights, k=k))
+
+    db = SessionLocal()
+    try:
+        owners = []
+        for n in range(n_owners):
+            user = User(email=f"search{n}@example.com", username=f"search{n}", hashed_password="x")
+            db.add(user)
+            db.flush()
+            owners.append(user.id)
+        for start in range(0, n_tasks, 10_000):
+            db.execute(insert(Task.__table__), [
+                {
+                    "title": words(rng.randint(3, 6)),
+                    "description": words(rng.randint(10, 20)),
+                    "owner_id": owners[i % n_owners],
+                }
+                for i in range(start, min(start + 10_000, n_tasks))
+            ])
+        db.commit()
+        return owners
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--owners", type=int, default=100)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    configure()
+    from sqlalchemy import or_, select
+    from common import create_schema
+    from app.crud.task import TASK_COLUMNS, search_tasks_by_owner
+    from app.db.database import SessionLocal
+    from app.models import Task
+
+    create_schema()
+    vocabulary = [f"palabra{k}" for k in range(args.vocabulary)]
+    with Timer() as t:
+        owners = seed(args.tasks, args.owners, vocabulary)
+    print(f"{args.tasks} tareas insertadas en {t.elapsed:.1f}s")
+    owner_id = owners[0]
+
+    queries = {
+        "frecuente": vocabulary[0],
+        "media": vocabulary[50],
+        "rara": vocabulary[-1],
+        "dos palabras": f"{vocabulary[0]} {vocabulary[10]}",
+    }
+
+    def like(db, term):
+        pattern = f"%{term}%"
+        return db.execute(
+            select(*TASK_COLUMNS)
+            .where(Task.owner_id == owner_id)
+            .where(or_(Task.title.like(pattern), Task.description.like(pattern)))
+            .order_by(Task.id.desc())
+            .limit(args.limit)
+        ).all()
+
+    print(f"{'búsqueda':>14} {'FTS p50':>10} {'FTS p99':>10} {'cursor p50':>11} {'LIKE p50':>10}")
+    db = SessionLocal()
+    try:
+        for name, q in queries.items():
+            first, paged, scanned = [], [], []
+            for _ in range(args.repeat):
+                with Timer() as t:
+                    rows = search_tasks_by_owner(db, owner_id=owner_id, q=q, limit=args.limit + 1)
+                first.append(t.elapsed)
+                if len(rows) > args.limit:
+                    last = rows[args.limit - 1]
+                    with Timer() as t:
+                        search_tasks_by_owner(
+                            db, owner_id=owner_id, q=q, limit=args.limit + 1,
+                            after_rank=last.rank, after_id=last.id
+                        )
+                    paged.append(t.elapsed)
+                with Timer() as t:
+                    like(db, q.split()[0])
+                scanned.append(t.elapsed)
+
+            cursor_p50 = f"{summarize(paged)['p50_ms']:>9.2f}ms" if paged else f"{'-':>11}"
+            print(f"{name:>14} {summarize(first)['p50_ms']:>8.2f}ms {summarize(first)['p99_ms']:>8.2f}ms "
+                  f"{cursor_p50} {summarize(scanned)['p50_ms']:>8.2f}ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Tiempo de cargar y serializar una página de 100 tareas:
+
+- antes: objetos ORM validados con response_model=List[Task] y json.dumps
+  (lo que hace FastAPI con JSONResponse)
+- ahora: consulta de columnas y dump_task_rows (orjson, sin validar otra vez)
+
+Uso:
+    python benchmarks/bench_serialization.py --repeat 2000
+"""
+import argparse
+import json
+
+from common import Timer, configure, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    configure()
+    from typing import List
+    from pydantic import TypeAdapter
+    from common import create_schema, create_user_with_tasks
+    from app.core.responses import dump_task_rows
+    from app.crud.task import get_task_rows_by_owner, get_tasks_by_owner
+    from app.db.database import SessionLocal
+    from app.schemas.task import Task
+
+    create_schema()
+    user_id = create_user_with_tasks("bench@example.com", n_tasks=args.page_size)
+    adapter = TypeAdapter(List[Task])
+
+    def before_serialize(tasks) -> bytes:
+        validated = adapter.validate_python(tasks, from_attributes=True)
+        content = adapter.dump_python(validated, mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+    db = SessionLocal()
+    tasks = get_tasks_by_owner(db, owner_id=user_id, limit=args.page_size)
+    rows = get_task_rows_by_owner(db, owner_id=user_id, limit=args.page_size)
+    assert json.loads(before_serialize(tasks)) == json.loads(dump_task_rows(rows))
+
+    samples = {"serializar antes": [], "serializar ahora": [], "cargar+serializar antes": [],
+               "cargar+serializar ahora": []}
+    for _ in range(args.repeat):
+        with Timer() as t:
+            before_serialize(tasks)
+        samples["serializar antes"].append(t.elapsed)
+        with Timer() as t:
+            dump_task_rows(rows)
+        samples["serializar ahora"].append(t.elapsed)
+
+    for _ in range(args.repeat // 10):
+        db.expunge_all()
+        with Timer() as t:
+            before_serialize(get_tasks_by_owner(db, owner_id=user_id, limit=args.page_size))
+        samples["cargar+serializar antes"].append(t.elapsed)
+        with Timer() as t:
+            dump_task_rows(get_task_rows_by_owner(db, owner_id=user_id, limit=args.page_size))
+        samples["cargar+serializar ahora"].append(t.elapsed)
+    db.close()
+
+    print(f"{args.page_size} tareas por página")
+    for name, values in samples.items():
+        stats = summarize(values)
+        print(f"{name:>24}: p50={stats['p50_ms'] * 1000:8.1f}µs  media={stats['mean_ms'] * 1000:8.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
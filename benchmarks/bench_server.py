@@ -0,0 +1,114 @@
+"""
+Compara el servidor de desarrollo (run.py: un proceso con recarga
+automática) con el de producción (python -m app.commands.serve) sobre
+sockets reales: peticiones por segundo y latencia de GET /api/tasks/.
+
+Cada servidor se arranca en un subproceso con la misma base de datos
+SQLite temporal. El número de workers de producción es el de
+app.commands.serve (núcleos disponibles) salvo que se indique --workers;
+con un solo núcleo la diferencia se limita al coste de la recarga y del
+log de accesos.
+
+Uso:
+    python benchmarks/bench_server.py --requests 5000 --concurrency 50
+    python benchmarks/bench_server.py --workers 4
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from common import ROOT, Timer, configure, summarize
+
+SERVERS = {
+    # Equivalente a run.py, en otro puerto
+    "run.py": [sys.executable, "-m", "uvicorn", "app.main:app", "--reload"],
+    "serve": [sys.executable, "-m", "app.commands.serve"],
+}
+
+
+def start(name: str, port: int, workers: int | None) -> subprocess.Popen:
+    command = SERVERS[name] + ["--host", "127.0.0.1", "--port", str(port)]
+    if name == "serve" and workers:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, cwd=ROOT, env=os.environ.copy(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop(process)
+    raise RuntimeError(f"{name} no arrancó en el puerto {port}")
+
+
+def stop(process: subprocess.Popen) -> None:
+    # SIGTERM al grupo: el proceso principal y sus workers
+    os.killpg(process.pid, 15)
+    process.wait(timeout=60)
+
+
+async def load(port: int, headers: dict, requests: int, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                with Timer() as t:
+                    response = await client.get("/api/tasks/", headers=headers)
+                response.raise_for_status()
+                latencies.append(t.elapsed)
+
+        # Calentamiento (también de las conexiones de todos los workers)
+        await asyncio.gather(*(one() for _ in range(concurrency * 4)))
+        latencies.clear()
+
+        with Timer() as total:
+            await asyncio.gather(*(one() for _ in range(requests)))
+    return {"rps": requests / total.elapsed, **summarize(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, help="Workers de producción (por defecto, los núcleos)")
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    # Sin caché de respuestas: cada petición llega a la base de datos
+    configure(TASK_CACHE_TTL_SECONDS=0, SQL_INSTRUMENTATION=False)
+    from common import create_schema, create_user_with_tasks, token_for
+    from app.commands.serve import available_cpus
+
+    create_schema()
+    headers = {"Authorization": f"Bearer {token_for(create_user_with_tasks('bench@example.com', n_tasks=20))}"}
+
+    results = {}
+    for offset, name in enumerate(SERVERS):
+        port = args.port + offset
+        process = start(name, port, args.workers)
+        try:
+            results[name] = asyncio.run(load(port, headers, args.requests, args.concurrency))
+        finally:
+            stop(process)
+
+    print(f"núcleos disponibles: {available_cpus()}, workers de producción: {args.workers or available_cpus()}")
+    for name, result in results.items():
+        print(f"{name:>7}: {result['rps']:8.1f} req/s  "
+              f"p50={result['p50_ms']:.2f}ms  p95={result['p95_ms']:.2f}ms  p99={result['p99_ms']:.2f}ms")
+    print(f"mejora: {(results['serve']['rps'] / results['run.py']['rps'] - 1) * 100:+.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Mide el arranque en frío de un worker: tiempo desde lanzar uvicorn hasta
+la primera respuesta correcta de GET /health, y el tiempo de importar
+app.main en un proceso nuevo.
+
+Cada arranque es un proceso nuevo con la misma base de datos SQLite. Se
+mide sin calentamiento y con STARTUP_WARMUP_CONNECTIONS, que retrasa
+/health a cambio de que las primeras peticiones no abran conexiones. Se
+incluye también app_startup_seconds de /metrics (desde la importación de
+app.main hasta el final del lifespan).
+
+El resultado se escribe en JSON en la última línea, para guardarlo y
+comparar entre commits.
+
+Uso:
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from common import ROOT, configure
+
+
+def import_time() -> float:
+    output = subprocess.check_output(
+        [sys.executable, "-c",
+         "import time; s = time.perf_counter(); import app.main; print(time.perf_counter() - s)"],
+        cwd=ROOT, env=os.environ.copy()
+    )
+    return float(output)
+
+
+def time_to_health(port: int, env: dict) -> tuple[float, float]:
+    """
+    Segundos hasta la primera respuesta 200 de /health, y app_startup_seconds.
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT, env={**os.environ, **env},
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        # Hasta que el puerto acepta conexiones basta con intentar conectar:
+        # crear un cliente HTTP en cada intento quitaría CPU al arranque
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    break
+            except (OSError, httpx.HTTPError):
+                pass
+            if process.poll() is not None or time.perf_counter() - started > 30:
+                raise RuntimeError("uvicorn no arrancó")
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+
+        metrics = httpx.get(f"http://127.0.0.1:{port}/metrics").text
+        startup = next(float(line.split()[1]) for line in metrics.splitlines()
+                       if line.startswith("app_startup_seconds "))
+        return elapsed, startup
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def median_ms(samples: list[float]) -> float:
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup-connections", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8795)
+    args = parser.parse_args()
+
+    configure(METRICS_ENABLED=True)
+    from common import create_schema
+    create_schema()
+
+    modes = {
+        "sin calentamiento": {"STARTUP_WARMUP_CONNECTIONS": "0"},
+        f"calentamiento ({args.warmup_connections} conexiones)":
+            {"STARTUP_WARMUP_CONNECTIONS": str(args.warmup_connections)},
+    }
+    imports = [import_time() for _ in range(args.runs)]
+    results = {"import_ms": median_ms(imports), "modes": {}}
+    print(f"importar app.main: {results['import_ms']:.0f} ms (mediana de {args.runs})", file=sys.stderr)
+
+    for name, env in modes.items():
+        samples = [time_to_health(args.port, env) for _ in range(args.runs)]
+        health = [elapsed for elapsed, _ in samples]
+        startup = [value for _, value in samples]
+        results["modes"][name] = {
+            "health_ms": median_ms(health),
+            "health_max_ms": max(health) * 1000,
+            "app_startup_ms": median_ms(startup),
+        }
+        print(f"{name:<32} primera respuesta de /health: {median_ms(health):6.0f} ms "
+              f"(máx. {max(health) * 1000:.0f}), app_startup_seconds: {median_ms(startup):.0f} ms",
+              file=sys.stderr)
+
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Microbenchmark de decode_access_token con y sin la caché de tokens
+verificados.
+
+Uso:
+    python benchmarks/bench_token_cache.py --iterations 20000 --tokens 100
+"""
+import argparse
+
+from common import Timer, configure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--tokens", type=int, default=100, help="tokens distintos en circulación")
+    args = parser.parse_args()
+
+    configure()
+    from app.core.security import create_access_token, decode_access_token, token_cache
+
+    tokens = [create_access_token({"sub": str(i)}) for i in range(args.tokens)]
+    ttl = token_cache.ttl
+
+    results = {}
+    for label, cache_ttl in (("sin caché", 0), ("con caché", ttl)):
+        token_cache.ttl = cache_ttl
+        token_cache.hits = token_cache.misses = 0
+        with Timer() as t:
+            for i in range(args.iterations):
+                assert decode_access_token(tokens[i % len(tokens)]) is not None
+        results[label] = t.elapsed / args.iterations * 1e6
+        print(f"{label:>10}: {results[label]:8.2f} µs/decode  "
+              f"hit_ratio={token_cache.stats()['hit_ratio']:.3f}")
+
+    print(f"aceleración: x{results['sin caché'] / results['con caché']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Comprueba con EXPLAIN que todas las combinaciones de filtros, orden y
+cursor del listado de tareas usan un índice en lugar de recorrer la tabla,
+y que cada filtro y cada orden por separado usa su índice con la columna
+filtrada en la condición del índice (no solo owner_id, leyendo después
+todas las tareas del usuario).
+
+Con SQLite (por defecto) se usa EXPLAIN QUERY PLAN. Con PostgreSQL
+(--database-url) se usa EXPLAIN con enable_seqscan desactivado: si aun
+así aparece un Seq Scan es que ningún índice sirve para la consulta.
+
+Uso:
+    python benchmarks/check_query_plans.py
+    python benchmarks/check_query_plans.py --database-url postgresql://...
+"""
+import argparse
+import itertools
+import re
+import sys
+from datetime import datetime
+
+from common import configure
+
+# Índices que aparecen en el plan con su condición de búsqueda
+SQLITE_INDEX = re.compile(r"^SEARCH tasks USING (?:COVERING )?INDEX (\w+) \((.*)\)")
+POSTGRES_INDEX = re.compile(r"(?:Index(?: Only)? Scan(?: Backward)? using|Bitmap Index Scan on) (\w+)")
+
+
+def index_conditions(plan: list[str], is_postgres: bool) -> dict[str, str]:
+    """
+    Índices de la tabla tasks usados en el plan y su condición.
+    """
+    used = {}
+    if not is_postgres:
+        for line in plan:
+            match = SQLITE_INDEX.match(line)
+            if match:
+                used[match.group(1)] = match.group(2)
+        return used
+    current = None
+    for line in plan:
+        match = POSTGRES_INDEX.search(line)
+        if match:
+            current = match.group(1)
+            used[current] = ""
+        elif current and "Index Cond:" in line:
+            used[current] += line
+    return used
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    overrides = {"DATABASE_URL": args.database_url} if args.database_url else {}
+    configure(**overrides)
+
+    from sqlalchemy import select
+    from common import create_schema, create_user_with_tasks
+    from app.crud.task import TASK_COLUMNS, _tasks_by_owner_query
+    from app.db.database import engine
+    from app.schemas.task import TaskFilters
+
+    create_schema()
+    # Varios propietarios para que las estadísticas de ANALYZE sean realistas:
+    # con uno solo, filtrar por owner_id no descarta filas y el planificador
+    # prefiere recorrer la tabla
+    suffix = datetime.now().timestamp()
+    owner_id = create_user_with_tasks(f"plans{suffix}@example.com", args.rows // 10)
+    for n in range(9):
+        create_user_with_tasks(f"plans{suffix}-{n}@example.com", args.rows // 10)
+    is_postgres = engine.dialect.name == "postgresql"
+
+    def explain(conn, after_id=None, **kwargs) -> list[str]:
+        stmt = _tasks_by_owner_query(select(*TASK_COLUMNS), owner_id, skip=0, limit=101,
+                                     after_id=after_id, **kwargs)
+        sql = str(stmt.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+        if is_postgres:
+            return [row[0] for row in conn.exec_driver_sql("EXPLAIN " + sql)]
+        return [row[-1] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+
+    when = datetime(2024, 1, 1)
+    until = datetime(2100, 1, 1)
+    # (descripción, argumentos, índice esperado, columna que debe acotarlo).
+    # El índice parcial de pendientes ya solo contiene esas tareas: basta owner_id
+    cases = [
+        ("pendientes", dict(filters=TaskFilters(is_completed=False)), "ix_tasks_owner_open", "owner_id"),
+        ("created_at", dict(filters=TaskFilters(created_from=when, created_to=until)),
+         "ix_tasks_owner_created", "created_at"),
+        ("updated_at", dict(filters=TaskFilters(updated_from=when, updated_to=until)),
+         "ix_tasks_owner_updated", "updated_at"),
+        ("title_prefix", dict(filters=TaskFilters(title_prefix="Tarea 1")),
+         "ix_tasks_owner_title_c" if is_postgres else "ix_tasks_owner_title", "title"),
+        ("cursor por id", dict(after_id=1000), "ix_tasks_owner_id_id", "id"),
+        ("cursor por created_at", dict(sort="created_at", after_id=1000, after_value=when),
+         "ix_tasks_owner_created", "created_at"),
+        ("cursor por título", dict(sort="title", after_id=1000, after_value="Tarea"),
+         "ix_tasks_owner_title", "title"),
+    ]
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        if is_postgres:
+            conn.exec_driver_sql("SET enable_seqscan = off")
+
+        failures = 0
+        for name, kwargs, index, column in cases:
+            plan = explain(conn, **kwargs)
+            condition = index_conditions(plan, is_postgres).get(index)
+            # Como palabra: "id" no debe coincidir con "owner_id"
+            if condition is None or not re.search(rf"\b{column}\b", condition):
+                failures += 1
+                print(f"FALLO {name}: se esperaba {index} acotado por {column}")
+                print("    " + "\n    ".join(plan))
+            else:
+                print(f"ok    {name}: {index} ({condition.strip()})")
+
+        combinations = itertools.product(
+            (None, True, False),                      # is_completed
+            (False, True),                            # rango de created_at
+            (False, True),                            # rango de updated_at
+            (None, "Tarea 1"),                        # title_prefix
+            ("id", "created_at", "title"),            # sort
+            (False, True),                            # descending
+            (False, True),                            # con cursor
+        )
+        for is_completed, created, updated, prefix, sort, descending, with_cursor in combinations:
+            filters = TaskFilters(
+                is_completed=is_completed,
+                created_from=when if created else None,
+                created_to=until if created else None,
+                updated_from=when if updated else None,
+                title_prefix=prefix
+            )
+            plan = explain(
+                conn,
+                after_id=1000 if with_cursor else None,
+                filters=filters, sort=sort, descending=descending,
+                after_value=None if sort == "id" else (when if sort == "created_at" else "Tarea")
+            )
+            full_scan = any("Seq Scan" in line or line.startswith("SCAN tasks") for line in plan)
+            uses_index = not full_scan and bool(index_conditions(plan, is_postgres))
+
+            if not uses_index:
+                failures += 1
+                print(f"SIN ÍNDICE: is_completed={is_completed} created={created} "
+                      f"updated={updated} prefix={prefix} sort={sort} desc={descending} "
+                      f"cursor={with_cursor}")
+                print("    " + "\n    ".join(plan))
+
+    total = 3 * 2 * 2 * 2 * 3 * 2 * 2
+    print(f"{len(cases)} casos con su índice y {total} combinaciones con algún índice: "
+          f"{failures} fallos ({engine.dialect.name})")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Comprueba los límites de peticiones (RATE_LIMIT_*):
+
+- el login por IP y por cuenta responde 429 con Retry-After, y sin llegar
+  a calcular bcrypt,
+- el límite por cuenta se aplica aunque los intentos vengan de IPs
+  distintas y aunque el email no exista,
+- el registro se limita por IP,
+- las rutas de tareas se limitan por usuario, no por IP,
+- tras Retry-After se vuelven a admitir peticiones.
+
+Los límites se bajan para que la prueba dure poco. Con --backend fake se
+usa el backend compartido de pruebas (llamadas desde el threadpool, como
+con Redis).
+
+Uso:
+    python benchmarks/check_rate_limits.py
+    python benchmarks/check_rate_limits.py --backend fake
+"""
+import argparse
+import asyncio
+import sys
+
+from common import Timer, configure
+
+LIMITS = {
+    "RATE_LIMIT_LOGIN_PER_IP": 6,
+    "RATE_LIMIT_LOGIN_PER_ACCOUNT": 3,
+    "RATE_LIMIT_REGISTER_PER_IP": 2,
+    # Un token por segundo: la espera de Retry-After es corta
+    "RATE_LIMIT_TASKS_PER_USER": 60,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "fake"], default="memory")
+    args = parser.parse_args()
+
+    configure(RATE_LIMIT_ENABLED=True, CACHE_BACKEND=args.backend, BCRYPT_ROUNDS=4, **LIMITS)
+
+    import httpx
+    from common import create_schema, create_user_with_tasks, token_for
+    from app.core.metrics import auth_duration_seconds
+    from app.main import app
+
+    create_schema()
+    user_id = create_user_with_tasks("limites@example.com", n_tasks=1, password="password1")
+    failures = []
+
+    def check(condition: bool, message: str):
+        print(f"{'ok   ' if condition else 'FALLO'} {message}")
+        if not condition:
+            failures.append(message)
+
+    def bcrypt_calls() -> int:
+        # Observaciones del histograma de verify_password (cuentas por cubeta)
+        counts, _ = auth_duration_seconds._values.get(("verify_password",), ([0], 0.0))
+        return sum(counts)
+
+    def client(ip: str) -> httpx.AsyncClient:
+        transport = httpx.ASGITransport(app=app, client=(ip, 40000))
+        return httpx.AsyncClient(transport=transport, base_url="http://limites")
+
+    async def login(ip: str, email: str, password: str = "incorrecta"):
+        async with client(ip) as c:
+            return await c.post("/api/auth/login", data={"username": email, "password": password})
+
+    async def scenario():
+        # Por IP: emails distintos desde la misma IP
+        codes = [(await login("10.0.0.1", f"nadie{n}@example.com")).status_code
+                 for n in range(LIMITS["RATE_LIMIT_LOGIN_PER_IP"] + 1)]
+        check(codes[:-1].count(401) == len(codes) - 1 and codes[-1] == 429,
+              f"login por IP: {codes}")
+
+        # Por cuenta: la misma cuenta desde IPs distintas
+        responses = [await login(f"10.0.1.{n}", "limites@example.com")
+                     for n in range(LIMITS["RATE_LIMIT_LOGIN_PER_ACCOUNT"] + 1)]
+        limited = responses[-1]
+        check([r.status_code for r in responses[:-1]] == [401] * LIMITS["RATE_LIMIT_LOGIN_PER_ACCOUNT"]
+              and limited.status_code == 429,
+              f"login por cuenta desde IPs distintas: {[r.status_code for r in responses]}")
+        check(limited.headers.get("Retry-After", "").isdigit(),
+              f"Retry-After en la respuesta 429: {limited.headers.get('Retry-After')}")
+
+        before = bcrypt_calls()
+        with Timer() as t:
+            response = await login("10.0.2.1", "limites@example.com", "password1")
+        check(response.status_code == 429 and bcrypt_calls() == before,
+              f"el login limitado no calcula bcrypt ({t.elapsed * 1000:.1f} ms)")
+
+        # Registro por IP
+        async with client("10.0.3.1") as c:
+            codes = [(await c.post("/api/auth/register", json={
+                "email": f"nuevo{n}@example.com", "username": f"nuevo{n}", "password": "password1"
+            })).status_code for n in range(LIMITS["RATE_LIMIT_REGISTER_PER_IP"] + 1)]
+        check(codes == [201] * LIMITS["RATE_LIMIT_REGISTER_PER_IP"] + [429], f"registro por IP: {codes}")
+
+        # Tareas por usuario, repartidas entre IPs
+        headers = {"Authorization": f"Bearer {token_for(user_id)}"}
+        codes = []
+        for n in range(LIMITS["RATE_LIMIT_TASKS_PER_USER"] + 1):
+            async with client(f"10.1.{n // 250}.{n % 250}") as c:
+                codes.append((await c.get("/api/tasks/", headers=headers)).status_code)
+        check(codes[:-1] == [200] * LIMITS["RATE_LIMIT_TASKS_PER_USER"] and codes[-1] == 429,
+              f"tareas por usuario: {codes.count(200)} x 200 y después {codes[-1]}")
+
+        async with client("10.2.0.1") as c:
+            other = await c.get("/api/tasks/", headers={"Authorization": f"Bearer {token_for(user_id + 1000)}"})
+            check(other.status_code == 401, f"otro usuario no comparte el límite (401, no 429): {other.status_code}")
+            limited = await c.get("/api/tasks/", headers=headers)
+            await asyncio.sleep(int(limited.headers["Retry-After"]))
+            again = await c.get("/api/tasks/", headers=headers)
+        check(again.status_code == 200, f"tras Retry-After se admite de nuevo: {again.status_code}")
+
+    asyncio.run(scenario())
+    print(f"{'Sin fallos' if not failures else f'{len(failures)} fallos'} (backend {args.backend})")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
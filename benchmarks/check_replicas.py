@@ -0,0 +1,138 @@
+"""
+Comprueba el reparto de lecturas entre réplicas (DATABASE_REPLICA_URLS) y
+la consistencia read-your-writes.
+
+No hay replicación real: la principal y cada réplica son bases de datos
+independientes con los mismos datos iniciales y una tarea marcadora
+propia en cada réplica. Así se ve qué base de datos respondió y que las
+escrituras solo llegan a la principal (como una réplica con mucho retraso).
+
+Se comprueba que:
+- los listados se reparten por turnos entre las réplicas,
+- justo después de escribir, el usuario lee de la principal y ve su cambio,
+- pasado READ_YOUR_WRITES_SECONDS vuelve a leer de las réplicas,
+- un usuario recién registrado puede usar su token aunque las réplicas
+  todavía no lo tengan.
+
+Uso:
+    python benchmarks/check_replicas.py
+    python benchmarks/check_replicas.py --async
+    python benchmarks/check_replicas.py --database-url postgresql://.../principal \\
+        --replica-url postgresql://.../replica1 --replica-url postgresql://.../replica2
+
+Con PostgreSQL las bases de datos deben existir y estar vacías.
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+
+from common import configure
+
+WINDOW_SECONDS = 1.0
+
+
+def seed(url: str, marker: str | None) -> None:
+    """
+    Crea las tablas y los mismos datos iniciales en una base de datos, más
+    una tarea con el título del marcador si se indica.
+    """
+    from sqlalchemy import create_engine, insert
+    from app.db.database import Base, _connect_args
+    from app.models import Task, TaskStats, User
+
+    engine = create_engine(url, connect_args=_connect_args(url))
+    Base.metadata.create_all(engine)
+    tasks = [{"title": f"Tarea {i}", "owner_id": 1} for i in range(3)]
+    if marker:
+        tasks.append({"title": marker, "owner_id": 1})
+    with engine.begin() as conn:
+        conn.execute(insert(User), {"id": 1, "email": "replicas@example.com",
+                                    "username": "replicas", "hashed_password": "x"})
+        conn.execute(insert(Task), tasks)
+        conn.execute(insert(TaskStats), {"owner_id": 1, "total": len(tasks), "completed": 0, "version": 1})
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url")
+    parser.add_argument("--replica-url", action="append", default=[])
+    parser.add_argument("--async", dest="use_async", action="store_true")
+    args = parser.parse_args()
+
+    if args.database_url:
+        primary, replicas = args.database_url, args.replica_url
+    else:
+        directory = tempfile.mkdtemp(prefix="replicas_")
+        primary = f"sqlite:///{directory}/principal.db"
+        replicas = [f"sqlite:///{directory}/replica{n}.db" for n in (1, 2)]
+    if len(replicas) < 2:
+        parser.error("hacen falta al menos dos réplicas")
+
+    configure(
+        DATABASE_URL=primary,
+        DATABASE_REPLICA_URLS=json.dumps(replicas),
+        READ_YOUR_WRITES_SECONDS=WINDOW_SECONDS,
+        DB_ASYNC=args.use_async,
+        # Sin cachés de respuestas ni de usuario: cada lectura llega a la base de datos
+        TASK_CACHE_TTL_SECONDS=0,
+        USER_CACHE_TTL_SECONDS=0,
+    )
+
+    seed(primary, None)
+    markers = [f"Solo en la réplica {n}" for n in range(1, len(replicas) + 1)]
+    for url, marker in zip(replicas, markers):
+        seed(url, marker)
+
+    from fastapi.testclient import TestClient
+    from common import token_for
+    from app.main import app
+
+    failures = []
+
+    def check(condition: bool, message: str):
+        print(f"{'ok   ' if condition else 'FALLO'} {message}")
+        if not condition:
+            failures.append(message)
+
+    def source(response) -> str:
+        titles = {task["title"] for task in response.json()}
+        found = [marker for marker in markers if marker in titles]
+        return found[0] if found else "principal"
+
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token_for(1)}"}
+
+    served = [source(client.get("/api/tasks/", headers=headers)) for _ in range(len(replicas) * 2)]
+    check(sorted(set(served)) == sorted(markers) and "principal" not in served,
+          f"las lecturas se reparten entre las réplicas: {served}")
+
+    created = client.post("/api/tasks/", headers=headers, json={"title": "Escrita ahora"}).json()
+    response = client.get("/api/tasks/", headers=headers)
+    check(source(response) == "principal" and "Escrita ahora" in {t["title"] for t in response.json()},
+          "después de escribir, el listado sale de la principal e incluye la tarea nueva")
+    check(client.get(f"/api/tasks/{created['id']}", headers=headers).status_code == 200,
+          "después de escribir, la tarea nueva se puede leer")
+
+    time.sleep(WINDOW_SECONDS + 0.2)
+    check(source(client.get("/api/tasks/", headers=headers)) in markers,
+          f"pasados {WINDOW_SECONDS}s las lecturas vuelven a las réplicas")
+
+    client.post("/api/auth/register", json={
+        "email": "nuevo@example.com", "username": "nuevo", "password": "password1"
+    })
+    token = client.post("/api/auth/login", data={
+        "username": "nuevo@example.com", "password": "password1"
+    }).json()["access_token"]
+    check(client.get("/api/tasks/", headers={"Authorization": f"Bearer {token}"}).status_code == 200,
+          "un usuario recién registrado puede leer aunque las réplicas no lo tengan")
+
+    print(f"{'Sin fallos' if not failures else f'{len(failures)} fallos'} "
+          f"({'asíncrono' if args.use_async else 'síncrono'})")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
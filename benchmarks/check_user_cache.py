@@ -0,0 +1,110 @@
+"""
+Comprueba la caché del usuario autenticado (USER_CACHE_TTL_SECONDS):
+
+- las peticiones repetidas de un usuario se sirven desde la caché,
+- desactivar un usuario con update_user invalida su entrada: su token se
+  rechaza en la petición siguiente,
+- si el cambio no pasa por update_user (otro worker con la caché en
+  memoria, o un UPDATE directo), el token se rechaza como mucho
+  USER_CACHE_TTL_SECONDS después,
+- los contadores de aciertos y fallos de la caché.
+
+El TTL se baja para que la prueba dure poco. Con --backend fake se usa el
+backend compartido de pruebas.
+
+Uso:
+    python benchmarks/check_user_cache.py
+    python benchmarks/check_user_cache.py --backend fake
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from common import configure
+
+TTL = 2.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["memory", "fake"], default="memory")
+    args = parser.parse_args()
+
+    configure(USER_CACHE_TTL_SECONDS=TTL, CACHE_BACKEND=args.backend, TASK_CACHE_TTL_SECONDS=0)
+
+    import httpx
+    from sqlalchemy import update
+    from common import create_schema, create_user_with_tasks, token_for
+    from app.core.cache import user_cache
+    from app.crud.user import update_user
+    from app.db.database import SessionLocal
+    from app.main import app
+    from app.models import User
+    from app.schemas.user import UserUpdate
+
+    create_schema()
+    failures = []
+
+    def check(condition: bool, message: str):
+        print(f"{'ok   ' if condition else 'FALLO'} {message}")
+        if not condition:
+            failures.append(message)
+
+    def set_active(user_id: int, active: bool, invalidate: bool = True):
+        db = SessionLocal()
+        try:
+            if invalidate:
+                update_user(db, user_id, UserUpdate(is_active=active))
+            else:
+                db.execute(update(User).where(User.id == user_id).values(is_active=active))
+                db.commit()
+        finally:
+            db.close()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://usuarios") as client:
+            async def status_of(user_id: int) -> int:
+                response = await client.get("/api/tasks/", headers={"Authorization": f"Bearer {token_for(user_id)}"})
+                return response.status_code
+
+            # Aciertos: solo la primera petición consulta la base de datos
+            user_id = create_user_with_tasks("cache@example.com", n_tasks=1)
+            hits, misses = user_cache.hits, user_cache.misses
+            codes = [await status_of(user_id) for _ in range(5)]
+            check(codes == [200] * 5 and user_cache.misses - misses == 1 and user_cache.hits - hits == 4,
+                  f"peticiones repetidas: {codes}, {user_cache.hits - hits} aciertos "
+                  f"y {user_cache.misses - misses} fallos")
+
+            # update_user invalida la entrada: rechazo inmediato
+            set_active(user_id, False)
+            code = await status_of(user_id)
+            check(code in (400, 401), f"desactivado con update_user: {code} en la petición siguiente")
+            set_active(user_id, True)
+            code = await status_of(user_id)
+            check(code == 200, f"reactivado con update_user: {code}")
+
+            # Sin invalidación el dato cacheado vale hasta el TTL, no más
+            other_id = create_user_with_tasks("otro-worker@example.com", n_tasks=1)
+            await status_of(other_id)
+            set_active(other_id, False, invalidate=False)
+            changed = time.perf_counter()
+            code = await status_of(other_id)
+            while code == 200 and time.perf_counter() - changed < TTL * 2:
+                await asyncio.sleep(0.05)
+                code = await status_of(other_id)
+            elapsed = time.perf_counter() - changed
+            check(code in (400, 401) and elapsed <= TTL + 0.5,
+                  f"desactivado sin invalidar: {code} a los {elapsed:.2f} s (TTL {TTL:g} s)")
+
+    asyncio.run(scenario())
+    stats = user_cache.stats()
+    print(f"caché de usuarios: {stats['hits']} aciertos, {stats['misses']} fallos "
+          f"(ratio {stats['hit_ratio']:.2f}), {stats['entries']} entradas")
+    print(f"{'Sin fallos' if not failures else f'{len(failures)} fallos'} (backend {args.backend})")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
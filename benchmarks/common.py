@@ -0,0 +1,145 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Configura una base de datos SQLite local mediante variables de entorno
+antes de importar la aplicación, de modo que no hace falta PostgreSQL.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def configure(db_path: str | None = None, **overrides) -> str:
+    """
+    Define las variables de entorno que necesita Settings.
+    Debe llamarse antes de importar cualquier módulo de app.
+
+    Returns:
+        La ruta del archivo SQLite usado
+    """
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(suffix=".db", prefix="bench_")
+        os.close(fd)
+    env = {
+        "PROJECT_NAME": "API de Tareas (benchmark)",
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "SECRET_KEY": "benchmark-secret-key",
+        "ALGORITHM": "HS256",
+        "ACCESS_TOKEN_EXPIRE_MINUTES": "30",
+        "ENVIRONMENT": "benchmark",
+        # Los benchmarks hacen ráfagas de logins y peticiones desde una IP y
+        # miden la capacidad, no los rechazos (bench_admission los activa)
+        "RATE_LIMIT_ENABLED": "false",
+        "ADMISSION_CONTROL_ENABLED": "false",
+    }
+    env.update({key: str(value) for key, value in overrides.items()})
+    os.environ.update(env)
+    return db_path
+
+
+def create_schema() -> None:
+    """
+    Crea las tablas en la base de datos local y silencia el log de SQL.
+    """
+    from app.db.database import Base, engine
+    import app.models  # noqa: F401
+
+    engine.echo = False
+    Base.metadata.create_all(engine)
+
+
+def create_user_with_tasks(email: str, n_tasks: int, password: str = "benchmark-pass") -> int:
+    """
+    Inserta un usuario y n_tasks tareas directamente en la base de datos.
+
+    Returns:
+        El id del usuario creado
+    """
+    from sqlalchemy import insert
+    from app.core.security import get_password_hash
+    from app.db.database import SessionLocal
+    from app.models import Task, User
+
+    db = SessionLocal()
+    try:
+        user = User(
+            email=email,
+            username=email.split("@")[0],
+            hashed_password=get_password_hash(password)
+        )
+        db.add(user)
+        db.flush()
+        # Insertar por bloques para no acumular millones de filas en memoria
+        for start in range(0, n_tasks, 10_000):
+            db.execute(insert(Task.__table__), [
+                {
+                    "title": f"Tarea {i}",
+                    "description": f"Descripción de la tarea {i}",
+                    "is_completed": i % 3 == 0,
+                    "owner_id": user.id,
+                }
+                for i in range(start, min(start + 10_000, n_tasks))
+            ])
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def token_for(user_id: int) -> str:
+    """
+    Genera un token de acceso válido para el usuario.
+    """
+    from app.core.security import create_access_token
+
+    return create_access_token({"sub": str(user_id)})
+
+
+def summarize(samples: list[float]) -> dict:
+    """
+    Resume una lista de duraciones (en segundos) en milisegundos.
+    """
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+    }
+
+
+class Timer:
+    """
+    Cronómetro simple para usar con 'with'.
+    """
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def run_isolated(script: str, *args: str) -> dict:
+    """
+    Ejecuta un benchmark en un subproceso (la configuración se lee al
+    importar la aplicación) y devuelve el JSON de su última línea.
+    """
+    output = subprocess.check_output(
+        [sys.executable, script, *args],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
@@ -0,0 +1,444 @@
+"""
+Pruebas de carga de extremo a extremo.
+
+Ejecuta escenarios realistas contra app.main:app en el mismo proceso (con
+una base de datos SQLite temporal) o contra un servidor ya arrancado
+(--url), e informa por endpoint de peticiones por segundo, errores y
+latencia p50/p95/p99. El resultado se escribe en JSON en la salida estándar
+(y en --output); la tabla legible va a la salida de errores.
+
+Escenarios:
+    auth        Ráfaga de registros y logins de usuarios nuevos
+    pagination  Cada usuario recorre su listado página a página con el cursor
+    writes      Crear, leer, actualizar y eliminar tareas
+    mixed       Todos los usuarios a la vez con una mezcla de lecturas y escrituras
+
+Con --baseline se compara con una ejecución guardada con --save-baseline y
+el proceso termina con código 1 si algún endpoint empeora más de
+--tolerance. La línea base solo es comparable en la misma máquina y con
+los mismos parámetros.
+
+Uso:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --env DB_ASYNC=true --scenarios mixed
+    python benchmarks/load_test.py --url http://localhost:8000 --users 100
+    python benchmarks/load_test.py --save-baseline benchmarks/load_baseline.json
+    python benchmarks/load_test.py --baseline benchmarks/load_baseline.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+from common import Timer, configure, summarize
+
+SCENARIOS = ("auth", "pagination", "writes", "mixed")
+PASSWORD = "loadtest-pass"
+# Tareas por petición al sembrar un servidor externo (TASK_BULK_MAX_ITEMS por defecto)
+BULK_CHUNK = 500
+# Códigos que no cuentan como error
+EXPECTED_STATUS = (200, 201, 204, 304)
+
+# Operaciones del escenario mixed y su peso relativo
+MIXED_WEIGHTS = {
+    "list": 40,
+    "get": 20,
+    "stats": 10,
+    "search": 10,
+    "create": 10,
+    "update": 5,
+    "delete": 5,
+}
+
+
+class Recorder:
+    """
+    Latencias y errores por endpoint (método y plantilla de ruta).
+    """
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def request(
+        self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs
+    ) -> httpx.Response | None:
+        """
+        Hace la petición y registra su duración con el nombre indicado.
+        Devuelve None si hubo un error de conexión.
+        """
+        response = None
+        with Timer() as t:
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                pass
+        self.latencies[name].append(t.elapsed)
+        if response is None or response.status_code not in EXPECTED_STATUS:
+            self.errors[name] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        return {
+            name: {
+                "requests": len(samples),
+                "errors": self.errors[name],
+                "rps": len(samples) / elapsed,
+                **summarize(samples),
+            }
+            for name, samples in sorted(self.latencies.items())
+        }
+
+
+def seed_local(n_users: int, tasks_per_user: int) -> list[dict]:
+    """
+    Inserta usuarios y tareas directamente en la base de datos local.
+    Todos comparten contraseña, así que bcrypt se calcula una sola vez.
+
+    Returns:
+        Usuarios con su token, cabeceras e IDs de tareas
+    """
+    from sqlalchemy import insert, select
+    from common import token_for
+    from app.core.security import get_password_hash
+    from app.crud.task_stats import rebuild_task_stats
+    from app.db.database import SessionLocal
+    from app.models import Task, User
+
+    hashed_password = get_password_hash(PASSWORD)
+    run = uuid.uuid4().hex[:8]
+    db = SessionLocal()
+    try:
+        user_ids = db.scalars(insert(User).returning(User.id), [
+            {
+                "email": f"load{i}-{run}@example.com",
+                "username": f"load{i}-{run}",
+                "hashed_password": hashed_password,
+            }
+            for i in range(n_users)
+        ]).all()
+        rows = [
+            {
+                "title": f"Tarea {i} del usuario {user_id}",
+                "description": f"Descripción de prueba de carga número {i}",
+                "is_completed": i % 3 == 0,
+                "owner_id": user_id,
+            }
+            for user_id in user_ids
+            for i in range(tasks_per_user)
+        ]
+        for start in range(0, len(rows), 10_000):
+            db.execute(insert(Task.__table__), rows[start:start + 10_000])
+        db.commit()
+
+        task_ids = defaultdict(list)
+        for owner_id, task_id in db.execute(select(Task.owner_id, Task.id).where(Task.owner_id.in_(user_ids))):
+            task_ids[owner_id].append(task_id)
+
+        # Las tareas se insertaron sin pasar por la API: inicializar los contadores
+        last_id = 0
+        while (last_id := rebuild_task_stats(db, after_id=last_id)) is not None:
+            pass
+    finally:
+        db.close()
+
+    return [
+        {
+            "headers": {"Authorization": f"Bearer {token_for(user_id)}"},
+            "task_ids": task_ids[user_id],
+            "created": [],
+        }
+        for user_id in user_ids
+    ]
+
+
+async def seed_remote(client: httpx.AsyncClient, n_users: int, tasks_per_user: int, concurrency: int) -> list[dict]:
+    """
+    Crea usuarios y tareas a través de la API de un servidor externo.
+    """
+    run = uuid.uuid4().hex[:8]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create_user(i: int) -> dict:
+        async with semaphore:
+            email = f"load{i}-{run}@example.com"
+            response = await client.post("/api/auth/register", json={
+                "email": email, "username": f"load{i}-{run}", "password": PASSWORD
+            })
+            response.raise_for_status()
+            response = await client.post("/api/auth/login", data={"username": email, "password": PASSWORD})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+            task_ids = []
+            for start in range(0, tasks_per_user, BULK_CHUNK):
+                response = await client.post("/api/tasks/bulk", headers=headers, json={"items": [
+                    {"title": f"Tarea {j}", "description": f"Descripción de prueba de carga número {j}"}
+                    for j in range(start, min(start + BULK_CHUNK, tasks_per_user))
+                ]})
+                response.raise_for_status()
+                task_ids.extend(task["id"] for task in response.json())
+            return {"headers": headers, "task_ids": task_ids, "created": []}
+
+    return list(await asyncio.gather(*(create_user(i) for i in range(n_users))))
+
+
+async def scenario_auth(client, recorder, users, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+    run = uuid.uuid4().hex[:8]
+
+    async def one(i: int):
+        async with semaphore:
+            email = f"burst{i}-{run}@example.com"
+            await recorder.request(client, "POST /api/auth/register", "POST", "/api/auth/register", json={
+                "email": email, "username": f"burst{i}-{run}", "password": PASSWORD
+            })
+            await recorder.request(client, "POST /api/auth/login", "POST", "/api/auth/login", data={
+                "username": email, "password": PASSWORD
+            })
+
+    await asyncio.gather(*(one(i) for i in range(args.auth_users)))
+
+
+async def scenario_pagination(client, recorder, users, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(user: dict):
+        async with semaphore:
+            response = await recorder.request(
+                client, "GET /api/tasks/", "GET", "/api/tasks/", headers=user["headers"], params={"limit": 20}
+            )
+            for _ in range(args.pages - 1):
+                cursor = response.headers.get("X-Next-Cursor") if response is not None else None
+                if not cursor:
+                    break
+                response = await recorder.request(
+                    client, "GET /api/tasks/?cursor", "GET", "/api/tasks/",
+                    headers=user["headers"], params={"limit": 20, "cursor": cursor}
+                )
+
+    await asyncio.gather(*(one(user) for user in users))
+
+
+async def scenario_writes(client, recorder, users, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(user: dict):
+        headers = user["headers"]
+        for i in range(args.iterations):
+            async with semaphore:
+                response = await recorder.request(client, "POST /api/tasks/", "POST", "/api/tasks/", headers=headers, json={
+                    "title": f"Tarea de escritura {i}", "description": "Creada por la prueba de carga"
+                })
+                if response is None or response.status_code != 201:
+                    continue
+                url = f"/api/tasks/{response.json()['id']}"
+                await recorder.request(client, "GET /api/tasks/{task_id}", "GET", url, headers=headers)
+                await recorder.request(client, "PUT /api/tasks/{task_id}", "PUT", url, headers=headers, json={
+                    "is_completed": True
+                })
+                await recorder.request(client, "DELETE /api/tasks/{task_id}", "DELETE", url, headers=headers)
+
+    await asyncio.gather(*(one(user) for user in users))
+
+
+async def scenario_mixed(client, recorder, users, args):
+    """
+    Cada usuario es un cliente virtual que repite operaciones al azar
+    (según MIXED_WEIGHTS) hasta que se acaba el tiempo.
+    """
+    operations = list(MIXED_WEIGHTS)
+    weights = list(MIXED_WEIGHTS.values())
+    deadline = time.perf_counter() + args.duration
+
+    async def one(index: int, user: dict):
+        rng = random.Random(args.seed + index)
+        headers = user["headers"]
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            if operation in ("update", "delete") and not user["created"]:
+                operation = "create"
+
+            if operation == "list":
+                await recorder.request(client, "GET /api/tasks/", "GET", "/api/tasks/", headers=headers, params={
+                    "limit": 20, "is_completed": rng.choice(["true", "false"])
+                })
+            elif operation == "get" and user["task_ids"]:
+                await recorder.request(
+                    client, "GET /api/tasks/{task_id}", "GET", f"/api/tasks/{rng.choice(user['task_ids'])}",
+                    headers=headers
+                )
+            elif operation == "stats":
+                await recorder.request(client, "GET /api/tasks/stats", "GET", "/api/tasks/stats", headers=headers)
+            elif operation == "search":
+                await recorder.request(client, "GET /api/tasks/search", "GET", "/api/tasks/search", headers=headers, params={
+                    "q": f"tarea {rng.randrange(100)}"
+                })
+            elif operation == "create":
+                response = await recorder.request(client, "POST /api/tasks/", "POST", "/api/tasks/", headers=headers, json={
+                    "title": "Tarea mixta", "description": "Creada por la prueba de carga"
+                })
+                if response is not None and response.status_code == 201:
+                    user["created"].append(response.json()["id"])
+            elif operation == "update":
+                await recorder.request(
+                    client, "PUT /api/tasks/{task_id}", "PUT", f"/api/tasks/{rng.choice(user['created'])}",
+                    headers=headers, json={"is_completed": rng.random() < 0.5}
+                )
+            elif operation == "delete":
+                task_id = user["created"].pop(rng.randrange(len(user["created"])))
+                await recorder.request(
+                    client, "DELETE /api/tasks/{task_id}", "DELETE", f"/api/tasks/{task_id}", headers=headers
+                )
+
+    await asyncio.gather(*(one(index, user) for index, user in enumerate(users)))
+
+
+SCENARIO_FUNCTIONS = {
+    "auth": scenario_auth,
+    "pagination": scenario_pagination,
+    "writes": scenario_writes,
+    "mixed": scenario_mixed,
+}
+
+
+async def run(args) -> dict:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=args.timeout)
+
+    async with client:
+        with Timer() as seeding:
+            if args.url:
+                users = await seed_remote(client, args.users, args.tasks_per_user, args.concurrency)
+            else:
+                users = seed_local(args.users, args.tasks_per_user)
+        print(f"Sembrados {len(users)} usuarios con {args.tasks_per_user} tareas en {seeding.elapsed:.1f}s",
+              file=sys.stderr)
+
+        scenarios = {}
+        for name in args.scenarios:
+            recorder = Recorder()
+            with Timer() as t:
+                await SCENARIO_FUNCTIONS[name](client, recorder, users, args)
+            scenarios[name] = {"elapsed_s": t.elapsed, "endpoints": recorder.report(t.elapsed)}
+
+    return {
+        "meta": {
+            "target": args.url or "in-process",
+            "env": args.env,
+            "users": args.users,
+            "tasks_per_user": args.tasks_per_user,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": scenarios,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float, min_requests: int) -> list[str]:
+    """
+    Endpoints que empeoran respecto a la línea base: p95 más alto o menos
+    peticiones por segundo (en más de tolerance), o más errores.
+    Un aumento de p95 menor que min_delta_ms se considera ruido, y el p95
+    de un endpoint con menos de min_requests peticiones no se compara.
+    """
+    regressions = []
+    for scenario, base in baseline["scenarios"].items():
+        current = results["scenarios"].get(scenario)
+        if current is None:
+            continue
+        for name, before in base["endpoints"].items():
+            after = current["endpoints"].get(name)
+            if after is None:
+                continue
+            label = f"{scenario} {name}"
+            if (min(before["requests"], after["requests"]) >= min_requests
+                    and after["p95_ms"] > before["p95_ms"] * (1 + tolerance)
+                    and after["p95_ms"] - before["p95_ms"] > min_delta_ms):
+                regressions.append(f"{label}: p95 {before['p95_ms']:.1f}ms -> {after['p95_ms']:.1f}ms")
+            if after["rps"] < before["rps"] * (1 - tolerance):
+                regressions.append(f"{label}: {before['rps']:.1f} -> {after['rps']:.1f} req/s")
+            if after["errors"] / after["requests"] > before["errors"] / before["requests"] + 0.01:
+                regressions.append(f"{label}: {after['errors']} errores de {after['requests']} peticiones")
+    return regressions
+
+
+def print_table(results: dict) -> None:
+    for scenario, data in results["scenarios"].items():
+        print(f"\n[{scenario}] {data['elapsed_s']:.1f}s", file=sys.stderr)
+        for name, stats in data["endpoints"].items():
+            print(f"  {name:<32} {stats['requests']:6d} req {stats['errors']:4d} err "
+                  f"{stats['rps']:8.1f} req/s  p50={stats['p50_ms']:7.1f}ms  "
+                  f"p95={stats['p95_ms']:7.1f}ms  p99={stats['p99_ms']:7.1f}ms", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Servidor externo; por defecto la aplicación en el mismo proceso")
+    parser.add_argument("--env", action="append", default=[], metavar="CLAVE=VALOR",
+                        help="Configuración de la aplicación en el mismo proceso (p. ej. DB_ASYNC=true)")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tasks-per-user", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--auth-users", type=int, default=20, help="Registros y logins del escenario auth")
+    parser.add_argument("--pages", type=int, default=5, help="Páginas por usuario en pagination")
+    parser.add_argument("--iterations", type=int, default=5, help="Ciclos por usuario en writes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos del escenario mixed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Guardar el resultado JSON en este archivo")
+    parser.add_argument("--save-baseline", metavar="ARCHIVO", help="Guardar el resultado como línea base")
+    parser.add_argument("--baseline", metavar="ARCHIVO", help="Comparar con esta línea base")
+    parser.add_argument("--tolerance", type=float, default=0.3,
+                        help="Empeoramiento relativo permitido (0.3 = 30%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Aumento mínimo de p95 para considerarlo regresión")
+    parser.add_argument("--min-requests", type=int, default=200,
+                        help="Peticiones necesarias para comparar el p95 de un endpoint")
+    args = parser.parse_args()
+
+    if not args.url:
+        configure(**dict(item.split("=", 1) for item in args.env))
+        # Con SQLite las escrituras concurrentes esperan el bloqueo: no llenar la salida de avisos
+        logging.getLogger("app.sql").setLevel(logging.ERROR)
+        from common import create_schema
+        create_schema()
+
+    results = asyncio.run(run(args))
+    print_table(results)
+    print(json.dumps(results))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+                f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["target"] != results["meta"]["target"] or baseline["meta"]["env"] != results["meta"]["env"]:
+            print("\nAviso: la línea base se generó con otro destino o configuración", file=sys.stderr)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms, args.min_requests)
+        if regressions:
+            print("\nRegresiones respecto a la línea base:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print("\nSin regresiones respecto a la línea base", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
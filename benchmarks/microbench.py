@@ -0,0 +1,305 @@
+"""
+Microbenchmarks de las funciones más usadas en cada petición.
+
+- Seguridad: create_access_token, decode_access_token (con y sin caché) y
+  verify_password con varios costes de bcrypt.
+- Esquemas: Task.model_validate de 100 objetos ORM.
+- CRUD: get_tasks_by_owner, get_user y create_task con 1k, 100k y 1M
+  tareas en una base de datos SQLite local (una sesión nueva por llamada,
+  como en la API).
+
+Cada medida se calibra para que una repetición dure al menos --min-time,
+se calienta con --warmup repeticiones y se repite --repeat veces con el
+recolector de basura desactivado. Se informa de mediana, media, mínimo,
+máximo y desviación relativa por llamada.
+
+El informe JSON se escribe en la salida estándar (y en --output) e incluye
+el commit, así que dos informes de commits distintos se pueden comparar
+con --compare.
+
+Uso:
+    python benchmarks/microbench.py
+    python benchmarks/microbench.py --sizes 1000 100000 --filter get_
+    python benchmarks/microbench.py --output after.json --compare before.json
+"""
+import argparse
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from common import ROOT, configure
+
+# Usuarios por cada 100 tareas al sembrar la base de datos
+TASKS_PER_USER = 100
+
+
+def _run(fn, number: int) -> float:
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def measure(fn, warmup: int, repeat: int, min_time: float) -> dict:
+    """
+    Tiempo por llamada de fn en microsegundos.
+
+    Como timeit: se elige el número de llamadas por repetición para que
+    cada repetición dure al menos min_time.
+    """
+    number = 1
+    while True:
+        elapsed = _run(fn, number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+
+    for _ in range(warmup):
+        _run(fn, number)
+    samples = [_run(fn, number) / number * 1e6 for _ in range(repeat)]
+
+    mean = statistics.fmean(samples)
+    stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    return {
+        "number": number,
+        "repeat": repeat,
+        "median_us": statistics.median(samples),
+        "mean_us": mean,
+        "min_us": min(samples),
+        "max_us": max(samples),
+        "rsd_pct": stdev / mean * 100 if mean else 0.0,
+    }
+
+
+def security_benchmarks(args):
+    from passlib.hash import bcrypt
+    from app.core.security import create_access_token, decode_access_token, token_cache, verify_password
+
+    token = create_access_token({"sub": "1"})
+    yield "create_access_token", {}, lambda: create_access_token({"sub": "1"})
+
+    ttl = token_cache.ttl
+    token_cache.ttl = 0
+    yield "decode_access_token", {"cache": False}, lambda: decode_access_token(token)
+    token_cache.ttl = ttl
+    decode_access_token(token)
+    yield "decode_access_token", {"cache": True}, lambda: decode_access_token(token)
+
+    for rounds in args.bcrypt_rounds:
+        hashed = bcrypt.using(rounds=rounds).hash("benchmark-pass")
+        yield "verify_password", {"rounds": rounds}, lambda hashed=hashed: verify_password("benchmark-pass", hashed)
+
+
+def schema_benchmarks(args):
+    from sqlalchemy import select
+    from app.db.database import SessionLocal
+    from app.models import Task
+    from app.schemas.task import Task as TaskSchema
+
+    db = SessionLocal()
+    try:
+        tasks = db.scalars(select(Task).limit(100)).all()
+    finally:
+        db.close()
+
+    def validate():
+        for task in tasks:
+            TaskSchema.model_validate(task)
+
+    yield "Task.model_validate", {"rows": len(tasks)}, validate
+
+
+def grow(n_tasks: int, seeded: dict) -> None:
+    """
+    Añade usuarios y tareas hasta tener n_tasks (TASKS_PER_USER por usuario).
+    Los tamaños se siembran de menor a mayor sobre la misma base de datos.
+    """
+    from sqlalchemy import insert
+    from app.crud.task_stats import rebuild_task_stats
+    from app.db.database import SessionLocal
+    from app.models import Task, User
+
+    db = SessionLocal()
+    try:
+        for start in range(seeded["tasks"], n_tasks, 10_000):
+            end = min(start + 10_000, n_tasks)
+            first_user = start // TASKS_PER_USER
+            last_user = (end - 1) // TASKS_PER_USER
+            new_users = range(max(first_user, len(seeded["users"])), last_user + 1)
+            if new_users:
+                seeded["users"].extend(db.scalars(insert(User).returning(User.id), [
+                    {"email": f"micro{n}@example.com", "username": f"micro{n}", "hashed_password": "x"}
+                    for n in new_users
+                ]).all())
+            db.execute(insert(Task.__table__), [
+                {
+                    "title": f"Tarea {i}",
+                    "description": f"Descripción de la tarea {i}",
+                    "is_completed": i % 3 == 0,
+                    "owner_id": seeded["users"][i // TASKS_PER_USER],
+                }
+                for i in range(start, end)
+            ])
+        db.commit()
+
+        last_id = 0
+        while (last_id := rebuild_task_stats(db, after_id=last_id)) is not None:
+            pass
+    finally:
+        db.close()
+    seeded["tasks"] = n_tasks
+
+
+def crud_benchmarks(args):
+    from app.crud.task import create_task, get_tasks_by_owner
+    from app.crud.user import get_user
+    from app.db.database import SessionLocal
+    from app.schemas.task import TaskCreate
+
+    seeded = {"tasks": 0, "users": []}
+    new_task = TaskCreate(title="Tarea nueva", description="Creada por el microbenchmark")
+
+    def with_session(fn, *fn_args):
+        # Una sesión por llamada, como _run_and_release en la API
+        def call():
+            db = SessionLocal()
+            try:
+                return fn(db, *fn_args)
+            finally:
+                db.close()
+        return call
+
+    def cycling(fn, *fn_args):
+        # Recorrer los usuarios para no medir siempre la misma página en caché de SQLite
+        users = seeded["users"]
+        state = {"i": 0}
+
+        def call():
+            state["i"] = (state["i"] + 7919) % len(users)
+            db = SessionLocal()
+            try:
+                return fn(db, users[state["i"]], *fn_args)
+            finally:
+                db.close()
+        return call
+
+    for size in sorted(args.sizes):
+        started = time.perf_counter()
+        grow(size, seeded)
+        print(f"Base de datos con {size} tareas ({time.perf_counter() - started:.1f}s)", file=sys.stderr)
+
+        params = {"rows": size}
+        yield "get_tasks_by_owner", params, cycling(get_tasks_by_owner)
+        yield "get_user", params, cycling(get_user)
+        # Cada llamada inserta una fila; el tamaño crece poco respecto a size
+        yield "create_task", params, with_session(create_task, new_task, seeded["users"][0])
+
+
+GROUPS = {
+    "security": security_benchmarks,
+    "crud": crud_benchmarks,
+    "schema": schema_benchmarks,
+}
+
+
+def benchmark_name(name: str, params: dict) -> str:
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{key}={value}' for key, value in params.items())}]"
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: list[dict], previous: dict) -> None:
+    """
+    Cambio de la mediana respecto a otro informe. Las diferencias menores
+    que el doble de la desviación relativa de ambos se marcan como ruido.
+    """
+    before = {result["name"]: result for result in previous["results"]}
+    print(f"\nComparación con {previous['meta'].get('commit')}:", file=sys.stderr)
+    for result in results:
+        old = before.get(result["name"])
+        if old is None:
+            continue
+        change = (result["median_us"] / old["median_us"] - 1) * 100
+        noise = 2 * max(result["rsd_pct"], old["rsd_pct"])
+        verdict = "ruido" if abs(change) <= noise else ("más lento" if change > 0 else "más rápido")
+        print(f"  {result['name']:<40} {old['median_us']:12.2f} -> {result['median_us']:12.2f} µs "
+              f"({change:+6.1f}%, {verdict})", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="+", choices=list(GROUPS), default=list(GROUPS))
+    parser.add_argument("--filter", help="Medir solo las funciones cuyo nombre contiene este texto")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000],
+                        help="Número de tareas en la base de datos para el grupo crud")
+    parser.add_argument("--bcrypt-rounds", type=int, nargs="+", default=[4, 10, 12])
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="Segundos mínimos por repetición")
+    parser.add_argument("--output", help="Guardar el informe JSON en este archivo")
+    parser.add_argument("--compare", metavar="ARCHIVO", help="Informe anterior con el que comparar")
+    args = parser.parse_args()
+
+    configure(SQL_INSTRUMENTATION=False, METRICS_ENABLED=False)
+    from common import create_schema
+    create_schema()
+
+    # El grupo schema necesita tareas: se ejecuta después de sembrar la base de datos
+    if "schema" in args.groups and "crud" not in args.groups:
+        grow(1_000, {"tasks": 0, "users": []})
+
+    results = []
+    for group in sorted(args.groups, key=list(GROUPS).index):
+        for name, params, fn in GROUPS[group](args):
+            full_name = benchmark_name(name, params)
+            if args.filter and args.filter not in full_name:
+                continue
+            result = {"name": full_name, "group": group, "params": params,
+                      **measure(fn, args.warmup, args.repeat, args.min_time)}
+            results.append(result)
+            print(f"{full_name:<40} {result['median_us']:12.2f} µs  "
+                  f"(min {result['min_us']:.2f}, ±{result['rsd_pct']:.1f}%, "
+                  f"{result['repeat']}x{result['number']})", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "warmup": args.warmup,
+            "repeat": args.repeat,
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    print(json.dumps(report))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()